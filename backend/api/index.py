@@ -14,6 +14,8 @@ if backend_dir not in sys.path:
 from src.main import app
 
 # Use Mangum to wrap FastAPI for serverless
+# lifespan="off": no background tasks (write-behind queue, pool refills) run
+# here, so game sessions are always saved synchronously (see DEPLOYMENT.md)
 try:
     from mangum import Mangum
     handler = Mangum(app, lifespan="off")
@@ -0,0 +1,122 @@
+"""
+Benchmark: concurrent-request throughput with the sync vs async Supabase data layer
+
+Starts a stand-in PostgREST server that answers every query after a fixed
+delay, then serves two routes from a single uvicorn worker:
+
+  /sync   - the old pattern: blocking ``supabase.Client`` call inside ``async def``
+  /async  - the new pattern: ``AsyncDatabase`` pooled PostgREST client
+
+and fires the same number of concurrent requests at each.
+
+Usage (from backend/):
+    python -m benchmarks.bench_async_db --requests 200 --concurrency 50 --latency-ms 50
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _serve_in_thread(app, port: int):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error", workers=1))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def build_upstream(latency: float):
+    """Stand-in PostgREST that sleeps ``latency`` seconds per query"""
+    from fastapi import FastAPI
+
+    upstream = FastAPI()
+
+    @upstream.get("/rest/v1/{table}")
+    async def select(table: str):
+        await asyncio.sleep(latency)
+        return [{"user_id": "bench", "total_games_played": 1}]
+
+    return upstream
+
+
+def build_app():
+    from fastapi import FastAPI
+    from src.utils.database import Database, AsyncDatabase
+
+    app = FastAPI()
+
+    @app.get("/sync")
+    async def sync_route():
+        db = Database.get_client()
+        result = db.table("user_stats").select("*").eq("user_id", "bench").execute()
+        return result.data
+
+    @app.get("/async")
+    async def async_route():
+        db = AsyncDatabase.get_client()
+        result = await db.table("user_stats").select("*").eq("user_id", "bench").execute()
+        return result.data
+
+    return app
+
+
+async def run_load(url: str, total: int, concurrency: int) -> float:
+    import httpx
+
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=120) as client:
+        async def one():
+            async with semaphore:
+                response = await client.get(url)
+                response.raise_for_status()
+
+        await one()  # warm up connections and clients
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    upstream_port = _free_port()
+    os.environ["SUPABASE_URL"] = f"http://127.0.0.1:{upstream_port}"
+    # Any JWT-shaped string passes client-side validation; the stand-in ignores it
+    os.environ["SUPABASE_SERVICE_ROLE_KEY"] = "bench.bench.bench"
+    os.environ["SUPABASE_SERVICE_KEY"] = "bench.bench.bench"
+
+    _serve_in_thread(build_upstream(args.latency_ms / 1000), upstream_port)
+    app_port = _free_port()
+    _serve_in_thread(build_app(), app_port)
+
+    print(f"1 worker, {args.requests} requests, concurrency {args.concurrency}, "
+          f"upstream latency {args.latency_ms:.0f}ms")
+    for route in ("sync", "async"):
+        elapsed = asyncio.run(run_load(f"http://127.0.0.1:{app_port}/{route}", args.requests, args.concurrency))
+        print(f"  /{route:<5}  {elapsed:6.2f}s  {args.requests / elapsed:8.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
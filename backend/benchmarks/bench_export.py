@@ -0,0 +1,203 @@
+"""
+Benchmark: memory use of the streaming history export
+
+Fills a SQLite file with ``--rows`` question_attempts spread over ``--users``
+users, serves it through a stand-in PostgREST (in a child process, so its
+memory isn't counted) and streams /api/export/attempts for growing cohorts
+through one uvicorn worker. Peak Python allocations (tracemalloc) should
+stay flat as the number of exported rows grows.
+
+With ``--naive`` the same rows are also fetched the old way - one
+``.execute()`` per user, held in a list - for comparison.
+
+Usage (from backend/):
+    python -m benchmarks.bench_export --rows 2000000 --users 20
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import re
+import socket
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+COLUMNS = ["id", "session_id", "user_id", "question_id", "topic", "difficulty", "is_correct", "time_spent", "created_at"]
+TOPICS = ["Algebra", "Geometry", "Grammar", "Vocabulary", "Statistics"]
+
+# or=(created_at.gt."<ts>",and(created_at.eq."<ts>",id.gt.<uuid>))
+KEYSET = re.compile(r'created_at\.gt\."([^"]+)",and\(created_at\.eq\."[^"]+",id\.gt\.([0-9a-f-]+)\)')
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def build_database(path: str, rows: int, users: int):
+    """question_attempts table with an index matching the export's keyset order"""
+    conn = sqlite3.connect(path)
+    conn.execute(f"CREATE TABLE question_attempts ({', '.join(COLUMNS)})")
+    user_ids = [str(uuid.UUID(int=i + 1)) for i in range(users)]
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    def generate():
+        for i in range(rows):
+            yield (
+                str(uuid.uuid4()), str(uuid.UUID(int=i // 10 + 1000)), user_ids[i % users],
+                i % 500, TOPICS[i % len(TOPICS)], "medium", i % 3 != 0, 1000 + i % 9000,
+                (start + timedelta(seconds=i // users)).isoformat(),
+            )
+
+    conn.executemany(f"INSERT INTO question_attempts VALUES ({', '.join('?' * len(COLUMNS))})", generate())
+    conn.execute("CREATE INDEX idx_user_created_id ON question_attempts(user_id, created_at, id)")
+    conn.commit()
+    conn.close()
+    return user_ids
+
+
+def serve_upstream(path: str, port: int):
+    """Stand-in PostgREST answering the export's queries from SQLite"""
+    import uvicorn
+    from fastapi import FastAPI, Request
+
+    upstream = FastAPI()
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+
+    @upstream.get("/rest/v1/{table}")
+    def select(table: str, request: Request):
+        params = request.query_params
+        sql = f"SELECT {params['select']} FROM {table} WHERE user_id = ?"
+        args = [params["user_id"].split(".", 1)[1]]
+        keyset = KEYSET.search(params.get("or", ""))
+        if keyset:
+            sql += " AND (created_at > ? OR (created_at = ? AND id > ?))"
+            args += [keyset.group(1), keyset.group(1), keyset.group(2)]
+        sql += " ORDER BY created_at, id"
+        if "limit" in params:
+            sql += " LIMIT ?"
+            args.append(int(params["limit"]))
+        return [
+            {**dict(row), "is_correct": bool(row["is_correct"])} if "is_correct" in row.keys() else dict(row)
+            for row in conn.execute(sql, args)
+        ]
+
+    uvicorn.run(upstream, host="127.0.0.1", port=port, log_level="error")
+
+
+def build_app():
+    from fastapi import FastAPI
+    from src.api import export
+    from src.api.auth import get_current_user
+
+    app = FastAPI()
+    app.include_router(export.router, prefix="/api/export")
+    app.dependency_overrides[get_current_user] = lambda: {"id": "bench-admin"}
+    return app
+
+
+def serve_app(port: int):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(build_app(), host="127.0.0.1", port=port, log_level="error"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+
+def wait_for_port(port: int):
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+
+
+async def stream_export(url: str):
+    import httpx
+
+    lines = 0
+    async with httpx.AsyncClient(timeout=None) as client:
+        async with client.stream("GET", url) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_text():
+                lines += chunk.count("\n")
+    return lines
+
+
+async def naive_export(user_ids):
+    from postgrest import AsyncPostgrestClient
+
+    # Own client: the shared AsyncDatabase one belongs to the app's event loop
+    async with AsyncPostgrestClient(f"{os.environ['SUPABASE_URL']}/rest/v1", timeout=None) as db:
+        rows = []
+        for user_id in user_ids:
+            result = await db.table("question_attempts").select(",".join(COLUMNS)).eq("user_id", user_id).execute()
+            rows.extend(result.data)
+    return len(rows)
+
+
+def measure(coro):
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = asyncio.run(coro)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, elapsed, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--naive", action="store_true", help="also measure a fetch-everything export")
+    args = parser.parse_args()
+
+    os.environ["EXPORT_ADMIN_USER_IDS"] = "bench-admin"
+    upstream_port = _free_port()
+    os.environ["SUPABASE_URL"] = f"http://127.0.0.1:{upstream_port}"
+    # Any JWT-shaped string passes client-side validation; the stand-in ignores it
+    os.environ["SUPABASE_SERVICE_ROLE_KEY"] = "bench.bench.bench"
+    os.environ["SUPABASE_SERVICE_KEY"] = "bench.bench.bench"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "history.db")
+        start = time.perf_counter()
+        user_ids = build_database(path, args.rows, args.users)
+        print(f"Built {args.rows:,} rows for {args.users} users in {time.perf_counter() - start:.1f}s")
+
+        upstream = multiprocessing.Process(target=serve_upstream, args=(path, upstream_port), daemon=True)
+        upstream.start()
+        wait_for_port(upstream_port)
+        app_port = _free_port()
+        serve_app(app_port)
+
+        print(f"{'users':>6} {'rows':>10} {'mode':>7} {'seconds':>8} {'rows/s':>9} {'peak MiB':>9}")
+        for count in sorted({1, max(1, args.users // 4), args.users}):
+            cohort = user_ids[:count]
+            query = "&".join(f"user_id={u}" for u in cohort)
+            rows, elapsed, peak = measure(stream_export(f"http://127.0.0.1:{app_port}/api/export/attempts?{query}"))
+            print(f"{count:>6} {rows:>10,} {'stream':>7} {elapsed:8.1f} {rows / elapsed:9,.0f} {peak:9.1f}")
+            if args.naive:
+                rows, elapsed, peak = measure(naive_export(cohort))
+                print(f"{count:>6} {rows:>10,} {'naive':>7} {elapsed:8.1f} {rows / elapsed:9,.0f} {peak:9.1f}")
+
+        upstream.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: mastery model batch refit and per-session update
+
+Simulates ``--attempts`` question attempts from users with known per-topic
+abilities answering questions with known difficulties, then times:
+
+  encode  - mapping ids to dense indices (what the refit does per page)
+  fit     - the batched NumPy fit over every attempt
+  update  - the incremental update for one saved session
+
+and reports how well the fitted abilities recover the true ones.
+
+Usage (from backend/):
+    python -m benchmarks.bench_mastery --attempts 3000000 --users 50000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TOPICS = ["Algebra", "Geometry", "Grammar", "Vocabulary", "Statistics", "Reading", "Functions", "Probability"]
+LABELS = ["easy", "medium", "hard"]
+
+
+def simulate(rng, attempts: int, users: int, questions: int):
+    abilities = rng.normal(0, 1, (users, len(TOPICS)))
+    labels = rng.integers(0, len(LABELS), questions)
+    difficulties = labels - 1 + rng.normal(0, 0.5, questions)
+    question_topics = rng.integers(0, len(TOPICS), questions)
+
+    u = rng.integers(0, users, attempts)
+    q = rng.integers(0, questions, attempts)
+    t = question_topics[q]
+    correct = rng.random(attempts) < 1 / (1 + np.exp(-(abilities[u, t] - difficulties[q])))
+
+    user_ids = [f"user-{i}" for i in range(users)]
+    rows = [
+        (user_ids[ui], TOPICS[ti], LABELS[labels[qi]], int(qi), bool(ci))
+        for ui, ti, qi, ci in zip(u.tolist(), t.tolist(), q.tolist(), correct.tolist())
+    ]
+    return rows, abilities
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--attempts", type=int, default=3_000_000)
+    parser.add_argument("--users", type=int, default=50_000)
+    parser.add_argument("--questions", type=int, default=5_000)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    from src.services.mastery import MasteryModel
+
+    rng = np.random.default_rng(0)
+    rows, abilities = simulate(rng, args.attempts, args.users, args.questions)
+    print(f"Simulated {args.attempts:,} attempts, {args.users:,} users, {args.questions:,} questions")
+
+    model = MasteryModel()
+    start = time.perf_counter()
+    arrays = model.encode(rows)
+    encoded = time.perf_counter()
+    model.fit(*arrays, iterations=args.iterations)
+    fitted = time.perf_counter()
+    print(f"encode {encoded - start:8.2f}s")
+    print(f"fit    {fitted - encoded:8.2f}s  ({args.iterations} iterations)")
+
+    # Recovery of the true abilities, over user/topic cells with attempts
+    rows_idx = np.array([model.users[f"user-{i}"] for i in range(args.users) if f"user-{i}" in model.users])
+    users_idx = np.array([i for i in range(args.users) if f"user-{i}" in model.users])
+    topic_cols = np.array([model.topics[topic] for topic in TOPICS])
+    fitted_abilities = model.ability[rows_idx][:, topic_cols]
+    seen = model.attempts[rows_idx][:, topic_cols] > 0
+    corr = np.corrcoef(fitted_abilities[seen], abilities[users_idx][seen])[0, 1]
+    print(f"ability correlation with truth: {corr:.3f}")
+
+    session = rows[:10]
+    runs = 1000
+    start = time.perf_counter()
+    for _ in range(runs):
+        model.update(session)
+    elapsed = (time.perf_counter() - start) / runs
+    print(f"update {elapsed * 1e6:8.1f}us per 10-question session")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark: near-duplicate question index at pool scale
+
+Builds ``--questions`` synthetic SAT-style questions from templates with
+random numbers and names, then times:
+
+  index   - hashing and bulk-indexing all of them (what startup does)
+  lookup  - one near-duplicate check of a new question against the index
+  insert  - indexing one accepted question
+
+and reports how many re-worded copies of indexed questions are caught.
+
+Usage (from backend/):
+    python -m benchmarks.bench_question_index --questions 300000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TEMPLATES = [
+    "If {a}x + {b} = {c}, what is the value of x?",
+    "A rectangle has a length of {a} cm and a width of {b} cm. What is its perimeter in {unit}?",
+    "{name} bought {a} notebooks for ${b} each and paid with a ${c} bill. How much change did {name} receive?",
+    "What is the mean of the data set {a}, {b}, {c}, {d}?",
+    "A line passes through ({a}, {b}) and ({c}, {d}). What is the slope of the line?",
+    "Which choice best describes the function of the {ordinal} paragraph in the passage about {topic}?",
+    "The probability of drawing a red marble from a bag is {a}/{c}. If the bag has {d} marbles, how many are red?",
+    "In the sentence about {topic}, which word is closest in meaning to \"{word}\"?",
+]
+NAMES = ["Maria", "James", "Aiko", "Omar", "Priya", "Lucas", "Zoe", "Kwame"]
+TOPICS = ["volcanoes", "the printing press", "migration", "urban gardens", "jazz", "glaciers", "coral reefs"]
+WORDS = ["ephemeral", "candid", "austere", "prolific", "tenuous", "lucid", "arbitrary", "benevolent"]
+
+
+def make_question(rng: random.Random) -> str:
+    return rng.choice(TEMPLATES).format(
+        a=rng.randint(2, 999), b=rng.randint(2, 999), c=rng.randint(2, 999), d=rng.randint(2, 999),
+        name=rng.choice(NAMES), unit=rng.choice(["cm", "meters"]), topic=rng.choice(TOPICS),
+        word=rng.choice(WORDS), ordinal=rng.choice(["first", "second", "third", "last"]),
+    )
+
+
+def reword(text: str) -> str:
+    """A near-duplicate: different spacing and punctuation, same question"""
+    return text.replace(" = ", "=").replace("?", " ?").replace(",", " ,").upper()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=300_000)
+    parser.add_argument("--lookups", type=int, default=2_000)
+    args = parser.parse_args()
+
+    from src.services.question_index import MinHashIndex, signatures
+
+    rng = random.Random(0)
+    texts = [make_question(rng) for _ in range(args.questions)]
+
+    index = MinHashIndex()
+    start = time.perf_counter()
+    sigs = signatures(texts)
+    hashed = time.perf_counter()
+    index.add(sigs)
+    indexed = time.perf_counter()
+    print(f"index  {hashed - start:8.2f}s hashing + {indexed - hashed:6.2f}s indexing {args.questions:,} questions")
+
+    probes = signatures([reword(rng.choice(texts)) for _ in range(args.lookups)])
+    fresh = signatures([make_question(rng) for _ in range(args.lookups)])
+
+    start = time.perf_counter()
+    caught = sum(index.best_match(sig) >= 0.7 for sig in probes)
+    elapsed = (time.perf_counter() - start) / args.lookups
+    print(f"lookup {elapsed * 1e6:8.1f}us per near-duplicate check; caught {caught / args.lookups:.1%} of re-worded copies")
+
+    start = time.perf_counter()
+    for sig in fresh:
+        index.best_match(sig)
+        index.add(sig[None, :])
+    elapsed = (time.perf_counter() - start) / args.lookups
+    print(f"insert {elapsed * 1e6:8.1f}us per check + insert of a new question")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+-- Check: per-user question_attempts queries use the (user_id, ...) indexes
+--
+-- Builds a scratch copy of question_attempts with the same indexes, fills it
+-- with synthetic data (200k attempts across 2,000 users), and EXPLAINs the
+-- per-user topic query and the recent-attempts query against it. Raises an
+-- error if either plan falls back to a sequential scan. Nothing touches the
+-- real table; the scratch table is dropped at the end.
+--
+-- Run in the Supabase SQL Editor or: psql "$DATABASE_URL" -f database/checks/question_attempts_user_index.sql
+
+CREATE TEMP TABLE qa_plan_check (LIKE question_attempts INCLUDING DEFAULTS INCLUDING INDEXES);
+
+INSERT INTO qa_plan_check (session_id, user_id, question_id, topic, difficulty, is_correct, time_spent, created_at)
+SELECT
+  gen_random_uuid(),
+  ('00000000-0000-0000-0000-' || LPAD((n % 2000)::TEXT, 12, '0'))::UUID,
+  n % 50,
+  (ARRAY['Algebra', 'Geometry', 'Grammar', 'Reading', 'Statistics', 'Vocabulary'])[1 + n % 6],
+  (ARRAY['easy', 'medium', 'hard'])[1 + n % 3],
+  n % 3 <> 0,
+  1000 + n % 5000,
+  TIMEZONE('utc', NOW()) - (n || ' seconds')::INTERVAL
+FROM generate_series(1, 200000) AS n;
+
+ANALYZE qa_plan_check;
+
+DO $$
+DECLARE
+  v_line TEXT;
+  v_plan TEXT;
+  v_query TEXT;
+BEGIN
+  FOREACH v_query IN ARRAY ARRAY[
+    -- Per-user topic breakdown
+    $q$SELECT topic, COUNT(*), COUNT(*) FILTER (WHERE is_correct), SUM(time_spent)
+       FROM qa_plan_check WHERE user_id = '00000000-0000-0000-0000-000000000042' GROUP BY topic$q$,
+    -- One topic for one user
+    $q$SELECT is_correct, time_spent FROM qa_plan_check
+       WHERE user_id = '00000000-0000-0000-0000-000000000042' AND topic = 'Algebra'$q$,
+    -- A user's most recent attempts
+    $q$SELECT * FROM qa_plan_check
+       WHERE user_id = '00000000-0000-0000-0000-000000000042' ORDER BY created_at DESC LIMIT 50$q$
+  ]
+  LOOP
+    v_plan := '';
+    FOR v_line IN EXECUTE 'EXPLAIN ' || v_query LOOP
+      v_plan := v_plan || v_line || E'\n';
+    END LOOP;
+    RAISE NOTICE E'%\n%', v_query, v_plan;
+
+    IF v_plan LIKE '%Seq Scan%' THEN
+      RAISE EXCEPTION 'Sequential scan in per-user question_attempts plan:%', E'\n' || v_plan;
+    END IF;
+  END LOOP;
+END;
+$$;
+
+DROP TABLE qa_plan_check;
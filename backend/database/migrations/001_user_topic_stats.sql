@@ -0,0 +1,53 @@
+-- Migration 001: per-user, per-topic aggregate table
+--
+-- Adds user_topic_stats and backfills it from existing question_attempts.
+-- After running this, re-run the Functions section at the end of schema.sql
+-- so the save functions start maintaining the table.
+
+CREATE TABLE IF NOT EXISTS user_topic_stats (
+  user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+  topic TEXT NOT NULL,
+  total INTEGER NOT NULL DEFAULT 0,
+  correct INTEGER NOT NULL DEFAULT 0,
+  total_time BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc', NOW()) NOT NULL,
+  PRIMARY KEY (user_id, topic)
+);
+
+ALTER TABLE user_topic_stats ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can view their own topic stats" ON user_topic_stats;
+CREATE POLICY "Users can view their own topic stats"
+  ON user_topic_stats FOR SELECT
+  USING (auth.uid() = user_id);
+
+-- Backfill: recompute every user's totals from scratch (safe to re-run)
+INSERT INTO user_topic_stats (user_id, topic, total, correct, total_time, updated_at)
+SELECT
+  gs.user_id,
+  qa.topic,
+  COUNT(*),
+  COUNT(*) FILTER (WHERE qa.is_correct),
+  COALESCE(SUM(qa.time_spent), 0),
+  TIMEZONE('utc', NOW())
+FROM question_attempts AS qa
+JOIN game_sessions AS gs ON gs.id = qa.session_id
+GROUP BY gs.user_id, qa.topic
+ON CONFLICT (user_id, topic) DO UPDATE SET
+  total = EXCLUDED.total,
+  correct = EXCLUDED.correct,
+  total_time = EXCLUDED.total_time,
+  updated_at = EXCLUDED.updated_at;
+
+-- Relabel weak/strong topics from lifetime per-topic accuracy
+UPDATE user_stats AS us SET
+  weak_topics = ARRAY(
+    SELECT t.topic FROM user_topic_stats AS t
+    WHERE t.user_id = us.user_id AND t.total > 0 AND t.correct::DECIMAL / t.total < 0.5
+    ORDER BY t.topic
+  ),
+  strong_topics = ARRAY(
+    SELECT t.topic FROM user_topic_stats AS t
+    WHERE t.user_id = us.user_id AND t.total > 0 AND t.correct::DECIMAL / t.total >= 0.8
+    ORDER BY t.topic
+  );
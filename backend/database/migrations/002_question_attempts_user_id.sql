@@ -0,0 +1,90 @@
+-- Migration 002: denormalize user_id onto question_attempts
+--
+-- Per-user attempt queries filter question_attempts.user_id directly and RLS
+-- compares it to auth.uid() instead of running an EXISTS join per row.
+-- Safe to run while the app is live: writers that don't send user_id yet are
+-- covered by the fill trigger, the backfill commits every batch, NOT NULL is
+-- proven by a constraint validated without blocking writes, and the indexes
+-- are built concurrently. Re-run the Functions section at the end of
+-- schema.sql afterwards so the save functions write the column themselves.
+--
+-- Run it with psql in autocommit mode (psql -f), not in one transaction:
+-- the backfill procedure COMMITs between batches and CREATE INDEX
+-- CONCURRENTLY refuses to run inside a transaction block.
+
+ALTER TABLE question_attempts
+  ADD COLUMN IF NOT EXISTS user_id UUID REFERENCES auth.users(id) ON DELETE CASCADE;
+
+-- Keep new rows populated from here on
+CREATE OR REPLACE FUNCTION fill_question_attempt_user_id()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF NEW.user_id IS NULL THEN
+    SELECT user_id INTO NEW.user_id FROM game_sessions WHERE id = NEW.session_id;
+  END IF;
+  RETURN NEW;
+END;
+$$;
+
+CREATE OR REPLACE TRIGGER question_attempts_fill_user_id
+  BEFORE INSERT ON question_attempts
+  FOR EACH ROW EXECUTE FUNCTION fill_question_attempt_user_id();
+
+-- Backfill existing rows in batches, committing each one so row locks are
+-- held for one batch at a time
+CREATE OR REPLACE PROCEDURE backfill_question_attempt_user_id(p_batch INTEGER DEFAULT 10000)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_updated INTEGER;
+BEGIN
+  LOOP
+    UPDATE question_attempts AS qa
+    SET user_id = gs.user_id
+    FROM game_sessions AS gs
+    WHERE gs.id = qa.session_id
+      AND qa.id IN (SELECT id FROM question_attempts WHERE user_id IS NULL LIMIT p_batch);
+    GET DIAGNOSTICS v_updated = ROW_COUNT;
+    EXIT WHEN v_updated = 0;
+    COMMIT;
+  END LOOP;
+END;
+$$;
+
+CALL backfill_question_attempt_user_id();
+DROP PROCEDURE backfill_question_attempt_user_id(INTEGER);
+
+-- NOT NULL without a long ACCESS EXCLUSIVE scan: the NOT VALID check is added
+-- instantly, VALIDATE scans under SHARE UPDATE EXCLUSIVE (writes continue),
+-- and SET NOT NULL then trusts the validated check instead of rescanning
+ALTER TABLE question_attempts DROP CONSTRAINT IF EXISTS question_attempts_user_id_not_null;
+ALTER TABLE question_attempts
+  ADD CONSTRAINT question_attempts_user_id_not_null CHECK (user_id IS NOT NULL) NOT VALID;
+ALTER TABLE question_attempts VALIDATE CONSTRAINT question_attempts_user_id_not_null;
+ALTER TABLE question_attempts ALTER COLUMN user_id SET NOT NULL;
+ALTER TABLE question_attempts DROP CONSTRAINT question_attempts_user_id_not_null;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_question_attempts_user_topic ON question_attempts(user_id, topic);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_question_attempts_user_created_at ON question_attempts(user_id, created_at DESC);
+
+-- RLS: compare the column directly
+DROP POLICY IF EXISTS "Users can view their own question attempts" ON question_attempts;
+CREATE POLICY "Users can view their own question attempts"
+  ON question_attempts FOR SELECT
+  USING (auth.uid() = user_id);
+
+DROP POLICY IF EXISTS "Users can insert their own question attempts" ON question_attempts;
+CREATE POLICY "Users can insert their own question attempts"
+  ON question_attempts FOR INSERT
+  WITH CHECK (
+    auth.uid() = user_id
+    AND EXISTS (
+      SELECT 1 FROM game_sessions
+      WHERE game_sessions.id = question_attempts.session_id
+      AND game_sessions.user_id = auth.uid()
+    )
+  );
+
+ANALYZE question_attempts;
@@ -0,0 +1,22 @@
+-- Migration 003: topics catalog
+--
+-- /api/questions/topics reads this small table instead of scanning every
+-- question attempt. apply_topic_deltas (Functions section of schema.sql)
+-- keeps it up to date; re-run that section after this migration.
+
+CREATE TABLE IF NOT EXISTS topics (
+  name TEXT PRIMARY KEY,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc', NOW()) NOT NULL
+);
+
+ALTER TABLE topics ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Anyone can view topics" ON topics;
+CREATE POLICY "Anyone can view topics"
+  ON topics FOR SELECT
+  USING (true);
+
+-- Backfill from existing attempts (one-time scan)
+INSERT INTO topics (name)
+SELECT DISTINCT topic FROM question_attempts
+ON CONFLICT (name) DO NOTHING;
@@ -0,0 +1,75 @@
+-- Migration 004: daily rollups for progress charts
+--
+-- /api/stats/progress reads one row per day from these tables instead of
+-- aggregating game_sessions/question_attempts. apply_daily_rollups
+-- (Functions section of schema.sql) keeps them up to date; re-run that
+-- section after this migration.
+
+CREATE TABLE IF NOT EXISTS user_daily_stats (
+  user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+  day DATE NOT NULL,
+  games_played INTEGER NOT NULL DEFAULT 0,
+  total_score BIGINT NOT NULL DEFAULT 0,
+  correct INTEGER NOT NULL DEFAULT 0,
+  wrong INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (user_id, day)
+);
+
+CREATE TABLE IF NOT EXISTS user_daily_game_stats (
+  user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+  game_id TEXT NOT NULL,
+  day DATE NOT NULL,
+  games_played INTEGER NOT NULL DEFAULT 0,
+  total_score BIGINT NOT NULL DEFAULT 0,
+  correct INTEGER NOT NULL DEFAULT 0,
+  wrong INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (user_id, game_id, day)
+);
+
+CREATE TABLE IF NOT EXISTS user_daily_topic_stats (
+  user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+  topic TEXT NOT NULL,
+  day DATE NOT NULL,
+  total INTEGER NOT NULL DEFAULT 0,
+  correct INTEGER NOT NULL DEFAULT 0,
+  total_time BIGINT NOT NULL DEFAULT 0,
+  PRIMARY KEY (user_id, topic, day)
+);
+
+ALTER TABLE user_daily_stats ENABLE ROW LEVEL SECURITY;
+ALTER TABLE user_daily_game_stats ENABLE ROW LEVEL SECURITY;
+ALTER TABLE user_daily_topic_stats ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can view their own daily stats" ON user_daily_stats;
+CREATE POLICY "Users can view their own daily stats"
+  ON user_daily_stats FOR SELECT
+  USING (auth.uid() = user_id);
+
+DROP POLICY IF EXISTS "Users can view their own daily game stats" ON user_daily_game_stats;
+CREATE POLICY "Users can view their own daily game stats"
+  ON user_daily_game_stats FOR SELECT
+  USING (auth.uid() = user_id);
+
+DROP POLICY IF EXISTS "Users can view their own daily topic stats" ON user_daily_topic_stats;
+CREATE POLICY "Users can view their own daily topic stats"
+  ON user_daily_topic_stats FOR SELECT
+  USING (auth.uid() = user_id);
+
+-- Backfill from existing history (one-time scan, UTC days)
+INSERT INTO user_daily_stats (user_id, day, games_played, total_score, correct, wrong)
+SELECT user_id, (created_at AT TIME ZONE 'UTC')::DATE, COUNT(*), SUM(score), SUM(correct_answers), SUM(wrong_answers)
+FROM game_sessions
+GROUP BY 1, 2
+ON CONFLICT (user_id, day) DO NOTHING;
+
+INSERT INTO user_daily_game_stats (user_id, game_id, day, games_played, total_score, correct, wrong)
+SELECT user_id, game_id, (created_at AT TIME ZONE 'UTC')::DATE, COUNT(*), SUM(score), SUM(correct_answers), SUM(wrong_answers)
+FROM game_sessions
+GROUP BY 1, 2, 3
+ON CONFLICT (user_id, game_id, day) DO NOTHING;
+
+INSERT INTO user_daily_topic_stats (user_id, topic, day, total, correct, total_time)
+SELECT user_id, topic, (created_at AT TIME ZONE 'UTC')::DATE, COUNT(*), COUNT(*) FILTER (WHERE is_correct), SUM(time_spent)
+FROM question_attempts
+GROUP BY 1, 2, 3
+ON CONFLICT (user_id, topic, day) DO NOTHING;
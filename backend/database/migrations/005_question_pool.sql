@@ -0,0 +1,28 @@
+-- Migration 005: pre-generated question pool
+--
+-- Tables for the question pool behind /api/questions/?use_agent=true.
+-- No backfill: the pool's background worker stocks generated_questions.
+
+CREATE TABLE IF NOT EXISTS generated_questions (
+  id BIGINT GENERATED BY DEFAULT AS IDENTITY (START WITH 1000000) PRIMARY KEY,
+  topic TEXT NOT NULL,
+  difficulty TEXT NOT NULL,
+  question TEXT NOT NULL,
+  options JSONB NOT NULL,
+  correct_answer INTEGER NOT NULL,
+  explanation TEXT NOT NULL DEFAULT '',
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc', NOW()) NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_generated_questions_topic_difficulty ON generated_questions(topic, difficulty, created_at DESC);
+
+-- Pooled questions each user has been served, so they aren't served again
+CREATE TABLE IF NOT EXISTS user_seen_questions (
+  user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+  question_id BIGINT NOT NULL REFERENCES generated_questions(id) ON DELETE CASCADE,
+  seen_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc', NOW()) NOT NULL,
+  PRIMARY KEY (user_id, question_id)
+);
+
+ALTER TABLE generated_questions ENABLE ROW LEVEL SECURITY;
+ALTER TABLE user_seen_questions ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,21 @@
+-- Migration 006: idempotency keys
+--
+-- Stored responses for Idempotency-Key retries on /api/games/save-score,
+-- used when IDEMPOTENCY_STORE=database. Without this table the database
+-- store finds nothing and retries are saved again. Only the service role
+-- touches it. Expired rows can be purged with
+--   DELETE FROM idempotency_keys WHERE expires_at < NOW();
+
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+  user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+  key TEXT NOT NULL,
+  fingerprint TEXT NOT NULL,
+  response JSONB NOT NULL,
+  expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc', NOW()) NOT NULL,
+  PRIMARY KEY (user_id, key)
+);
+
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires_at ON idempotency_keys(expires_at);
+
+ALTER TABLE idempotency_keys ENABLE ROW LEVEL SECURITY;
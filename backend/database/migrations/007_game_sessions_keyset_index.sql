@@ -0,0 +1,13 @@
+-- Migration 007: keyset pagination index on game_sessions
+--
+-- /api/stats/sessions pages a user's sessions by (created_at, id) and the
+-- CSV/JSON export scans them in the same order. With this index each page
+-- is a range scan that starts at the cursor, with no sort for rows sharing
+-- a created_at, so a deep page costs the same as the first.
+--
+-- Run it with psql in autocommit mode (psql -f), not in one transaction:
+-- CREATE INDEX CONCURRENTLY refuses to run inside a transaction block.
+-- It builds without blocking writes to game_sessions.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_game_sessions_user_created_id
+  ON game_sessions(user_id, created_at DESC, id DESC);
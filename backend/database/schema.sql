@@ -16,6 +16,8 @@ CREATE TABLE IF NOT EXISTS game_sessions (
 CREATE TABLE IF NOT EXISTS question_attempts (
   id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
   session_id UUID NOT NULL REFERENCES game_sessions(id) ON DELETE CASCADE,
+  -- Denormalized from game_sessions so per-user queries and RLS don't need a join
+  user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
   question_id INTEGER NOT NULL,
   topic TEXT NOT NULL,
   difficulty TEXT NOT NULL,
@@ -40,17 +42,76 @@ CREATE TABLE IF NOT EXISTS user_stats (
   updated_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc', NOW()) NOT NULL
 );
 
+-- Create user_topic_stats table (per-user, per-topic running totals of question_attempts)
+CREATE TABLE IF NOT EXISTS user_topic_stats (
+  user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+  topic TEXT NOT NULL,
+  total INTEGER NOT NULL DEFAULT 0,
+  correct INTEGER NOT NULL DEFAULT 0,
+  total_time BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc', NOW()) NOT NULL,
+  PRIMARY KEY (user_id, topic)
+);
+
+-- Create topics table (every topic that has appeared in a question attempt)
+CREATE TABLE IF NOT EXISTS topics (
+  name TEXT PRIMARY KEY,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc', NOW()) NOT NULL
+);
+
+-- Daily rollups (UTC days) maintained by save_game_sessions, so progress charts
+-- read one row per day instead of aggregating raw sessions/attempts
+CREATE TABLE IF NOT EXISTS user_daily_stats (
+  user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+  day DATE NOT NULL,
+  games_played INTEGER NOT NULL DEFAULT 0,
+  total_score BIGINT NOT NULL DEFAULT 0,
+  correct INTEGER NOT NULL DEFAULT 0,
+  wrong INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (user_id, day)
+);
+
+CREATE TABLE IF NOT EXISTS user_daily_game_stats (
+  user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+  game_id TEXT NOT NULL,
+  day DATE NOT NULL,
+  games_played INTEGER NOT NULL DEFAULT 0,
+  total_score BIGINT NOT NULL DEFAULT 0,
+  correct INTEGER NOT NULL DEFAULT 0,
+  wrong INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (user_id, game_id, day)
+);
+
+CREATE TABLE IF NOT EXISTS user_daily_topic_stats (
+  user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+  topic TEXT NOT NULL,
+  day DATE NOT NULL,
+  total INTEGER NOT NULL DEFAULT 0,
+  correct INTEGER NOT NULL DEFAULT 0,
+  total_time BIGINT NOT NULL DEFAULT 0,
+  PRIMARY KEY (user_id, topic, day)
+);
+
 -- Create indexes for better query performance
 CREATE INDEX IF NOT EXISTS idx_game_sessions_user_id ON game_sessions(user_id);
 CREATE INDEX IF NOT EXISTS idx_game_sessions_created_at ON game_sessions(created_at DESC);
+-- Keyset pagination of a user's sessions: (user_id, created_at DESC, id DESC)
+CREATE INDEX IF NOT EXISTS idx_game_sessions_user_created_id ON game_sessions(user_id, created_at DESC, id DESC);
 CREATE INDEX IF NOT EXISTS idx_question_attempts_session_id ON question_attempts(session_id);
 CREATE INDEX IF NOT EXISTS idx_question_attempts_topic ON question_attempts(topic);
+CREATE INDEX IF NOT EXISTS idx_question_attempts_user_topic ON question_attempts(user_id, topic);
+CREATE INDEX IF NOT EXISTS idx_question_attempts_user_created_at ON question_attempts(user_id, created_at DESC);
 CREATE INDEX IF NOT EXISTS idx_user_stats_user_id ON user_stats(user_id);
 
 -- Enable Row Level Security (RLS)
 ALTER TABLE game_sessions ENABLE ROW LEVEL SECURITY;
 ALTER TABLE question_attempts ENABLE ROW LEVEL SECURITY;
 ALTER TABLE user_stats ENABLE ROW LEVEL SECURITY;
+ALTER TABLE user_topic_stats ENABLE ROW LEVEL SECURITY;
+ALTER TABLE topics ENABLE ROW LEVEL SECURITY;
+ALTER TABLE user_daily_stats ENABLE ROW LEVEL SECURITY;
+ALTER TABLE user_daily_game_stats ENABLE ROW LEVEL SECURITY;
+ALTER TABLE user_daily_topic_stats ENABLE ROW LEVEL SECURITY;
 
 -- Create RLS policies for game_sessions
 CREATE POLICY "Users can view their own game sessions"
@@ -64,18 +125,13 @@ CREATE POLICY "Users can insert their own game sessions"
 -- Create RLS policies for question_attempts
 CREATE POLICY "Users can view their own question attempts"
   ON question_attempts FOR SELECT
-  USING (
-    EXISTS (
-      SELECT 1 FROM game_sessions
-      WHERE game_sessions.id = question_attempts.session_id
-      AND game_sessions.user_id = auth.uid()
-    )
-  );
+  USING (auth.uid() = user_id);
 
 CREATE POLICY "Users can insert their own question attempts"
   ON question_attempts FOR INSERT
   WITH CHECK (
-    EXISTS (
+    auth.uid() = user_id
+    AND EXISTS (
       SELECT 1 FROM game_sessions
       WHERE game_sessions.id = question_attempts.session_id
       AND game_sessions.user_id = auth.uid()
@@ -95,3 +151,469 @@ CREATE POLICY "Users can update their own stats"
   ON user_stats FOR UPDATE
   USING (auth.uid() = user_id);
 
+-- Create RLS policies for user_topic_stats (written only by the save functions)
+CREATE POLICY "Users can view their own topic stats"
+  ON user_topic_stats FOR SELECT
+  USING (auth.uid() = user_id);
+
+
+-- Create RLS policies for topics (shared catalog, written only by the save functions)
+CREATE POLICY "Anyone can view topics"
+  ON topics FOR SELECT
+  USING (true);
+
+-- Create RLS policies for the daily rollups (written only by the save functions)
+CREATE POLICY "Users can view their own daily stats"
+  ON user_daily_stats FOR SELECT
+  USING (auth.uid() = user_id);
+
+CREATE POLICY "Users can view their own daily game stats"
+  ON user_daily_game_stats FOR SELECT
+  USING (auth.uid() = user_id);
+
+CREATE POLICY "Users can view their own daily topic stats"
+  ON user_daily_topic_stats FOR SELECT
+  USING (auth.uid() = user_id);
+
+-- Stored responses for Idempotency-Key retries (used when IDEMPOTENCY_STORE=database)
+-- Only the service role touches this table; expired rows can be purged with
+--   DELETE FROM idempotency_keys WHERE expires_at < NOW();
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+  user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+  key TEXT NOT NULL,
+  fingerprint TEXT NOT NULL,
+  response JSONB NOT NULL,
+  expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc', NOW()) NOT NULL,
+  PRIMARY KEY (user_id, key)
+);
+
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires_at ON idempotency_keys(expires_at);
+
+ALTER TABLE idempotency_keys ENABLE ROW LEVEL SECURITY;
+
+-- Pre-generated questions for use_agent=true, stocked by the question pool's
+-- background worker. Ids start at 1,000,000 so they never collide with the
+-- static bank's ids. Only the service role touches these tables.
+CREATE TABLE IF NOT EXISTS generated_questions (
+  id BIGINT GENERATED BY DEFAULT AS IDENTITY (START WITH 1000000) PRIMARY KEY,
+  topic TEXT NOT NULL,
+  difficulty TEXT NOT NULL,
+  question TEXT NOT NULL,
+  options JSONB NOT NULL,
+  correct_answer INTEGER NOT NULL,
+  explanation TEXT NOT NULL DEFAULT '',
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc', NOW()) NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_generated_questions_topic_difficulty ON generated_questions(topic, difficulty, created_at DESC);
+
+-- Pooled questions each user has been served, so they aren't served again
+CREATE TABLE IF NOT EXISTS user_seen_questions (
+  user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+  question_id BIGINT NOT NULL REFERENCES generated_questions(id) ON DELETE CASCADE,
+  seen_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc', NOW()) NOT NULL,
+  PRIMARY KEY (user_id, question_id)
+);
+
+ALTER TABLE generated_questions ENABLE ROW LEVEL SECURITY;
+ALTER TABLE user_seen_questions ENABLE ROW LEVEL SECURITY;
+
+-- =====================================================================
+-- Functions (called over RPC). Everything below is CREATE OR REPLACE,
+-- so this section can be re-run on an existing database after upgrades.
+-- =====================================================================
+
+-- Fill question_attempts.user_id from the session for writers that leave it out
+-- (e.g. app versions deployed before the column existed)
+CREATE OR REPLACE FUNCTION fill_question_attempt_user_id()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF NEW.user_id IS NULL THEN
+    SELECT user_id INTO NEW.user_id FROM game_sessions WHERE id = NEW.session_id;
+  END IF;
+  RETURN NEW;
+END;
+$$;
+
+CREATE OR REPLACE TRIGGER question_attempts_fill_user_id
+  BEFORE INSERT ON question_attempts
+  FOR EACH ROW EXECUTE FUNCTION fill_question_attempt_user_id();
+
+-- Atomically add one or more sessions' worth of counters to a user's stats
+-- Single round trip: INSERT ... ON CONFLICT increments in place, so concurrent
+-- saves for the same user can't lose updates. Weak/strong topics are merged as sets.
+CREATE OR REPLACE FUNCTION increment_user_stats(
+  p_user_id UUID,
+  p_games INTEGER,
+  p_score INTEGER,
+  p_correct INTEGER,
+  p_wrong INTEGER,
+  p_weak_topics TEXT[] DEFAULT ARRAY[]::TEXT[],
+  p_strong_topics TEXT[] DEFAULT ARRAY[]::TEXT[]
+)
+RETURNS user_stats
+LANGUAGE sql
+AS $$
+  INSERT INTO user_stats AS s (
+    user_id, total_games_played, total_score, total_questions_answered,
+    total_correct, total_wrong, overall_accuracy, weak_topics, strong_topics, updated_at
+  )
+  VALUES (
+    p_user_id, p_games, p_score, p_correct + p_wrong,
+    p_correct, p_wrong,
+    CASE WHEN p_correct + p_wrong > 0 THEN p_correct::DECIMAL / (p_correct + p_wrong) ELSE 0 END,
+    COALESCE(p_weak_topics, ARRAY[]::TEXT[]),
+    COALESCE(p_strong_topics, ARRAY[]::TEXT[]),
+    TIMEZONE('utc', NOW())
+  )
+  ON CONFLICT (user_id) DO UPDATE SET
+    total_games_played = s.total_games_played + EXCLUDED.total_games_played,
+    total_score = s.total_score + EXCLUDED.total_score,
+    total_questions_answered = s.total_questions_answered + EXCLUDED.total_questions_answered,
+    total_correct = s.total_correct + EXCLUDED.total_correct,
+    total_wrong = s.total_wrong + EXCLUDED.total_wrong,
+    overall_accuracy = CASE
+      WHEN s.total_questions_answered + EXCLUDED.total_questions_answered > 0
+      THEN (s.total_correct + EXCLUDED.total_correct)::DECIMAL
+           / (s.total_questions_answered + EXCLUDED.total_questions_answered)
+      ELSE 0
+    END,
+    weak_topics = ARRAY(SELECT DISTINCT unnest(s.weak_topics || EXCLUDED.weak_topics)),
+    strong_topics = ARRAY(SELECT DISTINCT unnest(s.strong_topics || EXCLUDED.strong_topics)),
+    updated_at = EXCLUDED.updated_at
+  RETURNING *;
+$$;
+
+-- Add per-topic attempt counts to user_topic_stats, register new topics in the
+-- topics catalog, and relabel weak/strong topics.
+-- p_deltas is a JSON array of {user_id, topic, total, correct, total_time}.
+-- Weak < 50% lifetime accuracy on a topic, strong >= 80%.
+CREATE OR REPLACE FUNCTION apply_topic_deltas(p_deltas JSONB)
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  INSERT INTO topics (name)
+  SELECT DISTINCT d->>'topic' FROM jsonb_array_elements(p_deltas) AS d
+  ORDER BY 1
+  ON CONFLICT (name) DO NOTHING;
+
+  -- Rows are upserted in key order so concurrent saves lock them in the same order
+  INSERT INTO user_topic_stats AS uts (user_id, topic, total, correct, total_time, updated_at)
+  SELECT d.user_id, d.topic, SUM(d.total), SUM(d.correct), SUM(d.total_time), TIMEZONE('utc', NOW())
+  FROM jsonb_to_recordset(p_deltas)
+    AS d(user_id UUID, topic TEXT, total INTEGER, correct INTEGER, total_time BIGINT)
+  GROUP BY d.user_id, d.topic
+  ORDER BY d.user_id, d.topic
+  ON CONFLICT (user_id, topic) DO UPDATE SET
+    total = uts.total + EXCLUDED.total,
+    correct = uts.correct + EXCLUDED.correct,
+    total_time = uts.total_time + EXCLUDED.total_time,
+    updated_at = EXCLUDED.updated_at;
+
+  UPDATE user_stats AS us SET
+    weak_topics = ARRAY(
+      SELECT t.topic FROM user_topic_stats AS t
+      WHERE t.user_id = us.user_id AND t.total > 0 AND t.correct::DECIMAL / t.total < 0.5
+      ORDER BY t.topic
+    ),
+    strong_topics = ARRAY(
+      SELECT t.topic FROM user_topic_stats AS t
+      WHERE t.user_id = us.user_id AND t.total > 0 AND t.correct::DECIMAL / t.total >= 0.8
+      ORDER BY t.topic
+    )
+  WHERE us.user_id IN (SELECT DISTINCT (d->>'user_id')::UUID FROM jsonb_array_elements(p_deltas) AS d);
+END;
+$$;
+
+-- Save question attempts for an existing session and add them to the user's
+-- topic totals in one transaction (used by the learning agent).
+-- p_attempts is a JSON array of {question_id, topic, difficulty, is_correct, time_spent}.
+CREATE OR REPLACE FUNCTION save_question_attempts(
+  p_session_id UUID,
+  p_user_id UUID,
+  p_attempts JSONB
+)
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  INSERT INTO question_attempts (session_id, user_id, question_id, topic, difficulty, is_correct, time_spent)
+  SELECT p_session_id, p_user_id, a.question_id, a.topic, a.difficulty, a.is_correct, a.time_spent
+  FROM jsonb_to_recordset(p_attempts)
+    AS a(question_id INTEGER, topic TEXT, difficulty TEXT, is_correct BOOLEAN, time_spent INTEGER);
+
+  PERFORM apply_topic_deltas(COALESCE((
+    SELECT jsonb_agg(jsonb_build_object(
+      'user_id', p_user_id, 'topic', t.topic, 'total', t.total,
+      'correct', t.correct, 'total_time', t.total_time
+    ))
+    FROM (
+      SELECT
+        a.topic,
+        COUNT(*) AS total,
+        COUNT(*) FILTER (WHERE a.is_correct) AS correct,
+        COALESCE(SUM(a.time_spent), 0) AS total_time
+      FROM jsonb_to_recordset(p_attempts) AS a(topic TEXT, is_correct BOOLEAN, time_spent INTEGER)
+      GROUP BY 1
+    ) AS t
+  ), '[]'::JSONB));
+END;
+$$;
+
+-- Add sessions to the daily rollups of the (UTC) day they were played: per user,
+-- per user and game, and per user and topic. p_sessions uses the
+-- save_game_sessions format; sessions without played_at count as played now.
+CREATE OR REPLACE FUNCTION apply_daily_rollups(p_sessions JSONB)
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  INSERT INTO user_daily_stats AS d (user_id, day, games_played, total_score, correct, wrong)
+  SELECT
+    (s->>'user_id')::UUID, t.day, COUNT(*),
+    SUM((s->'analytics'->>'score')::INTEGER),
+    SUM(COALESCE((s->'analytics'->>'correctAnswers')::INTEGER, 0)),
+    SUM(COALESCE((s->'analytics'->>'wrongAnswers')::INTEGER, 0))
+  FROM jsonb_array_elements(p_sessions) AS s,
+    LATERAL (SELECT (COALESCE((s->>'played_at')::TIMESTAMPTZ, NOW()) AT TIME ZONE 'UTC')::DATE AS day) AS t
+  GROUP BY 1, 2
+  ORDER BY 1, 2
+  ON CONFLICT (user_id, day) DO UPDATE SET
+    games_played = d.games_played + EXCLUDED.games_played,
+    total_score = d.total_score + EXCLUDED.total_score,
+    correct = d.correct + EXCLUDED.correct,
+    wrong = d.wrong + EXCLUDED.wrong;
+
+  INSERT INTO user_daily_game_stats AS d (user_id, game_id, day, games_played, total_score, correct, wrong)
+  SELECT
+    (s->>'user_id')::UUID, s->>'game_id', t.day, COUNT(*),
+    SUM((s->'analytics'->>'score')::INTEGER),
+    SUM(COALESCE((s->'analytics'->>'correctAnswers')::INTEGER, 0)),
+    SUM(COALESCE((s->'analytics'->>'wrongAnswers')::INTEGER, 0))
+  FROM jsonb_array_elements(p_sessions) AS s,
+    LATERAL (SELECT (COALESCE((s->>'played_at')::TIMESTAMPTZ, NOW()) AT TIME ZONE 'UTC')::DATE AS day) AS t
+  GROUP BY 1, 2, 3
+  ORDER BY 1, 2, 3
+  ON CONFLICT (user_id, game_id, day) DO UPDATE SET
+    games_played = d.games_played + EXCLUDED.games_played,
+    total_score = d.total_score + EXCLUDED.total_score,
+    correct = d.correct + EXCLUDED.correct,
+    wrong = d.wrong + EXCLUDED.wrong;
+
+  INSERT INTO user_daily_topic_stats AS d (user_id, topic, day, total, correct, total_time)
+  SELECT
+    (s->>'user_id')::UUID, a.topic, t.day, COUNT(*),
+    COUNT(*) FILTER (WHERE a."isCorrect"),
+    COALESCE(SUM(a."timeSpent"), 0)
+  FROM jsonb_array_elements(p_sessions) AS s,
+    LATERAL (SELECT (COALESCE((s->>'played_at')::TIMESTAMPTZ, NOW()) AT TIME ZONE 'UTC')::DATE AS day) AS t,
+    jsonb_to_recordset(COALESCE(s->'analytics'->'questionAttempts', '[]'::JSONB))
+      AS a(topic TEXT, "isCorrect" BOOLEAN, "timeSpent" INTEGER)
+  GROUP BY 1, 2, 3
+  ORDER BY 1, 2, 3
+  ON CONFLICT (user_id, topic, day) DO UPDATE SET
+    total = d.total + EXCLUDED.total,
+    correct = d.correct + EXCLUDED.correct,
+    total_time = d.total_time + EXCLUDED.total_time;
+END;
+$$;
+
+-- Save a batch of game sessions in one call and one transaction:
+-- game_sessions rows, their question_attempts, one user_stats increment per user,
+-- the matching user_topic_stats totals and the daily rollups.
+-- p_sessions is a JSON array of {session_id, user_id, game_id, analytics, played_at},
+-- where analytics is the GameAnalytics payload as posted to /api/games/save-score
+-- and the optional played_at is when the game was played. It becomes the
+-- session's created_at (never later than now), so late uploads land on their own day.
+-- Sessions whose id already exists are skipped, so re-sending a batch is safe;
+-- the ids that were actually written come back in "inserted", and skipped ids
+-- that belong to a different user in "conflicts".
+CREATE OR REPLACE FUNCTION save_game_sessions(p_sessions JSONB)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  r RECORD;
+  v_inserted UUID[];
+  v_new JSONB;
+  v_conflicts UUID[];
+  v_stats JSONB := '[]'::JSONB;
+BEGIN
+  WITH inserted AS (
+    INSERT INTO game_sessions (
+      id, user_id, game_id, score, accuracy, correct_answers, wrong_answers,
+      max_streak, average_response_time, created_at
+    )
+    SELECT
+      (s->>'session_id')::UUID,
+      (s->>'user_id')::UUID,
+      s->>'game_id',
+      (s->'analytics'->>'score')::INTEGER,
+      (s->'analytics'->>'accuracy')::DECIMAL,
+      COALESCE((s->'analytics'->>'correctAnswers')::INTEGER, 0),
+      COALESCE((s->'analytics'->>'wrongAnswers')::INTEGER, 0),
+      COALESCE((s->'analytics'->'streakInfo'->>'maxStreak')::INTEGER, 0),
+      COALESCE((s->'analytics'->>'averageResponseTime')::INTEGER, 0),
+      LEAST(COALESCE((s->>'played_at')::TIMESTAMPTZ, NOW()), NOW())
+    FROM jsonb_array_elements(p_sessions) AS s
+    ON CONFLICT (id) DO NOTHING
+    RETURNING id
+  )
+  SELECT COALESCE(ARRAY_AGG(id), ARRAY[]::UUID[]) INTO v_inserted FROM inserted;
+
+  -- Ids that already belong to another user; these are not duplicates of the caller's session
+  SELECT COALESCE(ARRAY_AGG(DISTINCT g.id), ARRAY[]::UUID[]) INTO v_conflicts
+  FROM jsonb_array_elements(p_sessions) AS s
+  JOIN game_sessions AS g ON g.id = (s->>'session_id')::UUID
+  WHERE g.user_id <> (s->>'user_id')::UUID;
+
+  -- Only the sessions written above (first occurrence of each id) get attempts and stats,
+  -- with played_at set to the stored created_at
+  SELECT COALESCE(jsonb_agg(n.elem || jsonb_build_object('played_at', g.created_at) ORDER BY n.ord), '[]'::JSONB)
+  INTO v_new
+  FROM (
+    SELECT DISTINCT ON ((e.elem->>'session_id')::UUID) e.elem, e.ord
+    FROM jsonb_array_elements(p_sessions) WITH ORDINALITY AS e(elem, ord)
+    WHERE (e.elem->>'session_id')::UUID = ANY(v_inserted)
+    ORDER BY (e.elem->>'session_id')::UUID, e.ord
+  ) AS n
+  JOIN game_sessions AS g ON g.id = (n.elem->>'session_id')::UUID;
+
+  INSERT INTO question_attempts (
+    session_id, user_id, question_id, topic, difficulty, is_correct, time_spent, created_at
+  )
+  SELECT
+    (s->>'session_id')::UUID, (s->>'user_id')::UUID,
+    a."questionId", a.topic, a.difficulty, a."isCorrect", a."timeSpent", (s->>'played_at')::TIMESTAMPTZ
+  FROM jsonb_array_elements(v_new) AS s,
+    jsonb_to_recordset(COALESCE(s->'analytics'->'questionAttempts', '[]'::JSONB))
+      AS a("questionId" INTEGER, topic TEXT, difficulty TEXT, "isCorrect" BOOLEAN, "timeSpent" INTEGER);
+
+  -- One combined increment per user, in user_id order so concurrent batches
+  -- lock user_stats rows in the same order
+  FOR r IN
+    SELECT
+      (s->>'user_id')::UUID AS user_id,
+      COUNT(*)::INTEGER AS games,
+      SUM((s->'analytics'->>'score')::INTEGER)::INTEGER AS score,
+      SUM(COALESCE((s->'analytics'->>'correctAnswers')::INTEGER, 0))::INTEGER AS correct,
+      SUM(COALESCE((s->'analytics'->>'wrongAnswers')::INTEGER, 0))::INTEGER AS wrong
+    FROM jsonb_array_elements(v_new) AS s
+    GROUP BY 1
+    ORDER BY 1
+  LOOP
+    PERFORM increment_user_stats(r.user_id, r.games, r.score, r.correct, r.wrong);
+  END LOOP;
+
+  -- Per-topic totals, which also decide the weak/strong topic labels
+  PERFORM apply_topic_deltas(COALESCE((
+    SELECT jsonb_agg(jsonb_build_object(
+      'user_id', t.user_id, 'topic', t.topic, 'total', t.total,
+      'correct', t.correct, 'total_time', t.total_time
+    ))
+    FROM (
+      SELECT
+        (s->>'user_id')::UUID AS user_id,
+        a.topic,
+        COUNT(*) AS total,
+        COUNT(*) FILTER (WHERE a."isCorrect") AS correct,
+        COALESCE(SUM(a."timeSpent"), 0) AS total_time
+      FROM jsonb_array_elements(v_new) AS s,
+        jsonb_to_recordset(COALESCE(s->'analytics'->'questionAttempts', '[]'::JSONB))
+          AS a(topic TEXT, "isCorrect" BOOLEAN, "timeSpent" INTEGER)
+      GROUP BY 1, 2
+    ) AS t
+  ), '[]'::JSONB));
+
+  PERFORM apply_daily_rollups(v_new);
+
+  SELECT COALESCE(jsonb_agg(to_jsonb(us) ORDER BY us.user_id), '[]'::JSONB) INTO v_stats
+  FROM user_stats AS us
+  WHERE us.user_id IN (SELECT DISTINCT (s->>'user_id')::UUID FROM jsonb_array_elements(v_new) AS s);
+
+  RETURN jsonb_build_object(
+    'inserted', to_jsonb(v_inserted),
+    'conflicts', to_jsonb(v_conflicts),
+    'user_stats', v_stats
+  );
+END;
+$$;
+
+-- Save a single game session (used by /api/games/save-score)
+CREATE OR REPLACE FUNCTION save_game_session(
+  p_user_id UUID,
+  p_game_id TEXT,
+  p_analytics JSONB
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_session_id UUID := gen_random_uuid();
+  v_result JSONB;
+BEGIN
+  v_result := save_game_sessions(jsonb_build_array(jsonb_build_object(
+    'session_id', v_session_id,
+    'user_id', p_user_id,
+    'game_id', p_game_id,
+    'analytics', p_analytics
+  )));
+
+  RETURN jsonb_build_object('session_id', v_session_id, 'user_stats', v_result->'user_stats'->0);
+END;
+$$;
+
+-- Snapshot of every leaderboard in one pass over game_sessions, used to
+-- (re)build the in-memory leaderboards. Boards: 'global', 'game:<game_id>',
+-- and 'week' (sessions since p_week_start). Each user counts once per board
+-- with their best score. Returns the top p_limit users per board and a
+-- histogram of best scores in buckets of p_bucket_width.
+CREATE OR REPLACE FUNCTION leaderboard_snapshot(
+  p_week_start TIMESTAMP WITH TIME ZONE,
+  p_limit INTEGER DEFAULT 100,
+  p_bucket_width INTEGER DEFAULT 10
+)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+  WITH per_user_game AS (
+    SELECT
+      user_id,
+      game_id,
+      MAX(score) AS best,
+      MAX(score) FILTER (WHERE created_at >= p_week_start) AS week_best
+    FROM game_sessions
+    GROUP BY user_id, game_id
+  ),
+  boards AS (
+    SELECT 'global' AS board, user_id, MAX(best) AS best FROM per_user_game GROUP BY user_id
+    UNION ALL
+    SELECT 'game:' || game_id, user_id, best FROM per_user_game
+    UNION ALL
+    SELECT 'week', user_id, MAX(week_best) FROM per_user_game WHERE week_best IS NOT NULL GROUP BY user_id
+  ),
+  ranked AS (
+    SELECT board, user_id, best, ROW_NUMBER() OVER (PARTITION BY board ORDER BY best DESC, user_id) AS rn
+    FROM boards
+  ),
+  histogram AS (
+    SELECT board, FLOOR(best::DECIMAL / p_bucket_width)::INTEGER AS bucket, COUNT(*) AS users
+    FROM boards
+    GROUP BY 1, 2
+  )
+  SELECT jsonb_build_object(
+    'top', COALESCE((
+      SELECT jsonb_agg(jsonb_build_object('board', board, 'user_id', user_id, 'score', best) ORDER BY board, rn)
+      FROM ranked WHERE rn <= p_limit
+    ), '[]'::JSONB),
+    'histogram', COALESCE((
+      SELECT jsonb_agg(jsonb_build_object('board', board, 'bucket', bucket, 'users', users))
+      FROM histogram
+    ), '[]'::JSONB)
+  );
+$$;
@@ -7,23 +7,25 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.responses import Response
 from src.models.schemas import UserSignup, UserLogin, TokenResponse
 from src.services.auth_service import AuthService
-from src.utils.database import get_db
-from supabase import Client
+from src.utils.database import get_async_auth_db
+from src.utils.token_verifier import token_verifier
+from supabase import AsyncClient
 
 router = APIRouter()
 security = HTTPBearer(auto_error=False)  # Don't auto-raise on missing token
 
 async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Client = Depends(get_db)
+    credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> dict:
-    """Get current authenticated user"""
+    """Get current authenticated user
+    
+    Verified tokens are cached until they expire, so repeat requests skip
+    signature verification entirely.
+    """
     if not credentials:
         raise HTTPException(status_code=401, detail="Missing authorization token")
     
-    token = credentials.credentials
-    auth_service = AuthService(db)
-    user = await auth_service.get_user(token)
+    user = await token_verifier.verify_async(credentials.credentials)
     
     if not user:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
@@ -46,7 +48,7 @@ async def signup_options(request: Request):
     )
 
 @router.post("/signup")
-async def signup(user_data: UserSignup, db: Client = Depends(get_db)):
+async def signup(user_data: UserSignup, db: AsyncClient = Depends(get_async_auth_db)):
     """Sign up a new user using Supabase Auth"""
     try:
         auth_service = AuthService(db)
@@ -80,7 +82,7 @@ async def login_options(request: Request):
     )
 
 @router.post("/login")
-async def login(user_data: UserLogin, db: Client = Depends(get_db)):
+async def login(user_data: UserLogin, db: AsyncClient = Depends(get_async_auth_db)):
     """Login user"""
     auth_service = AuthService(db)
     result = await auth_service.login(user_data)
@@ -96,7 +98,7 @@ async def login(user_data: UserLogin, db: Client = Depends(get_db)):
 @router.post("/logout")
 async def logout(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Client = Depends(get_db)
+    db: AsyncClient = Depends(get_async_auth_db)
 ):
     """Logout user"""
     token = credentials.credentials if credentials else None
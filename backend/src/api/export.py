@@ -0,0 +1,49 @@
+"""
+History export endpoints - stream game_sessions / question_attempts as NDJSON or CSV
+"""
+
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
+from src.utils.database import get_async_db
+from src.api.auth import get_current_user
+from src.services.export import export_stream, EXPORT_DATASETS
+from src.config import EXPORT_ADMIN_USER_IDS, EXPORT_MAX_USERS
+from postgrest import AsyncPostgrestClient
+from typing import List, Optional
+from uuid import UUID
+
+router = APIRouter()
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+@router.get("/{dataset}")
+async def export_history(
+    dataset: str,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    user_id: Optional[List[UUID]] = Query(None, description="Users to export (repeat for a cohort); defaults to yourself"),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncPostgrestClient = Depends(get_async_db)
+):
+    """Stream complete history, oldest first
+
+    dataset is "sessions" (game_sessions) or "attempts" (question_attempts).
+    Users can export their own history; exporting anyone else's, or a
+    cohort, requires an id listed in EXPORT_ADMIN_USER_IDS.
+    """
+    if dataset not in EXPORT_DATASETS:
+        raise HTTPException(status_code=404, detail=f"Unknown dataset: {dataset}")
+
+    user_ids = list(dict.fromkeys(str(u) for u in user_id)) if user_id else [str(current_user["id"])]
+    if len(user_ids) > EXPORT_MAX_USERS:
+        raise HTTPException(status_code=413, detail=f"At most {EXPORT_MAX_USERS} users per export")
+    if user_ids != [str(current_user["id"])] and str(current_user["id"]) not in EXPORT_ADMIN_USER_IDS:
+        raise HTTPException(status_code=403, detail="Not allowed to export other users' history")
+
+    return StreamingResponse(
+        export_stream(db, dataset, user_ids, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{dataset}.{format}"'},
+    )
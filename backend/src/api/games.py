@@ -2,13 +2,16 @@
 Game endpoints - save scores and analytics
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from src.models.schemas import SaveScoreRequest, SaveScoreResponse
+from src.models.schemas import SaveScoreRequest, SaveScoreResponse, SaveScoresRequest, SaveScoresResponse
 from src.services.game_service import GameService
-from src.utils.database import get_db
+from src.services.idempotency import idempotency_store
+from src.utils.database import get_async_db
 from src.api.auth import get_current_user
-from supabase import Client
+from src.config import BATCH_SAVE_MAX_SESSIONS
+from postgrest import AsyncPostgrestClient
+from typing import Optional
 
 router = APIRouter()
 security = HTTPBearer()
@@ -17,21 +20,74 @@ security = HTTPBearer()
 async def save_score(
     request: SaveScoreRequest,
     current_user: dict = Depends(get_current_user),
-    db: Client = Depends(get_db)
+    db: AsyncPostgrestClient = Depends(get_async_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255)
 ):
-    """Save game score and analytics"""
+    """Save game score and analytics
+    
+    Send an Idempotency-Key header to make retries safe: a repeated key
+    returns the original response without saving the session again.
+    """
+    async def save() -> dict:
+        game_service = GameService(db)
+        result = await game_service.save_game_session(
+            user_id=current_user["id"],
+            game_id=request.gameId,
+            analytics=request.analytics
+        )
+        
+        if not result["success"]:
+            raise HTTPException(
+                status_code=result.get("status_code", 500),
+                detail=result.get("error", "Failed to save score")
+            )
+        
+        return SaveScoreResponse(
+            success=True,
+            sessionId=result["sessionId"]
+        ).model_dump()
+    
+    if not idempotency_key:
+        return await save()
+    
+    return await idempotency_store.run(
+        user_id=current_user["id"],
+        key=idempotency_key,
+        fingerprint=idempotency_store.fingerprint(request.model_dump_json()),
+        handler=save
+    )
+
+
+@router.post("/save-scores", response_model=SaveScoresResponse)
+async def save_scores(
+    request: SaveScoresRequest,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncPostgrestClient = Depends(get_async_db)
+):
+    """Save a batch of game sessions (offline sync)
+    
+    Clients can queue sessions while offline and upload them together, giving
+    each one a sessionId so a retried upload doesn't save anything twice.
+    """
+    if not request.sessions:
+        return SaveScoresResponse(success=True, results=[])
+    
+    if len(request.sessions) > BATCH_SAVE_MAX_SESSIONS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {BATCH_SAVE_MAX_SESSIONS} sessions per request"
+        )
+    
     game_service = GameService(db)
-    result = await game_service.save_game_session(
+    result = await game_service.save_game_sessions(
         user_id=current_user["id"],
-        game_id=request.gameId,
-        analytics=request.analytics
+        items=request.sessions
     )
     
     if not result["success"]:
-        raise HTTPException(status_code=500, detail=result.get("error", "Failed to save score"))
+        raise HTTPException(status_code=500, detail=result.get("error", "Failed to save scores"))
     
-    return SaveScoreResponse(
+    return SaveScoresResponse(
         success=True,
-        sessionId=result["sessionId"]
+        results=result["results"]
     )
-
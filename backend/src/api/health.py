@@ -3,8 +3,20 @@ Health check endpoints including Supabase connection test
 """
 
 from fastapi import APIRouter, HTTPException
-from src.utils.database import Database
-from supabase import Client
+from src.utils.database import AsyncDatabase
+from src.utils.token_verifier import token_verifier
+from src.services.write_behind import session_write_queue
+from src.services.idempotency import idempotency_store
+from src.services.stats_cache import user_stats_cache
+from src.services.topic_catalog import topic_catalog
+from src.services.leaderboard import leaderboards
+from src.services.mastery import mastery
+from src.services.question_bank import question_bank
+from src.services.question_pool import question_pool
+from src.services.question_index import question_index
+from src.services.llm import llm_limiter
+from src.services.llm_cache import llm_cache
+from src.services.single_flight import agent_question_flights
 
 router = APIRouter()
 
@@ -16,14 +28,33 @@ async def health_check():
         "service": "NYU Hacks Arcade API"
     }
 
+@router.get("/metrics")
+async def metrics():
+    """In-process cache and queue counters"""
+    return {
+        "jwt_cache": token_verifier.stats(),
+        "write_behind": session_write_queue.stats(),
+        "idempotency": idempotency_store.stats(),
+        "user_stats_cache": user_stats_cache.stats(),
+        "topics": topic_catalog.stats(),
+        "leaderboards": leaderboards.stats(),
+        "mastery": mastery.stats(),
+        "question_bank": question_bank.stats(),
+        "question_pool": question_pool.stats(),
+        "question_index": question_index.stats(),
+        "llm": llm_limiter.stats(),
+        "llm_cache": llm_cache.stats(),
+        "agent_question_flights": agent_question_flights.stats(),
+    }
+
 @router.get("/supabase")
 async def supabase_health():
     """Check Supabase connection"""
     try:
-        db: Client = Database.get_client()
+        db = AsyncDatabase.get_client()
         
         # Try a simple query to test connection
-        result = db.table("game_sessions").select("id").limit(1).execute()
+        result = await db.table("game_sessions").select("id").limit(1).execute()
         
         return {
             "status": "healthy",
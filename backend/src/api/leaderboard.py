@@ -0,0 +1,93 @@
+"""
+Leaderboard endpoints - served from the in-memory leaderboards
+"""
+
+from fastapi import APIRouter, HTTPException, Depends, Query
+from src.models.schemas import LeaderboardEntry, LeaderboardResponse, LeaderboardRankResponse
+from src.utils.database import get_async_db
+from src.api.auth import get_current_user
+from src.services.leaderboard import leaderboards, game_board, week_start, GLOBAL_BOARD, WEEKLY_BOARD
+from src.config import LEADERBOARD_SIZE
+from postgrest import AsyncPostgrestClient
+from typing import Optional
+
+router = APIRouter()
+
+async def _top(name: str, limit: int) -> LeaderboardResponse:
+    board = await leaderboards.get_board(name)
+    return LeaderboardResponse(
+        board=name,
+        entries=[
+            LeaderboardEntry(rank=position, user_id=user_id, score=score)
+            for position, (user_id, score) in enumerate(board.ranked()[:limit], start=1)
+        ],
+        total_players=board.total_players,
+    )
+
+@router.get("/global", response_model=LeaderboardResponse)
+async def get_global_leaderboard(
+    limit: int = Query(10, ge=1, le=LEADERBOARD_SIZE),
+    current_user: dict = Depends(get_current_user)
+):
+    """Top players by best score across all games"""
+    return await _top(GLOBAL_BOARD, limit)
+
+@router.get("/weekly", response_model=LeaderboardResponse)
+async def get_weekly_leaderboard(
+    limit: int = Query(10, ge=1, le=LEADERBOARD_SIZE),
+    current_user: dict = Depends(get_current_user)
+):
+    """Top players by best score since Monday 00:00 UTC"""
+    return await _top(WEEKLY_BOARD, limit)
+
+@router.get("/games/{game_id}", response_model=LeaderboardResponse)
+async def get_game_leaderboard(
+    game_id: str,
+    limit: int = Query(10, ge=1, le=LEADERBOARD_SIZE),
+    current_user: dict = Depends(get_current_user)
+):
+    """Top players by best score in one game"""
+    return await _top(game_board(game_id), limit)
+
+@router.get("/rank", response_model=LeaderboardRankResponse)
+async def get_my_rank(
+    game_id: Optional[str] = None,
+    weekly: bool = False,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncPostgrestClient = Depends(get_async_db)
+):
+    """Current user's rank on the global, weekly or per-game board
+
+    Exact for players in the top-K; otherwise estimated from the score
+    distribution (``approximate`` is true).
+    """
+    if game_id and weekly:
+        raise HTTPException(status_code=400, detail="Weekly leaderboards are not kept per game")
+
+    name = game_board(game_id) if game_id else WEEKLY_BOARD if weekly else GLOBAL_BOARD
+    board = await leaderboards.get_board(name)
+    user_id = current_user["id"]
+
+    score = board.scores.get(user_id)
+    if score is None:
+        # Not on the board - look up the user's best score for the estimate
+        try:
+            query = db.table("game_sessions").select("score").eq("user_id", user_id)
+            if game_id:
+                query = query.eq("game_id", game_id)
+            if weekly:
+                query = query.gte("created_at", week_start().isoformat())
+            result = await query.order("score", desc=True).limit(1).execute()
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to fetch rank: {str(e)}")
+        if result.data:
+            score = result.data[0]["score"]
+
+    rank, approximate = board.rank(user_id, score)
+    return LeaderboardRankResponse(
+        board=name,
+        rank=rank,
+        score=score,
+        approximate=approximate,
+        total_players=board.total_players,
+    )
@@ -3,16 +3,64 @@ Question bank endpoints
 Supports both static questions and AI-generated personalized questions
 """
 
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Header, Response
+from fastapi.responses import StreamingResponse
 from src.models.schemas import QuestionResponse, Question
-from src.utils.database import get_db
+from src.utils.database import get_async_db
 from src.api.auth import get_current_user
 from src.services.agent import SATLearningAgent
-from supabase import Client
-from typing import Optional
+from src.services.topic_catalog import topic_catalog
+from src.services.question_bank import question_bank
+from src.services.question_pool import question_pool
+from src.services.single_flight import agent_question_flights
+from src.utils.etag import weak_etag, etag_matches, set_etag, not_modified
+from postgrest import AsyncPostgrestClient
+from pydantic import ValidationError
+from typing import List, Optional
+import json
 
 router = APIRouter()
 
+def _sse(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+def _to_question(q: dict) -> Question:
+    """API format for an agent question or a pooled generated_questions row"""
+    return Question(
+        id=q.get("id", 0),
+        question=q.get("question", ""),
+        options=q.get("options", []),
+        correctAnswer=q.get("correctAnswer", q.get("correct_answer", 0)),
+        topic=q.get("topic", "General"),
+        difficulty=q.get("difficulty", "medium"),
+        explanation=q.get("explanation", "")
+    )
+
+async def _agent_questions(user_id: str, topic: Optional[str], difficulty: Optional[str], limit: int) -> List[Question]:
+    """Personalized questions: drawn from the question pool when it is running,
+    generated live only when the pool has nothing for the user"""
+    agent = SATLearningAgent(user_id)
+    analysis = await agent.analyze_performance()
+    questions = []
+    
+    if question_pool.running:
+        plan = agent.question_plan(analysis, limit, topic, difficulty)
+        questions = [_to_question(row) for row in await question_pool.draw(user_id, plan)]
+        if questions and len(questions) < limit:
+            # Top up from the static bank while the pool refills
+            questions += question_bank.sample(topic, difficulty, limit - len(questions))
+    
+    if not questions:
+        generated_questions = await agent.generate_questions(
+            num_questions=limit, use_web_search=False, analysis=analysis
+        )
+        if question_pool.running:
+            # Stock the pool with them so the next user doesn't pay for them again
+            generated_questions = await question_pool.add(generated_questions)
+            await question_pool.mark_seen(user_id, generated_questions)
+        questions = [_to_question(q) for q in generated_questions]
+    return questions
+
 @router.get("/", response_model=QuestionResponse)
 async def get_questions(
     topic: Optional[str] = Query(None, description="Filter by topic"),
@@ -20,12 +68,18 @@ async def get_questions(
     limit: int = Query(10, ge=1, le=100, description="Number of questions to return"),
     use_agent: bool = Query(False, description="Use AI agent to generate personalized questions"),
     current_user: dict = Depends(get_current_user),
-    db: Client = Depends(get_db)
+    db: AsyncPostgrestClient = Depends(get_async_db)
 ):
     """Get questions from the question bank
     
-    If use_agent=true, the AI agent will analyze user performance and generate
-    personalized questions based on weak topics.
+    Without use_agent, returns a random sample of the static bank (the games'
+    curated question files, indexed in memory). If use_agent=true, the AI
+    agent analyzes user performance and serves personalized questions based on
+    weak topics: drawn from the pre-generated question pool when it is
+    running, generated live only when the pool has nothing for the user.
+    Identical concurrent requests from the same user (e.g. on game select and
+    again on mount) share one agent run, and its result is reused for
+    AGENT_COALESCE_WINDOW_SECONDS. Falls back to the static bank if the agent fails.
     """
     try:
         questions = []
@@ -33,31 +87,19 @@ async def get_questions(
         # Use AI agent to generate personalized questions
         if use_agent:
             try:
-                agent = SATLearningAgent(str(current_user["id"]))
-                generated_questions = await agent.generate_questions(num_questions=limit, use_web_search=False)
-                
-                # Convert agent questions to API format
-                for q in generated_questions:
-                    questions.append(Question(
-                        id=q.get("id", 0),
-                        question=q.get("question", ""),
-                        options=q.get("options", []),
-                        correctAnswer=q.get("correct_answer", 0),
-                        topic=q.get("topic", "General"),
-                        difficulty=q.get("difficulty", "medium"),
-                        explanation=q.get("explanation", "")
-                    ))
+                user_id = str(current_user["id"])
+                questions = await agent_question_flights.run(
+                    (user_id, topic, difficulty, limit),
+                    lambda: _agent_questions(user_id, topic, difficulty, limit),
+                )
             except Exception as agent_error:
                 # If agent fails, fall back to static questions
                 print(f"Agent error (falling back to static): {agent_error}")
                 use_agent = False
         
-        # Fall back to static questions if agent not used or failed
+        # Fall back to the static bank if agent not used or failed
         if not use_agent or not questions:
-            # TODO: Load questions from database or game files
-            # For now, return empty list
-            # You can import from frontend/games/carnival/questions.ts or whackamole/questions.ts
-            pass
+            questions = question_bank.sample(topic, difficulty, limit)
         
         return QuestionResponse(
             questions=questions,
@@ -67,24 +109,82 @@ async def get_questions(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/stream")
+async def stream_questions(
+    topic: Optional[str] = Query(None, description="Filter by topic"),
+    difficulty: Optional[str] = Query(None, description="Filter by difficulty (easy, medium, hard)"),
+    limit: int = Query(10, ge=1, le=100, description="Number of questions to return"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Personalized questions as Server-Sent Events, one "question" event each
+    
+    Pooled questions (see GET /) are sent immediately; the rest are generated
+    with a streamed completion and sent as soon as each one is complete, so a
+    game can start on the first question. Ends with a "done" event carrying
+    the total, preceded by an "error" event if generation failed.
+    """
+    user_id = str(current_user["id"])
+    agent = SATLearningAgent(user_id)
+    
+    async def events():
+        sent = 0
+        try:
+            analysis = await agent.analyze_performance()
+            if question_pool.running:
+                plan = agent.question_plan(analysis, limit, topic, difficulty)
+                for row in await question_pool.draw(user_id, plan):
+                    sent += 1
+                    yield _sse("question", _to_question(row).model_dump_json())
+            
+            generated = []
+            if sent < limit:
+                async for q in agent.stream_questions(limit - sent, analysis=analysis):
+                    try:
+                        question = _to_question({**q, "id": q.get("id", sent + 1)})
+                    except ValidationError:
+                        continue
+                    generated.append(q)
+                    sent += 1
+                    yield _sse("question", question.model_dump_json())
+            
+            if generated and question_pool.running:
+                # Stock the pool with them so the next user doesn't pay for them again
+                rows = await question_pool.add(generated)
+                await question_pool.mark_seen(user_id, rows)
+        except Exception as e:
+            print(f"Agent stream error: {e}")
+            yield _sse("error", json.dumps({"detail": str(e)}))
+        
+        yield _sse("done", json.dumps({"total": sent}))
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.get("/topics")
 async def get_topics(
-    current_user: dict = Depends(get_current_user),
-    db: Client = Depends(get_db)
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user)
 ):
-    """Get available topics"""
+    """Get available topics
+    
+    Served from the in-memory topics catalog, which a background task
+    refreshes from the topics table. The ETag follows the catalog version,
+    so If-None-Match gets a 304 until the list changes.
+    """
     try:
-        # Get unique topics from question_attempts or a topics table
-        result = (
-            db.table("question_attempts")
-            .select("topic")
-            .execute()
-        )
+        topics = await topic_catalog.get_topics()
         
-        topics = list(set([attempt["topic"] for attempt in result.data]))
+        etag = weak_etag("topics", topic_catalog.version)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
         
         return {"topics": topics}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-
@@ -2,23 +2,50 @@
 User statistics endpoints
 """
 
-from fastapi import APIRouter, HTTPException, Depends
-from src.models.schemas import UserStatsResponse, GameSessionResponse
-from src.utils.database import get_db
+from fastapi import APIRouter, HTTPException, Depends, Query, Response, Header
+from src.models.schemas import UserStatsResponse, GameSessionResponse, ProgressPoint, ProgressResponse, TopicMastery, MasteryResponse
+from src.utils.database import get_async_db
 from src.api.auth import get_current_user
-from supabase import Client
-from typing import List
+from src.services.stats_cache import get_cached_user_stats, store_user_stats, get_user_version
+from src.services.mastery import mastery, topic_labels
+from src.utils.pagination import decode_cursor, keyset_filter, cursor_for, InvalidCursorError
+from src.utils.etag import weak_etag, etag_matches, set_etag, not_modified
+from src.config import SESSIONS_PAGE_MAX, PROGRESS_MAX_DAYS, STATS_CACHE_TTL_SECONDS
+from postgrest import AsyncPostgrestClient
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
 
 router = APIRouter()
 
+def _user_etag(user_id: str, *parts) -> str:
+    # Rolls over with the stats cache TTL, so saves handled by another worker
+    # show up here no later than they would through the cache
+    return weak_etag(user_id, get_user_version(user_id), *parts, max_age=STATS_CACHE_TTL_SECONDS)
+
 @router.get("/user", response_model=UserStatsResponse)
 async def get_user_stats(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     current_user: dict = Depends(get_current_user),
-    db: Client = Depends(get_db)
+    db: AsyncPostgrestClient = Depends(get_async_db)
 ):
-    """Get user statistics"""
+    """Get user statistics
+    
+    Served from a per-user cache that saves keep up to date; the database is
+    only queried on a miss. Send If-None-Match with the last ETag to get a
+    304 when nothing changed.
+    """
+    etag = _user_etag(current_user["id"], "stats")
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    
+    cached = get_cached_user_stats(current_user["id"])
+    if cached is not None:
+        return UserStatsResponse(**cached)
+    
     try:
-        result = db.table("user_stats").select("*").eq("user_id", current_user["id"]).execute()
+        result = await db.table("user_stats").select("*").eq("user_id", current_user["id"]).execute()
         
         if not result.data:
             # Return default stats if none exist
@@ -36,30 +63,152 @@ async def get_user_stats(
             )
         
         stats = result.data[0]
+        store_user_stats(current_user["id"], stats)
         return UserStatsResponse(**stats)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Only the columns the sessions list shows
+SESSION_COLUMNS = ",".join(GameSessionResponse.model_fields)
+
 @router.get("/sessions", response_model=List[GameSessionResponse])
 async def get_recent_sessions(
-    limit: int = 10,
+    response: Response,
+    limit: int = Query(10, ge=1, le=SESSIONS_PAGE_MAX, description="Page size"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    if_none_match: Optional[str] = Header(None),
     current_user: dict = Depends(get_current_user),
-    db: Client = Depends(get_db)
+    db: AsyncPostgrestClient = Depends(get_async_db)
 ):
-    """Get recent game sessions"""
+    """Get recent game sessions, newest first
+    
+    Keyset-paginated on (created_at, id): when more sessions exist, the
+    X-Next-Cursor response header holds the cursor for the next page, so
+    every page is one index range scan no matter how deep it is. Supports
+    If-None-Match like /user.
+    """
+    etag = _user_etag(current_user["id"], "sessions", limit, cursor or "")
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    
     try:
-        result = (
+        query = (
             db.table("game_sessions")
-            .select("*")
+            .select(SESSION_COLUMNS)
             .eq("user_id", current_user["id"])
+        )
+        if cursor:
+            query = query.or_(keyset_filter(*decode_cursor(cursor)))
+        
+        # One extra row tells us whether there is a next page
+        result = await (
+            query
             .order("created_at", desc=True)
-            .limit(limit)
+            .order("id", desc=True)
+            .limit(limit + 1)
             .execute()
         )
         
-        return [GameSessionResponse(**session) for session in result.data]
+        rows = result.data[:limit]
+        if len(result.data) > limit:
+            response.headers["X-Next-Cursor"] = cursor_for(rows[-1])
         
+        return [GameSessionResponse(**session) for session in rows]
+        
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/progress", response_model=ProgressResponse)
+async def get_progress(
+    days: int = Query(90, ge=1, le=PROGRESS_MAX_DAYS, description="How many days back, including today"),
+    bucket: str = Query("day", pattern="^(day|week)$"),
+    game_id: Optional[str] = Query(None, description="Only this game"),
+    topic: Optional[str] = Query(None, description="Only this topic"),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncPostgrestClient = Depends(get_async_db)
+):
+    """Accuracy and score over time, oldest first
+    
+    Reads the daily rollups that saves maintain (user_daily_stats,
+    user_daily_game_stats, user_daily_topic_stats), so a 90-day chart reads
+    at most 90 rows. Days without activity are omitted; weekly buckets start
+    on Monday. All days are UTC.
+    """
+    if game_id and topic:
+        raise HTTPException(status_code=400, detail="Filter by game_id or topic, not both")
+    
+    since = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+    if topic:
+        query = db.table("user_daily_topic_stats").select("day, total, correct, total_time").eq("topic", topic)
+    elif game_id:
+        query = db.table("user_daily_game_stats").select("day, games_played, total_score, correct, wrong").eq("game_id", game_id)
+    else:
+        query = db.table("user_daily_stats").select("day, games_played, total_score, correct, wrong")
+    
+    try:
+        result = await (
+            query
+            .eq("user_id", current_user["id"])
+            .gte("day", since.isoformat())
+            .order("day")
+            .execute()
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    buckets: Dict[str, Dict[str, int]] = {}
+    for row in result.data:
+        day = date.fromisoformat(row["day"])
+        if bucket == "week":
+            day -= timedelta(days=day.weekday())
+        totals = buckets.setdefault(day.isoformat(), {})
+        for column, value in row.items():
+            if column != "day":
+                totals[column] = totals.get(column, 0) + value
+    
+    points = []
+    for start, totals in buckets.items():
+        if topic:
+            answered = totals["total"]
+            points.append(ProgressPoint(
+                date=start,
+                questions_answered=answered,
+                correct=totals["correct"],
+                accuracy=totals["correct"] / answered if answered else 0.0,
+                average_time=totals["total_time"] / answered if answered else 0.0,
+            ))
+        else:
+            answered = totals["correct"] + totals["wrong"]
+            points.append(ProgressPoint(
+                date=start,
+                games_played=totals["games_played"],
+                total_score=totals["total_score"],
+                questions_answered=answered,
+                correct=totals["correct"],
+                accuracy=totals["correct"] / answered if answered else 0.0,
+            ))
+    
+    return ProgressResponse(bucket=bucket, days=days, points=points)
+
+@router.get("/mastery", response_model=MasteryResponse)
+async def get_mastery(
+    current_user: dict = Depends(get_current_user)
+):
+    """Per-topic mastery from the IRT model, strongest first
+    
+    ``mastery`` is the estimated chance of answering a medium question on the
+    topic correctly. Weak/strong labels need MASTERY_MIN_ATTEMPTS attempts.
+    Served from memory: the model is refit in the background and updated on
+    every save this worker handles.
+    """
+    topic_mastery = mastery.topic_mastery(current_user["id"])
+    weak, strong = topic_labels(topic_mastery)
+    topics = sorted(
+        (TopicMastery(topic=topic, **data) for topic, data in topic_mastery.items()),
+        key=lambda item: -item.mastery,
+    )
+    return MasteryResponse(topics=topics, weak_topics=weak, strong_topics=strong)
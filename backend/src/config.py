@@ -16,9 +16,140 @@ else:
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 # Don't raise error if not set - agent will handle it gracefully
 
+# Async LLM client (src/services/llm.py)
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "https://openrouter.ai/api/v1")
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "20"))
+# Cap on in-flight LLM calls per worker; extra calls wait up to LLM_QUEUE_TIMEOUT_SECONDS
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "30"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+
+# Cache of LLM completions keyed by a hash of the request (LLM_CACHE_ENABLED=false to turn off)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "1000"))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "21600"))
+# SQLite file for a cache tier that survives restarts (unset = memory only)
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH")
+
+# Agent question generation: requests are split into completions of at most
+# AGENT_QUESTIONS_PER_CALL questions, up to AGENT_GENERATION_CONCURRENCY at a time
+AGENT_QUESTIONS_PER_CALL = int(os.getenv("AGENT_QUESTIONS_PER_CALL", "10"))
+AGENT_GENERATION_CONCURRENCY = int(os.getenv("AGENT_GENERATION_CONCURRENCY", "8"))
+
 # Supabase configuration (uses same as main backend)
 # These are loaded from the same .env file as the main backend
 SUPABASE_URL = os.getenv("SUPABASE_URL") or os.getenv("NEXT_PUBLIC_SUPABASE_URL")
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_SERVICE_KEY")
 SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY") or os.getenv("NEXT_PUBLIC_SUPABASE_ANON_KEY")
 
+
+# JWT verification for protected routes
+# Legacy Supabase projects sign access tokens with HS256 using the project JWT secret
+# (Settings → API → JWT Secret). Projects on asymmetric signing keys publish a JWKS instead.
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+SUPABASE_JWKS_URL = os.getenv("SUPABASE_JWKS_URL") or (
+    f"{SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json" if SUPABASE_URL else None
+)
+JWT_AUDIENCE = os.getenv("JWT_AUDIENCE", "authenticated")
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "10000"))
+JWKS_CACHE_SECONDS = int(os.getenv("JWKS_CACHE_SECONDS", "600"))
+
+# Async PostgREST connection pool (shared by every request on a worker)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "50"))
+DB_KEEPALIVE_SECONDS = float(os.getenv("DB_KEEPALIVE_SECONDS", "30"))
+DB_TIMEOUT_SECONDS = float(os.getenv("DB_TIMEOUT_SECONDS", "10"))
+
+# Write-behind mode for /api/games/save-score (off by default)
+# Sessions are queued and bulk-inserted by a background flusher.
+WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "false").lower() in ("1", "true", "yes")
+WRITE_BEHIND_QUEUE_SIZE = int(os.getenv("WRITE_BEHIND_QUEUE_SIZE", "5000"))
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "200"))
+WRITE_BEHIND_FLUSH_SECONDS = float(os.getenv("WRITE_BEHIND_FLUSH_SECONDS", "0.5"))
+WRITE_BEHIND_ENQUEUE_TIMEOUT = float(os.getenv("WRITE_BEHIND_ENQUEUE_TIMEOUT", "2"))
+# Batches that still fail after retries are appended here and re-sent every WRITE_BEHIND_REPLAY_SECONDS
+WRITE_BEHIND_DEAD_LETTER_PATH = os.getenv("WRITE_BEHIND_DEAD_LETTER_PATH", "write_behind_dead_letter.jsonl")
+WRITE_BEHIND_REPLAY_SECONDS = float(os.getenv("WRITE_BEHIND_REPLAY_SECONDS", "60"))
+
+# Upper bound on sessions accepted by POST /api/games/save-scores
+BATCH_SAVE_MAX_SESSIONS = int(os.getenv("BATCH_SAVE_MAX_SESSIONS", "100"))
+
+# Idempotency-Key support for /api/games/save-score
+# "memory" keeps keys in a per-worker LRU; "database" also persists them in idempotency_keys
+IDEMPOTENCY_STORE = os.getenv("IDEMPOTENCY_STORE", "memory").lower()
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+
+# Per-user read cache for /api/stats/user (refreshed in place on save)
+STATS_CACHE_SIZE = int(os.getenv("STATS_CACHE_SIZE", "10000"))
+STATS_CACHE_TTL_SECONDS = float(os.getenv("STATS_CACHE_TTL_SECONDS", "60"))
+
+# Page size cap for keyset-paginated listings
+SESSIONS_PAGE_MAX = int(os.getenv("SESSIONS_PAGE_MAX", "100"))
+
+# Topics catalog cache for /api/questions/topics
+TOPICS_REFRESH_SECONDS = float(os.getenv("TOPICS_REFRESH_SECONDS", "300"))
+
+# In-memory leaderboards (global, per game, current week)
+LEADERBOARD_SIZE = int(os.getenv("LEADERBOARD_SIZE", "100"))
+LEADERBOARD_BUCKET_WIDTH = int(os.getenv("LEADERBOARD_BUCKET_WIDTH", "10"))
+LEADERBOARD_REBUILD_SECONDS = float(os.getenv("LEADERBOARD_REBUILD_SECONDS", "900"))
+
+# Longest range served by /api/stats/progress
+PROGRESS_MAX_DAYS = int(os.getenv("PROGRESS_MAX_DAYS", "365"))
+
+# Streaming history export (/api/export)
+# Comma-separated user ids allowed to export other users' (cohort) history
+EXPORT_ADMIN_USER_IDS = {
+    user_id.strip() for user_id in os.getenv("EXPORT_ADMIN_USER_IDS", "").split(",") if user_id.strip()
+}
+EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", "1000"))
+EXPORT_MAX_USERS = int(os.getenv("EXPORT_MAX_USERS", "500"))
+
+# Mastery model (1PL IRT over question_attempts, refit in the background)
+MASTERY_REFIT_SECONDS = float(os.getenv("MASTERY_REFIT_SECONDS", "3600"))
+MASTERY_FIT_ITERATIONS = int(os.getenv("MASTERY_FIT_ITERATIONS", "20"))
+MASTERY_PRIOR = float(os.getenv("MASTERY_PRIOR", "1.0"))
+MASTERY_PAGE_SIZE = int(os.getenv("MASTERY_PAGE_SIZE", "10000"))
+# Topics need this many attempts before they are labelled weak or strong
+MASTERY_MIN_ATTEMPTS = int(os.getenv("MASTERY_MIN_ATTEMPTS", "5"))
+MASTERY_WEAK_THRESHOLD = float(os.getenv("MASTERY_WEAK_THRESHOLD", "0.5"))
+MASTERY_STRONG_THRESHOLD = float(os.getenv("MASTERY_STRONG_THRESHOLD", "0.8"))
+
+# Static question bank (questions.json / questions.ts files under this directory)
+# Defaults to the games in frontend/ when the whole repo is checked out, else to
+# backend/question_bank/, the copy made by sync_question_bank.sh that deploys ship
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_FRONTEND_DIR = os.path.join(os.path.dirname(_BACKEND_DIR), "frontend")
+QUESTION_BANK_DIR = os.getenv("QUESTION_BANK_DIR") or (
+    _FRONTEND_DIR if os.path.isdir(_FRONTEND_DIR) else os.path.join(_BACKEND_DIR, "question_bank")
+)
+
+# Pre-generated question pool for use_agent=true (refilled by a background worker)
+QUESTION_POOL_ENABLED = os.getenv("QUESTION_POOL_ENABLED", "true").lower() in ("1", "true", "yes")
+# A (topic, difficulty) pool is topped up when fewer unseen questions than this remain
+QUESTION_POOL_LOW_WATER = int(os.getenv("QUESTION_POOL_LOW_WATER", "20"))
+QUESTION_POOL_BATCH_SIZE = int(os.getenv("QUESTION_POOL_BATCH_SIZE", "10"))
+QUESTION_POOL_MAX_PER_KEY = int(os.getenv("QUESTION_POOL_MAX_PER_KEY", "500"))
+QUESTION_POOL_REFILL_SECONDS = float(os.getenv("QUESTION_POOL_REFILL_SECONDS", "60"))
+QUESTION_POOL_SEEN_CACHE_SIZE = int(os.getenv("QUESTION_POOL_SEEN_CACHE_SIZE", "10000"))
+QUESTION_POOL_SEEN_TTL_SECONDS = float(os.getenv("QUESTION_POOL_SEEN_TTL_SECONDS", "3600"))
+
+# Concurrent identical use_agent=true requests from one user share a single run,
+# and its result is reused for this many seconds (0 = only coalesce in-flight calls)
+AGENT_COALESCE_WINDOW_SECONDS = float(os.getenv("AGENT_COALESCE_WINDOW_SECONDS", "5"))
+AGENT_COALESCE_CACHE_SIZE = int(os.getenv("AGENT_COALESCE_CACHE_SIZE", "10000"))
+
+# Near-duplicate filtering of agent questions (MinHash over normalized question text)
+# While on, question generation bypasses the LLM response cache: a replayed
+# completion would only contain questions the index already holds
+QUESTION_DEDUP_ENABLED = os.getenv("QUESTION_DEDUP_ENABLED", "true").lower() in ("1", "true", "yes")
+# Estimated similarity at which a question repeats one already in the bank or pool
+QUESTION_DUPLICATE_THRESHOLD = float(os.getenv("QUESTION_DUPLICATE_THRESHOLD", "0.7"))
+# Lower bar against questions recently generated for the same user (same template, new numbers)
+QUESTION_HISTORY_THRESHOLD = float(os.getenv("QUESTION_HISTORY_THRESHOLD", "0.5"))
+QUESTION_HISTORY_SIZE = int(os.getenv("QUESTION_HISTORY_SIZE", "200"))
+QUESTION_HISTORY_USERS = int(os.getenv("QUESTION_HISTORY_USERS", "10000"))
+QUESTION_HISTORY_TTL_SECONDS = float(os.getenv("QUESTION_HISTORY_TTL_SECONDS", "86400"))
+# Extra generation rounds for the questions dropped as duplicates
+AGENT_DEDUP_ROUNDS = int(os.getenv("AGENT_DEDUP_ROUNDS", "2"))
@@ -6,6 +6,8 @@ Handles authentication, game scores, user statistics, and question bank
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
+import asyncio
 import os
 from dotenv import load_dotenv
 
@@ -16,11 +18,61 @@ if os.path.exists(env_path):
 else:
     load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup/shutdown hooks for shared resources"""
+    from src.config import WRITE_BEHIND_ENABLED, QUESTION_POOL_ENABLED, OPENROUTER_API_KEY
+    from src.services.write_behind import session_write_queue
+    from src.utils.token_verifier import token_verifier
+    from src.services.topic_catalog import topic_catalog
+    from src.services.leaderboard import leaderboards
+    from src.services.mastery import mastery
+    from src.services.question_bank import question_bank
+    from src.services.question_pool import question_pool
+    from src.services.question_index import question_index
+    from src.services.llm import LLMClient
+    from src.services.llm_cache import llm_cache
+    from src.utils.database import AsyncDatabase
+    
+    # Load the JWKS off the event loop so the first authenticated requests don't fetch it
+    try:
+        await asyncio.to_thread(token_verifier.prefetch)
+    except Exception as e:
+        print(f"Error prefetching JWKS: {e}")
+    # Static questions are read once and served from memory
+    question_bank.load()
+    # Generated questions that repeat a bank question are dropped
+    question_index.load()
+    if WRITE_BEHIND_ENABLED:
+        session_write_queue.start()
+    topic_catalog.start()
+    # Builds the leaderboards from the database, then rebuilds periodically
+    leaderboards.start()
+    # Fits the mastery model over all attempts, then refits periodically
+    mastery.start()
+    # Pre-generated agent questions; refilling needs the LLM
+    if QUESTION_POOL_ENABLED and OPENROUTER_API_KEY:
+        question_pool.start()
+    
+    yield
+    
+    await question_pool.stop()
+    await mastery.stop()
+    await leaderboards.stop()
+    await topic_catalog.stop()
+    # Flush queued game sessions before the pool goes away
+    await session_write_queue.stop()
+    # Release the pooled Supabase and LLM connections
+    await AsyncDatabase.close()
+    await LLMClient.close()
+    llm_cache.close()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="NYU Hacks Arcade API",
     description="Backend API for NYU Hacks Arcade - Authentication, Scores, Statistics, and Question Bank",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware - MUST be added before routers
@@ -49,13 +101,13 @@ app.add_middleware(
 
 # Import routers
 try:
-    from src.api import auth, games, stats, questions, health
+    from src.api import auth, games, stats, questions, health, leaderboard, export
 except ImportError:
     # If running as script, use relative imports
     import sys
     import os
     sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    from src.api import auth, games, stats, questions, health
+    from src.api import auth, games, stats, questions, health, leaderboard, export
 
 # Include routers
 app.include_router(health.router, prefix="/api/health", tags=["Health"])
@@ -63,6 +115,8 @@ app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(games.router, prefix="/api/games", tags=["Games"])
 app.include_router(stats.router, prefix="/api/stats", tags=["Statistics"])
 app.include_router(questions.router, prefix="/api/questions", tags=["Questions"])
+app.include_router(leaderboard.router, prefix="/api/leaderboard", tags=["Leaderboard"])
+app.include_router(export.router, prefix="/api/export", tags=["Export"])
 
 @app.get("/")
 async def root():
@@ -4,7 +4,9 @@ Pydantic schemas for request/response validation
 
 from pydantic import BaseModel, EmailStr
 from typing import List, Optional, Dict
+import math
 from datetime import datetime
+from uuid import UUID
 
 # Authentication Schemas
 class UserSignup(BaseModel):
@@ -20,6 +22,10 @@ class TokenResponse(BaseModel):
     token_type: str = "bearer"
     user: dict
 
+# Column limits of game_sessions/question_attempts
+_INT_MAX = 2 ** 31 - 1
+_ACCURACY_MAX = 10  # DECIMAL(5, 4)
+
 # Game Schemas
 class QuestionAttempt(BaseModel):
     questionId: int
@@ -44,6 +50,29 @@ class GameAnalytics(BaseModel):
     streakInfo: dict
     averageResponseTime: int
 
+    def storage_error(self) -> Optional[str]:
+        """Why the database would reject this session, or None if it can be stored"""
+        counts = {
+            "score": self.score,
+            "correctAnswers": self.correctAnswers,
+            "wrongAnswers": self.wrongAnswers,
+            "averageResponseTime": self.averageResponseTime,
+        }
+        for field, value in counts.items():
+            if abs(value) > _INT_MAX:
+                return f"{field} is out of range"
+        if not math.isfinite(self.accuracy) or abs(self.accuracy) >= _ACCURACY_MAX:
+            return "accuracy is out of range"
+        max_streak = self.streakInfo.get("maxStreak", 0)
+        if max_streak is not None and (
+            isinstance(max_streak, bool) or not isinstance(max_streak, int) or abs(max_streak) > _INT_MAX
+        ):
+            return "streakInfo.maxStreak must be an integer"
+        for attempt in self.questionAttempts:
+            if abs(attempt.questionId) > _INT_MAX or abs(attempt.timeSpent) > _INT_MAX:
+                return f"question {attempt.questionId} is out of range"
+        return None
+
 class SaveScoreRequest(BaseModel):
     gameId: str
     analytics: GameAnalytics
@@ -52,6 +81,26 @@ class SaveScoreResponse(BaseModel):
     success: bool
     sessionId: str
 
+class SyncSessionItem(SaveScoreRequest):
+    # Generated by the client when the session is queued offline, so re-uploads are skipped
+    sessionId: Optional[UUID] = None
+    # When the game was played; the session counts toward that day's progress, not the upload day
+    playedAt: Optional[datetime] = None
+
+class SaveScoresRequest(BaseModel):
+    sessions: List[SyncSessionItem]
+
+class SaveScoresItemResult(BaseModel):
+    index: int
+    success: bool
+    sessionId: Optional[str] = None
+    status: str  # "saved", "duplicate", "conflict", "invalid" or "failed"
+    error: Optional[str] = None
+
+class SaveScoresResponse(BaseModel):
+    success: bool
+    results: List[SaveScoresItemResult]
+
 # Statistics Schemas
 class UserStatsResponse(BaseModel):
     total_games_played: int
@@ -75,6 +124,31 @@ class GameSessionResponse(BaseModel):
     max_streak: int
     created_at: str
 
+class ProgressPoint(BaseModel):
+    date: str  # first day of the bucket (YYYY-MM-DD, UTC)
+    games_played: Optional[int] = None  # not tracked per topic
+    total_score: Optional[int] = None
+    questions_answered: int
+    correct: int
+    accuracy: float
+    average_time: Optional[float] = None  # per question, topic series only
+
+class ProgressResponse(BaseModel):
+    bucket: str
+    days: int
+    points: List[ProgressPoint]
+
+class TopicMastery(BaseModel):
+    topic: str
+    ability: float  # logits; 0 = even odds on a medium question
+    mastery: float  # estimated P(correct) on a medium question
+    attempts: int
+
+class MasteryResponse(BaseModel):
+    topics: List[TopicMastery]
+    weak_topics: List[str]
+    strong_topics: List[str]
+
 # Question Bank Schemas
 class Question(BaseModel):
     id: int
@@ -89,3 +163,21 @@ class QuestionResponse(BaseModel):
     questions: List[Question]
     total: int
 
+
+# Leaderboard Schemas
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: str
+    score: int
+
+class LeaderboardResponse(BaseModel):
+    board: str
+    entries: List[LeaderboardEntry]
+    total_players: int
+
+class LeaderboardRankResponse(BaseModel):
+    board: str
+    rank: Optional[int]
+    score: Optional[int]
+    approximate: bool  # True when the player is outside the in-memory top-K
+    total_players: int
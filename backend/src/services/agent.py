@@ -1,16 +1,110 @@
-from openai import OpenAI
-from typing import List, Dict
+from typing import AsyncIterator, List, Dict, Iterable, Optional, Tuple
+import asyncio
 import json
+from contextlib import aclosing
 import time
-from src.config import OPENROUTER_API_KEY
+from src.config import AGENT_GENERATION_CONCURRENCY, AGENT_QUESTIONS_PER_CALL, AGENT_DEDUP_ROUNDS
 from duckduckgo_search import DDGS
 from src.services.supabase_agent_ops import SupabaseAgentOps
+from src.services.mastery import mastery, topic_labels
+from src.services.question_bank import question_bank
+from src.services.question_index import question_index
+from src.services.llm import complete, stream_completion
+from src.utils.json_stream import JSONArrayStream
 
-# Use OpenRouter (compatible with OpenAI API)
-client = OpenAI(
-    base_url="https://openrouter.ai/api/v1",
-    api_key=OPENROUTER_API_KEY
-)
+MODEL = "anthropic/claude-haiku-4.5"
+QUESTION_SYSTEM_PROMPT = "You are an expert SAT tutor AI that generates personalized practice questions. Always respond with valid JSON."
+
+QUESTION_FORMAT = """QUESTION FORMAT (JSON array):
+[
+  {
+    "id": 1,
+    "question": "If 2x + 5 = 15, what is the value of x?",
+    "options": ["5", "10", "7.5", "3"],
+    "correctAnswer": 0,
+    "topic": "Algebra",
+    "difficulty": "easy",
+    "explanation": "2x + 5 = 15, subtract 5: 2x = 10, divide by 2: x = 5",
+    "reasoning": "Targeting weak algebra skills"
+  },
+  ...
+]
+
+IMPORTANT:
+- Make questions educational and progressive
+- Include clear explanations
+- Vary question types within topics
+- Questions should build on each other
+- Add "reasoning" field explaining why this question helps the student"""
+
+# Question mix: 60% weak topics, 30% mixed, the rest (10%) strong topics to maintain
+WEAK_TOPIC_RATIO = 0.6
+BALANCED_RATIO = 0.3
+# Completion budget per question (JSON plus explanation and reasoning)
+TOKENS_PER_QUESTION = 350
+# Rejected duplicates quoted back to the model when regenerating
+AVOID_SAMPLE = 20
+
+def bucket_counts(num_questions: int) -> Tuple[int, int, int]:
+    """(weak, balanced, strong) question counts for a request"""
+    weak_count = int(num_questions * WEAK_TOPIC_RATIO)
+    balanced_count = int(num_questions * BALANCED_RATIO)
+    return weak_count, balanced_count, num_questions - weak_count - balanced_count
+
+def extract_json_array(content: str) -> List[Dict]:
+    """The outermost JSON array in a completion"""
+    start_idx = content.find('[')
+    end_idx = content.rfind(']') + 1
+    if start_idx == -1 or end_idx <= start_idx:
+        raise ValueError("No JSON array found in response")
+    return json.loads(content[start_idx:end_idx])
+
+def question_tokens(count: int) -> int:
+    """max_tokens for a completion of ``count`` questions, with room to spare"""
+    return min(8000, TOKENS_PER_QUESTION * count + 300)
+
+async def generate_topic_questions(topic: str, difficulty: str, count: int, avoid: Iterable[str] = ()) -> List[Dict]:
+    """Generate ``count`` non-personalized questions for one topic and difficulty
+    
+    Used to stock the shared question pool; ``avoid`` lists question texts
+    already in the pool so the model doesn't repeat them. Near-duplicates of
+    indexed questions are dropped, so fewer than ``count`` may come back.
+    """
+    avoid = list(avoid)
+    avoid_text = ""
+    if avoid:
+        avoid_text = "\nDo NOT repeat any of these existing questions:\n" + "\n".join(f"- {q}" for q in avoid) + "\n"
+    
+    prompt = f"""Generate {count} SAT questions on the topic "{topic}" at {difficulty} difficulty.
+{avoid_text}
+QUESTION FORMAT (JSON array):
+[
+  {{
+    "question": "If 2x + 5 = 15, what is the value of x?",
+    "options": ["5", "10", "7.5", "3"],
+    "correctAnswer": 0,
+    "topic": "{topic}",
+    "difficulty": "{difficulty}",
+    "explanation": "2x + 5 = 15, subtract 5: 2x = 10, divide by 2: x = 5"
+  }},
+  ...
+]
+
+Generate exactly {count} questions now:"""
+    
+    content = await complete(
+        model=MODEL,
+        messages=[
+            {"role": "system", "content": QUESTION_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.7,
+        max_tokens=question_tokens(count),
+        # A cached answer would repeat questions the index already holds
+        cache=not question_index.enabled
+    )
+    questions, _ = question_index.filter_new(extract_json_array(content))
+    return questions
 
 # Initialize DuckDuckGo search with retry capability
 def get_ddg_instance():
@@ -31,11 +125,13 @@ class SATLearningAgent:
         self.context_memory = []
         print(f"🔗 Agent initialized for user {user_id}")
         
-    def analyze_performance(self) -> Dict:
+    async def analyze_performance(self) -> Dict:
         """Analyzes user's historical performance from Supabase"""
         
-        performance = SupabaseAgentOps.get_user_performance(self.user_id)
-        topic_breakdown = SupabaseAgentOps.get_topic_performance(self.user_id)
+        performance, topic_breakdown = await asyncio.gather(
+            SupabaseAgentOps.get_user_performance(self.user_id),
+            SupabaseAgentOps.get_topic_performance(self.user_id),
+        )
         
         analysis = {
             "total_attempts": performance.get('total_attempts', 0),
@@ -46,6 +142,14 @@ class SATLearningAgent:
             "recommended_difficulty": "medium"
         }
         
+        # Prefer the IRT mastery estimates over raw per-topic accuracy
+        topic_mastery = mastery.topic_mastery(self.user_id)
+        if topic_mastery:
+            analysis["weak_topics"], analysis["strong_topics"] = topic_labels(topic_mastery)
+            for topic, data in topic_breakdown.items():
+                if topic in topic_mastery:
+                    data["mastery"] = topic_mastery[topic]["mastery"] * 100
+        
         # Determine difficulty
         if analysis["recent_accuracy"] < 50:
             analysis["recommended_difficulty"] = "easy"
@@ -121,18 +225,86 @@ STRONG TOPICS (Can challenge more):
 TOPIC PERFORMANCE:
 """
         for topic, data in analysis['topic_breakdown'].items():
-            context += f"- {topic}: {data['accuracy']:.1f}% accuracy, {data['attempts']} attempts\n"
+            context += f"- {topic}: {data['accuracy']:.1f}% accuracy, {data['attempts']} attempts"
+            if 'mastery' in data:
+                context += f", {data['mastery']:.0f}% mastery"
+            context += "\n"
         
         return context
     
-    async def generate_questions(self, num_questions: int = 50, use_web_search: bool = False) -> List[Dict]:
+    def question_plan(
+        self,
+        analysis: Dict,
+        num_questions: int,
+        topic: Optional[str] = None,
+        difficulty: Optional[str] = None,
+    ) -> List[Tuple[str, str, int]]:
+        """(topic, difficulty, count) buckets for a request, using the same mix as generate_questions
+        
+        Weak topics get the recommended difficulty, mixed topics medium and
+        strong topics hard. An explicit topic/difficulty filter overrides the mix.
+        """
+        if topic:
+            return [(topic, difficulty or analysis['recommended_difficulty'], num_questions)]
+        
+        weak = analysis['weak_topics']
+        strong = analysis['strong_topics']
+        mixed = list(dict.fromkeys(list(analysis['topic_breakdown']) + weak + strong)) or question_bank.topics()
+        weak_count, balanced_count, strong_count = bucket_counts(num_questions)
+        
+        counts: Dict[Tuple[str, str], int] = {}
+        def spread(topics: List[str], level: str, count: int):
+            for i in range(count):
+                key = (topics[i % len(topics)], difficulty or level)
+                counts[key] = counts.get(key, 0) + 1
+        
+        spread(weak or mixed, analysis['recommended_difficulty'] if weak else "medium", weak_count)
+        spread(mixed, "medium", balanced_count)
+        spread(strong or mixed, "hard" if strong else "medium", strong_count)
+        return [(t, d, count) for (t, d), count in counts.items()]
+    
+    def build_question_prompt(self, context: str, analysis: Dict, num_questions: int) -> str:
+        """Question-generation prompt for a student context (JSON array output)"""
+        
+        # Calculate distribution (focus on weak topics)
+        weak_count, balanced_count, strong_count = bucket_counts(num_questions)
+        
+        return f"""{context}
+
+TASK: Generate {num_questions} SAT questions with the following distribution:
+
+1. {weak_count} questions on WEAK TOPICS ({', '.join(analysis['weak_topics']) if analysis['weak_topics'] else 'various topics'})
+   - Difficulty: {analysis['recommended_difficulty']} to medium
+   - Focus on building fundamentals
+
+2. {balanced_count} questions on MIXED TOPICS
+   - Difficulty: medium
+   - Help identify new weak areas
+
+3. {strong_count} questions on STRONG TOPICS
+   - Difficulty: hard
+   - Maintain and challenge mastery
+
+{QUESTION_FORMAT}
+
+Generate exactly {num_questions} questions now:"""
+    
+    async def generate_questions(
+        self,
+        num_questions: int = 50,
+        use_web_search: bool = False,
+        analysis: Optional[Dict] = None,
+    ) -> List[Dict]:
         """
         Generates personalized SAT questions using AI agent with context
         Can optionally search the web for real SAT question examples
+        Near-duplicates (see question_index) are replaced by up to
+        AGENT_DEDUP_ROUNDS extra generations of just the missing count
         """
         
         # Analyze performance
-        analysis = self.analyze_performance()
+        if analysis is None:
+            analysis = await self.analyze_performance()
         
         # Search for real SAT resources if enabled
         web_context = ""
@@ -144,13 +316,14 @@ TOPIC PERFORMANCE:
                 print(f"   📉 Focusing on weak topics: {', '.join(analysis['weak_topics'][:2])}")
                 for i, topic in enumerate(analysis['weak_topics'][:2]):  # Search top 2 weak topics
                     if i > 0:
-                        time.sleep(3)  # 3s delay between different topic searches
-                    web_context += self.search_sat_resources(topic, num_results=3)
+                        await asyncio.sleep(3)  # 3s delay between different topic searches
+                    # The search client is blocking, so it runs in a worker thread
+                    web_context += await asyncio.to_thread(self.search_sat_resources, topic, 3)
             else:
                 # New user - search general SAT topics
                 print(f"   📚 New user - searching general SAT topics")
                 # Only search 1 topic for new users to avoid rate limits
-                web_context += self.search_sat_resources("Algebra", num_results=2)
+                web_context += await asyncio.to_thread(self.search_sat_resources, "Algebra", 2)
         
         # Build context for agent
         context = self.build_agent_context(analysis)
@@ -160,107 +333,165 @@ TOPIC PERFORMANCE:
         else:
             print(f"   ℹ️  No web search performed (use_web_search={use_web_search})")
         
-        # Calculate distribution (focus on weak topics)
-        weak_topic_ratio = 0.6  # 60% weak topics
-        balanced_ratio = 0.3    # 30% mixed
-        strong_topic_ratio = 0.1  # 10% strong topics (to maintain)
+        # One smaller completion per chunk of each weak/mixed/strong bucket, run
+        # concurrently, so wall-clock time follows the largest chunk
+        slots = asyncio.Semaphore(AGENT_GENERATION_CONCURRENCY)
+        
+        async def run(prompt_context: str, chunk: Dict) -> List[Dict]:
+            async with slots:
+                return await self._generate_chunk(prompt_context, chunk)
+        
+        async def generate(prompt_context: str, count: int) -> List[Dict]:
+            chunks = self.question_chunks(analysis, count)
+            # Call OpenRouter API with Haiku 4.5 (fastest & cheapest!)
+            print(f"   🤖 Calling Claude Haiku 4.5 via OpenRouter ({len(chunks)} requests)...")
+            results = await asyncio.gather(*(run(prompt_context, chunk) for chunk in chunks))
+            print(f"   ✅ Claude responses received!")
+            return [question for result in results for question in result][:count]
+        
+        # Drop near-duplicates of known questions and of this user's recent
+        # ones, then generate only the missing count again
+        questions, repeats = question_index.filter_new(await generate(context, num_questions), self.user_id)
+        for _ in range(AGENT_DEDUP_ROUNDS):
+            missing = num_questions - len(questions)
+            if missing <= 0:
+                break
+            print(f"   ♻️  Regenerating {missing} questions ({len(repeats)} duplicates dropped so far)")
+            retry_context = context
+            if repeats:
+                retry_context += "\n\nDo NOT repeat any of these questions:\n" + "\n".join(
+                    f"- {q.get('question', '')}" for q in repeats[-AVOID_SAMPLE:]
+                )
+            fresh, dropped = question_index.filter_new(await generate(retry_context, missing), self.user_id)
+            questions += fresh
+            repeats += dropped
+        
+        # Renumber
+        for number, question in enumerate(questions, start=1):
+            question["id"] = number
+        
+        # Store this interaction in context memory
+        self.context_memory.append({
+            "analysis": analysis,
+            "generated_count": len(questions),
+            "timestamp": "now"
+        })
+        
+        return questions
+    
+    def question_chunks(self, analysis: Dict, num_questions: int) -> List[Dict]:
+        """The weak/mixed/strong buckets, split into completions of at most AGENT_QUESTIONS_PER_CALL"""
+        weak_count, balanced_count, strong_count = bucket_counts(num_questions)
+        buckets = [
+            ("WEAK TOPICS", ', '.join(analysis['weak_topics']) if analysis['weak_topics'] else 'various topics',
+             f"{analysis['recommended_difficulty']} to medium", "Focus on building fundamentals", weak_count),
+            ("MIXED TOPICS", "any SAT topic", "medium", "Help identify new weak areas", balanced_count),
+            ("STRONG TOPICS", ', '.join(analysis['strong_topics']) if analysis['strong_topics'] else 'various topics',
+             "hard", "Maintain and challenge mastery", strong_count),
+        ]
         
-        weak_count = int(num_questions * weak_topic_ratio)
-        balanced_count = int(num_questions * balanced_ratio)
-        strong_count = num_questions - weak_count - balanced_count
+        chunks = []
+        for label, topics, difficulty, goal, count in buckets:
+            pieces = -(-count // AGENT_QUESTIONS_PER_CALL)  # ceil
+            for i in range(pieces):
+                size = count // pieces + (1 if i < count % pieces else 0)
+                chunks.append({"label": label, "topics": topics, "difficulty": difficulty, "goal": goal,
+                               "count": size, "part": i + 1, "parts": pieces})
+        return chunks
+    
+    async def _generate_chunk(self, context: str, chunk: Dict) -> List[Dict]:
+        """One completion for one chunk; a failed or unparseable chunk yields []
         
+        Chunks of the same bucket name their part, so no two share a prompt
+        (and a cached completion of one is never served for another).
+        """
+        part = f", set {chunk['part']} of {chunk['parts']}" if chunk['parts'] > 1 else ""
         prompt = f"""{context}
 
-TASK: Generate {num_questions} SAT questions with the following distribution:
-
-1. {weak_count} questions on WEAK TOPICS ({', '.join(analysis['weak_topics']) if analysis['weak_topics'] else 'various topics'})
-   - Difficulty: {analysis['recommended_difficulty']} to medium
-   - Focus on building fundamentals
-
-2. {balanced_count} questions on MIXED TOPICS
-   - Difficulty: medium
-   - Help identify new weak areas
-
-3. {strong_count} questions on STRONG TOPICS
-   - Difficulty: hard
-   - Maintain and challenge mastery
-
-QUESTION FORMAT (JSON array):
-[
-  {{
-    "id": 1,
-    "question": "If 2x + 5 = 15, what is the value of x?",
-    "options": ["5", "10", "7.5", "3"],
-    "correctAnswer": 0,
-    "topic": "Algebra",
-    "difficulty": "easy",
-    "explanation": "2x + 5 = 15, subtract 5: 2x = 10, divide by 2: x = 5",
-    "reasoning": "Targeting weak algebra skills"
-  }},
-  ...
-]
-
-IMPORTANT:
-- Make questions educational and progressive
-- Include clear explanations
-- Vary question types within topics
-- Questions should build on each other
-- Add "reasoning" field explaining why this question helps the student
+TASK: Generate {chunk['count']} SAT questions on {chunk['label']} ({chunk['topics']}{part})
+   - Difficulty: {chunk['difficulty']}
+   - {chunk['goal']}
 
-Generate exactly {num_questions} questions now:"""
+{QUESTION_FORMAT}
 
-        # Call OpenRouter API with Haiku 4.5 (fastest & cheapest!)
-        print(f"   🤖 Calling Claude Haiku 4.5 via OpenRouter...")
-        response = client.chat.completions.create(
-            model="anthropic/claude-haiku-4.5",  # Latest Haiku model!
+Generate exactly {chunk['count']} questions now:"""
+        
+        content = ""
+        try:
+            content = await complete(
+                model=MODEL,  # Latest Haiku model!
+                messages=[
+                    {"role": "system", "content": QUESTION_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.7,
+                max_tokens=question_tokens(chunk['count']),
+                # A cached answer would repeat questions the index already holds
+                cache=not question_index.enabled
+            )
+            return extract_json_array(content)
+        except Exception as e:
+            print(f"Error generating {chunk['label'].lower()} questions: {e}")
+            if content:
+                print(f"Response: {content[:500]}...")
+            return []
+    
+    async def stream_questions(self, num_questions: int = 10, analysis: Optional[Dict] = None) -> AsyncIterator[Dict]:
+        """Like generate_questions, but yields each question as soon as the model finishes it
+        
+        Uses the provider's streaming API and an incremental JSON parser, so
+        the first question arrives after one question's worth of tokens
+        instead of the whole array. Near-duplicates are skipped rather than
+        regenerated, so fewer than ``num_questions`` may arrive.
+        """
+        if analysis is None:
+            analysis = await self.analyze_performance()
+        prompt = self.build_question_prompt(self.build_agent_context(analysis), analysis, num_questions)
+        
+        parser = JSONArrayStream()
+        count = 0
+        # aclosing releases the LLM slot as soon as the array is complete,
+        # instead of whenever the abandoned generator is collected
+        async with aclosing(stream_completion(
+            model=MODEL,
             messages=[
-                {"role": "system", "content": "You are an expert SAT tutor AI that generates personalized practice questions. Always respond with valid JSON."},
+                {"role": "system", "content": QUESTION_SYSTEM_PROMPT},
                 {"role": "user", "content": prompt}
             ],
             temperature=0.7,
-            max_tokens=8000
-        )
-        print(f"   ✅ Claude response received!")
-        
-        # Parse response
-        content = response.choices[0].message.content
+            max_tokens=8000,
+            # A cached replay would repeat questions the index already holds
+            cache=not question_index.enabled
+        )) as texts:
+            async for text in texts:
+                for question in parser.feed(text):
+                    fresh, _ = question_index.filter_new([question], self.user_id)
+                    if not fresh:
+                        continue
+                    count += 1
+                    yield question
+                if parser.done:
+                    break
         
-        # Extract JSON from response
-        try:
-            # Try to find JSON array in the response
-            start_idx = content.find('[')
-            end_idx = content.rfind(']') + 1
-            if start_idx != -1 and end_idx > start_idx:
-                json_str = content[start_idx:end_idx]
-                questions = json.loads(json_str)
-                
-                # Store this interaction in context memory
-                self.context_memory.append({
-                    "analysis": analysis,
-                    "generated_count": len(questions),
-                    "timestamp": "now"
-                })
-                
-                return questions
-            else:
-                raise ValueError("No JSON array found in response")
-        except Exception as e:
-            print(f"Error parsing questions: {e}")
-            print(f"Response: {content[:500]}...")
-            return []
+        self.context_memory.append({
+            "analysis": analysis,
+            "generated_count": count,
+            "timestamp": "now"
+        })
     
-    def update_performance(self, question_attempts: List[Dict], game_data: Dict):
+    async def update_performance(self, question_attempts: List[Dict], game_data: Dict):
         """Updates user performance after game session in Supabase"""
         
-        session_id = SupabaseAgentOps.save_game_session(self.user_id, game_data)
+        session_id = await SupabaseAgentOps.save_game_session(self.user_id, game_data)
         if session_id:
-            SupabaseAgentOps.save_question_attempts(session_id, self.user_id, question_attempts)
-            SupabaseAgentOps.update_user_stats(self.user_id, game_data)
+            # Stats first so the topic totals can relabel weak/strong topics on the row
+            await SupabaseAgentOps.update_user_stats(self.user_id, game_data)
+            await SupabaseAgentOps.save_question_attempts(session_id, self.user_id, question_attempts)
     
     async def get_learning_insights(self) -> Dict:
         """Generates personalized learning insights using AI"""
         
-        analysis = self.analyze_performance()
+        analysis = await self.analyze_performance()
         context = self.build_agent_context(analysis)
         
         prompt = f"""{context}
@@ -280,8 +511,8 @@ Respond in JSON:
 }}
 """
         
-        response = client.chat.completions.create(
-            model="anthropic/claude-haiku-4.5",  # Latest Haiku for insights!
+        content = await complete(
+            model=MODEL,  # Latest Haiku for insights!
             messages=[
                 {"role": "system", "content": "You are a supportive SAT learning coach."},
                 {"role": "user", "content": prompt}
@@ -290,8 +521,6 @@ Respond in JSON:
             max_tokens=500
         )
         
-        content = response.choices[0].message.content
-        
         try:
             start_idx = content.find('{')
             end_idx = content.rfind('}') + 1
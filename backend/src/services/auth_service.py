@@ -2,16 +2,16 @@
 Authentication service - handles Supabase authentication
 """
 
-from supabase import Client
-from src.utils.database import Database
+from supabase import AsyncClient
+from src.utils.token_verifier import token_verifier
 from src.models.schemas import UserSignup, UserLogin
 from typing import Optional, Dict
 
 class AuthService:
-    def __init__(self, db: Client):
+    def __init__(self, db: AsyncClient):
         self.db = db
     
-    def _get_auth_client(self) -> Client:
+    def _get_auth_client(self) -> AsyncClient:
         """Get a Supabase client configured for authentication"""
         # Use the same client but ensure it's configured for auth operations
         return self.db
@@ -21,7 +21,7 @@ class AuthService:
         try:
             # Use Supabase auth.sign_up() which handles user creation
             # If email confirmation is disabled in Supabase, this will return a session
-            response = self.db.auth.sign_up({
+            response = await self.db.auth.sign_up({
                 "email": user_data.email,
                 "password": user_data.password,
             })
@@ -65,7 +65,7 @@ class AuthService:
         """Login user using Supabase Auth"""
         try:
             # Use Supabase auth.sign_in_with_password() which returns a session
-            response = self.db.auth.sign_in_with_password({
+            response = await self.db.auth.sign_in_with_password({
                 "email": user_data.email,
                 "password": user_data.password,
             })
@@ -96,43 +96,8 @@ class AuthService:
             }
     
     async def get_user(self, token: str) -> Optional[Dict]:
-        """Get user from Supabase JWT token"""
-        try:
-            # Use Supabase Admin API to verify the token
-            # First try to decode the JWT to get user info
-            import jwt
-            import os
-            
-            # Decode the JWT token without verification first to get user info
-            # Supabase tokens contain user information in the payload
-            decoded = jwt.decode(token, options={"verify_signature": False})
-            
-            if decoded and "sub" in decoded:
-                user_id = decoded["sub"]
-                user_email = decoded.get("email", "")
-                
-                # Verify the token is still valid (not expired)
-                import time
-                exp = decoded.get("exp", 0)
-                if exp and exp < time.time():
-                    print("Token has expired")
-                    return None
-                
-                # Optionally verify with Supabase by getting user details
-                # For now, we'll trust the JWT payload since it's from Supabase
-                return {
-                    "id": user_id,
-                    "email": user_email,
-                }
-            
-            return None
-        except jwt.DecodeError as e:
-            print(f"Error decoding token: {e}")
-            return None
-        except Exception as e:
-            # Token might be invalid or expired
-            print(f"Error verifying token: {e}")
-            return None
+        """Get user from a verified Supabase JWT token"""
+        return await token_verifier.verify_async(token)
     
     async def logout(self, token: str) -> Dict:
         """Logout user - invalidate session in Supabase"""
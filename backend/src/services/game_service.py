@@ -2,14 +2,37 @@
 Game score service - handles saving game sessions and analytics
 """
 
-from supabase import Client
-from src.models.schemas import GameAnalytics, SaveScoreRequest
-from typing import Dict
-from datetime import datetime
+from postgrest import AsyncPostgrestClient
+from src.models.schemas import GameAnalytics, SaveScoreRequest, SyncSessionItem
+from src.services.write_behind import session_write_queue, WriteQueueFullError
+from src.services.stats_cache import store_user_stats, bump_user_version
+from src.services.topic_catalog import topic_catalog
+from src.services.leaderboard import leaderboards
+from src.services.mastery import mastery
+from typing import Dict, List, Optional
+import uuid
+
+def _mastery_attempts(analytics: GameAnalytics):
+    return (
+        (attempt.topic, attempt.difficulty, attempt.questionId, attempt.isCorrect)
+        for attempt in analytics.questionAttempts
+    )
+
+def _item_result(index: int, session_id: str, status: str, error: Optional[str] = None) -> Dict:
+    return {
+        "index": index,
+        "success": status in ("saved", "duplicate"),
+        "sessionId": session_id,
+        "status": status,
+        "error": error,
+    }
 
 class GameService:
-    def __init__(self, db: Client):
+    def __init__(self, db: AsyncPostgrestClient):
         self.db = db
+        # Write-behind mode is on when the app lifespan started the queue; without
+        # a lifespan (serverless) saves are synchronous even if it is enabled
+        self.write_queue = session_write_queue if session_write_queue.accepting() else None
     
     async def save_game_session(
         self, 
@@ -17,50 +40,42 @@ class GameService:
         game_id: str, 
         analytics: GameAnalytics
     ) -> Dict:
-        """Save a game session and update user statistics"""
+        """Save a game session and update user statistics
+        
+        One RPC to save_game_session (database/schema.sql) writes the session,
+        its question attempts and the user_stats increment in a single
+        transaction, so a failure can't leave partial data behind.
+        """
+        # A session the database would reject fails here, before it is queued
+        # where it would sink the whole write-behind batch
+        error = analytics.storage_error()
+        if error:
+            return {"success": False, "error": error, "status_code": 422}
+        
+        if self.write_queue is not None:
+            return await self._enqueue_game_session(user_id, game_id, analytics)
+        
         try:
-            # Insert game session
-            session_data = {
-                "user_id": user_id,
-                "game_id": game_id,
-                "score": analytics.score,
-                "accuracy": analytics.accuracy,
-                "correct_answers": analytics.correctAnswers,
-                "wrong_answers": analytics.wrongAnswers,
-                "max_streak": analytics.streakInfo.get("maxStreak", 0),
-                "average_response_time": analytics.averageResponseTime,
-            }
-            
-            session_result = self.db.table("game_sessions").insert(session_data).execute()
+            result = await self.db.rpc("save_game_session", {
+                "p_user_id": user_id,
+                "p_game_id": game_id,
+                "p_analytics": analytics.model_dump(),
+            }).execute()
             
-            if not session_result.data:
+            if not result.data or not result.data.get("session_id"):
                 return {"success": False, "error": "Failed to create game session"}
             
-            session = session_result.data[0]
-            session_id = session["id"]
-            
-            # Insert question attempts
-            if analytics.questionAttempts:
-                attempts_data = [
-                    {
-                        "session_id": session_id,
-                        "question_id": attempt.questionId,
-                        "topic": attempt.topic,
-                        "difficulty": attempt.difficulty,
-                        "is_correct": attempt.isCorrect,
-                        "time_spent": attempt.timeSpent,
-                    }
-                    for attempt in analytics.questionAttempts
-                ]
-                
-                self.db.table("question_attempts").insert(attempts_data).execute()
-            
-            # Update user stats
-            await self._update_user_stats(user_id, analytics)
+            # Refresh the /api/stats/user cache with the committed totals
+            store_user_stats(user_id, result.data.get("user_stats"))
+            bump_user_version(user_id)
+            topic_catalog.add(attempt.topic for attempt in analytics.questionAttempts)
+            leaderboards.record(user_id, game_id, analytics.score)
+            mastery.record(user_id, _mastery_attempts(analytics))
             
             return {
                 "success": True,
-                "sessionId": session_id
+                "sessionId": result.data["session_id"],
+                "userStats": result.data.get("user_stats"),
             }
             
         except Exception as e:
@@ -69,61 +84,128 @@ class GameService:
                 "error": str(e)
             }
     
-    async def _update_user_stats(self, user_id: str, analytics: GameAnalytics):
-        """Update or create user statistics"""
-        # Get existing stats
-        stats_result = self.db.table("user_stats").select("*").eq("user_id", user_id).execute()
+    async def save_game_sessions(self, user_id: str, items: List[SyncSessionItem]) -> Dict:
+        """Save many sessions for one user in a single bulk RPC
         
-        # Calculate weak/strong topics
-        weak_topics = []
-        strong_topics = []
+        Sessions and attempts go in as set-based inserts and the user's stats
+        get one combined increment. Every item gets its own status: "saved",
+        "duplicate" (already saved by this user), "conflict" (the sessionId
+        belongs to another user), "invalid" (won't fit the database columns)
+        or "failed". If the bulk RPC is rejected, the items are retried one
+        at a time so only the one at fault fails.
+        """
+        session_ids = [str(item.sessionId or uuid.uuid4()) for item in items]
+        results: List[Optional[Dict]] = [None] * len(items)
+        valid = []
+        for index, item in enumerate(items):
+            error = item.analytics.storage_error()
+            if error:
+                results[index] = _item_result(index, session_ids[index], "invalid", error)
+            else:
+                valid.append(index)
         
-        for topic, perf in analytics.topicPerformance.items():
-            if perf.total > 0:
-                if perf.accuracy < 0.5:
-                    weak_topics.append(topic)
-                elif perf.accuracy >= 0.8:
-                    strong_topics.append(topic)
+        saved = []
+        if valid:
+            try:
+                saved.append((valid, await self._save_batch(user_id, items, session_ids, valid)))
+            except Exception as e:
+                print(f"Bulk save of {len(valid)} sessions failed, saving them one at a time: {e}")
+                for index in valid:
+                    try:
+                        saved.append(([index], await self._save_batch(user_id, items, session_ids, [index])))
+                    except Exception as e:
+                        results[index] = _item_result(index, session_ids[index], "failed", str(e))
         
-        total_questions = analytics.correctAnswers + analytics.wrongAnswers
+        user_stats = None
+        seen = set()
+        for indices, data in saved:
+            user_stats = self._record_saved(user_id, items, session_ids, indices, data, results, seen) or user_stats
         
-        if stats_result.data:
-            # Update existing stats
-            existing = stats_result.data[0]
-            
-            new_total_games = existing["total_games_played"] + 1
-            new_total_score = existing["total_score"] + analytics.score
-            new_total_questions = existing["total_questions_answered"] + total_questions
-            new_total_correct = existing["total_correct"] + analytics.correctAnswers
-            new_total_wrong = existing["total_wrong"] + analytics.wrongAnswers
-            new_accuracy = new_total_correct / new_total_questions if new_total_questions > 0 else 0
-            
-            # Merge topics
-            merged_weak = list(set(existing.get("weak_topics", []) + weak_topics))
-            merged_strong = list(set(existing.get("strong_topics", []) + strong_topics))
-            
-            self.db.table("user_stats").update({
-                "total_games_played": new_total_games,
-                "total_score": new_total_score,
-                "total_questions_answered": new_total_questions,
-                "total_correct": new_total_correct,
-                "total_wrong": new_total_wrong,
-                "overall_accuracy": new_accuracy,
-                "weak_topics": merged_weak,
-                "strong_topics": merged_strong,
-                "updated_at": datetime.utcnow().isoformat(),
-            }).eq("user_id", user_id).execute()
-        else:
-            # Create new stats
-            self.db.table("user_stats").insert({
-                "user_id": user_id,
-                "total_games_played": 1,
-                "total_score": analytics.score,
-                "total_questions_answered": total_questions,
-                "total_correct": analytics.correctAnswers,
-                "total_wrong": analytics.wrongAnswers,
-                "overall_accuracy": analytics.accuracy,
-                "weak_topics": weak_topics,
-                "strong_topics": strong_topics,
-            }).execute()
-
+        return {
+            "success": True,
+            "results": results,
+            "userStats": user_stats,
+        }
+    
+    async def _save_batch(
+        self,
+        user_id: str,
+        items: List[SyncSessionItem],
+        session_ids: List[str],
+        indices: List[int]
+    ) -> Dict:
+        result = await self.db.rpc("save_game_sessions", {
+            "p_sessions": [
+                {
+                    "session_id": session_ids[index],
+                    "user_id": user_id,
+                    "game_id": items[index].gameId,
+                    "analytics": items[index].analytics.model_dump(),
+                    "played_at": items[index].playedAt.isoformat() if items[index].playedAt else None,
+                }
+                for index in indices
+            ],
+        }).execute()
+        return result.data or {}
+    
+    def _record_saved(
+        self,
+        user_id: str,
+        items: List[SyncSessionItem],
+        session_ids: List[str],
+        indices: List[int],
+        data: Dict,
+        results: List[Optional[Dict]],
+        seen: set
+    ) -> Optional[Dict]:
+        """Fill in the results of one saved batch and update the in-memory caches"""
+        user_stats = (data.get("user_stats") or [None])[0]
+        inserted = set(data.get("inserted") or [])
+        conflicts = set(data.get("conflicts") or [])
+        new_items = []
+        for index in indices:
+            session_id = session_ids[index]
+            if session_id in conflicts:
+                results[index] = _item_result(
+                    index, session_id, "conflict", "sessionId is already used by another session"
+                )
+                continue
+            saved = session_id in inserted and session_id not in seen
+            seen.add(session_id)
+            if saved:
+                new_items.append(items[index])
+            results[index] = _item_result(index, session_id, "saved" if saved else "duplicate")
+        
+        # The sessions are committed; a cache update failing must not fail the request
+        try:
+            if user_stats is not None:
+                store_user_stats(user_id, user_stats)
+            bump_user_version(user_id)
+            for item in new_items:
+                topic_catalog.add(attempt.topic for attempt in item.analytics.questionAttempts)
+                leaderboards.record(user_id, item.gameId, item.analytics.score, item.playedAt)
+                mastery.record(user_id, _mastery_attempts(item.analytics))
+        except Exception as e:
+            print(f"Error updating caches after saving sessions for {user_id}: {e}")
+        return user_stats
+    
+    async def _enqueue_game_session(
+        self,
+        user_id: str,
+        game_id: str,
+        analytics: GameAnalytics
+    ) -> Dict:
+        """Queue the session for the background flusher and return its id immediately"""
+        try:
+            session_id = await self.write_queue.enqueue(user_id, game_id, analytics)
+            return {
+                "success": True,
+                "sessionId": session_id,
+                "queued": True,
+            }
+        except WriteQueueFullError as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "status_code": 503,
+            }
@@ -0,0 +1,149 @@
+"""
+Idempotency-Key store - replays the stored response for retried requests
+"""
+
+import asyncio
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+
+from src.config import IDEMPOTENCY_STORE, IDEMPOTENCY_TTL_SECONDS, IDEMPOTENCY_CACHE_SIZE
+from src.utils.cache import TTLCache
+from src.utils.database import AsyncDatabase
+
+
+class IdempotencyStore:
+    """Completed responses keyed by (user, Idempotency-Key)
+
+    Keys live in an in-memory LRU with a TTL; with ``persistent=True`` they are
+    also written to the ``idempotency_keys`` table so retries landing on
+    another worker, or after a restart, are still recognised. A retry that
+    arrives while the original is still running waits for its result instead
+    of running the handler a second time.
+    """
+
+    def __init__(
+        self,
+        ttl: int = IDEMPOTENCY_TTL_SECONDS,
+        max_size: int = IDEMPOTENCY_CACHE_SIZE,
+        persistent: bool = IDEMPOTENCY_STORE == "database",
+    ):
+        self.ttl = ttl
+        self.persistent = persistent
+        self.cache = TTLCache(max_size=max_size, ttl=ttl)
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self.replays = 0
+        self.conflicts = 0
+
+    @staticmethod
+    def fingerprint(body: str) -> str:
+        """Digest of the request body, to reject a key reused for a different request"""
+        return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+    async def _load(self, user_id: str, key: str) -> Optional[Dict]:
+        entry = self.cache.get((user_id, key))
+        if entry is not None or not self.persistent:
+            return entry
+
+        try:
+            db = AsyncDatabase.get_client()
+            result = await (
+                db.table("idempotency_keys")
+                .select("fingerprint, response")
+                .eq("user_id", user_id)
+                .eq("key", key)
+                .gt("expires_at", datetime.now(timezone.utc).isoformat())
+                .execute()
+            )
+        except Exception as e:
+            print(f"Error reading idempotency key: {e}")
+            return None
+
+        if not result.data:
+            return None
+        entry = result.data[0]
+        self.cache.set((user_id, key), entry)
+        return entry
+
+    async def _save(self, user_id: str, key: str, entry: Dict):
+        self.cache.set((user_id, key), entry)
+        if not self.persistent:
+            return
+
+        try:
+            db = AsyncDatabase.get_client()
+            expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.ttl)
+            await db.table("idempotency_keys").upsert({
+                "user_id": user_id,
+                "key": key,
+                "fingerprint": entry["fingerprint"],
+                "response": entry["response"],
+                "expires_at": expires_at.isoformat(),
+            }).execute()
+        except Exception as e:
+            # The in-memory copy still covers retries on this worker
+            print(f"Error saving idempotency key: {e}")
+
+    async def run(
+        self,
+        user_id: str,
+        key: str,
+        fingerprint: str,
+        handler: Callable[[], Awaitable[Dict]],
+    ) -> Dict:
+        """Return the stored response for this key, or run ``handler`` once and store it
+
+        Only successful responses are stored; if ``handler`` raises, the
+        exception propagates (to concurrent waiters too) and the key stays free.
+        """
+        entry = await self._load(user_id, key)
+        if entry is not None:
+            return self._replay(entry, fingerprint)
+
+        scope = (user_id, key)
+        inflight = self._inflight.get(scope)
+        if inflight is not None:
+            return self._replay(await asyncio.shield(inflight), fingerprint)
+
+        future = asyncio.get_running_loop().create_future()
+        # Nobody may be waiting; don't warn about an unretrieved exception
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[scope] = future
+        try:
+            response = await handler()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            entry = {"fingerprint": fingerprint, "response": response}
+            await self._save(user_id, key, entry)
+            future.set_result(entry)
+            return response
+        finally:
+            self._inflight.pop(scope, None)
+
+    def _replay(self, entry: Dict, fingerprint: str) -> Dict:
+        if entry["fingerprint"] != fingerprint:
+            self.conflicts += 1
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key was already used for a different request"
+            )
+        self.replays += 1
+        return entry["response"]
+
+    def stats(self) -> Dict:
+        """Replay counters for the metrics endpoint"""
+        return {
+            **self.cache.stats(),
+            "persistent": self.persistent,
+            "replays": self.replays,
+            "conflicts": self.conflicts,
+            "inflight": len(self._inflight),
+        }
+
+
+# Shared store for save-score retries
+idempotency_store = IdempotencyStore()
@@ -0,0 +1,276 @@
+"""
+In-memory leaderboards - global, per game and for the current week
+"""
+
+import asyncio
+import heapq
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple, Union
+
+from src.config import LEADERBOARD_SIZE, LEADERBOARD_BUCKET_WIDTH, LEADERBOARD_REBUILD_SECONDS
+from src.utils.database import AsyncDatabase
+
+GLOBAL_BOARD = "global"
+WEEKLY_BOARD = "week"
+
+
+def game_board(game_id: str) -> str:
+    return f"game:{game_id}"
+
+
+def week_start(now: Optional[datetime] = None) -> datetime:
+    """Monday 00:00 UTC of the week containing ``now``"""
+    now = now or datetime.now(timezone.utc)
+    day = now.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    return day - timedelta(days=day.weekday())
+
+
+def _as_utc(value: Union[datetime, str]) -> datetime:
+    """Aware UTC datetime from a datetime or ISO string; naive values are taken as UTC"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+class TopKBoard:
+    """Top ``k`` players by best score, kept as a min-heap plus a user index
+
+    The heap root is the lowest score still on the board, so a new score is
+    rejected in O(1) and admitted in O(log k). When a player already on the
+    board improves, a new heap entry is pushed and the old one is skipped
+    lazily. ``histogram`` counts every player's best score per bucket as of
+    the last rebuild; ranks outside the top ``k`` are estimated from it.
+    """
+
+    def __init__(self, k: int = LEADERBOARD_SIZE, bucket_width: int = LEADERBOARD_BUCKET_WIDTH):
+        self.k = k
+        self.bucket_width = bucket_width
+        self.scores: Dict[str, int] = {}
+        self.histogram: Dict[int, int] = {}
+        self._heap: List[Tuple[int, str]] = []
+        self._ranked: Optional[List[Tuple[str, int]]] = None
+
+    def _min(self) -> Optional[Tuple[int, str]]:
+        while self._heap:
+            score, user_id = self._heap[0]
+            if self.scores.get(user_id) == score:
+                return score, user_id
+            heapq.heappop(self._heap)
+        return None
+
+    def offer(self, user_id: str, score: int) -> bool:
+        """Record a score; returns True if the board changed
+
+        Keeps each player's best score, so offering the same score twice is a no-op.
+        """
+        current = self.scores.get(user_id)
+        if current is not None:
+            if score <= current:
+                return False
+        elif len(self.scores) >= self.k:
+            lowest = self._min()
+            if lowest is None or score <= lowest[0]:
+                return False
+            heapq.heappop(self._heap)
+            del self.scores[lowest[1]]
+
+        self.scores[user_id] = score
+        heapq.heappush(self._heap, (score, user_id))
+        if len(self._heap) > 2 * self.k:
+            # Drop stale entries left behind by improved scores
+            self._heap = [(s, u) for u, s in self.scores.items()]
+            heapq.heapify(self._heap)
+        self._ranked = None
+        return True
+
+    def ranked(self) -> List[Tuple[str, int]]:
+        """(user_id, score) pairs, best first"""
+        if self._ranked is None:
+            self._ranked = sorted(self.scores.items(), key=lambda item: (-item[1], item[0]))
+        return self._ranked
+
+    @property
+    def total_players(self) -> int:
+        return max(sum(self.histogram.values()), len(self.scores))
+
+    def rank(self, user_id: str, score: Optional[int]) -> Tuple[Optional[int], bool]:
+        """(rank, approximate) for a player whose best score is ``score``
+
+        Exact for players on the board; otherwise estimated from the histogram,
+        assuming scores are spread evenly within a bucket.
+        """
+        if user_id in self.scores:
+            for position, (member, _) in enumerate(self.ranked(), start=1):
+                if member == user_id:
+                    return position, False
+        if score is None:
+            return None, False
+
+        bucket = score // self.bucket_width
+        above = sum(count for b, count in self.histogram.items() if b > bucket)
+        bucket_top = (bucket + 1) * self.bucket_width - 1
+        above += self.histogram.get(bucket, 0) * (bucket_top - score) / self.bucket_width
+        return max(len(self.scores) + 1, int(above) + 1), True
+
+
+class LeaderboardService:
+    """Process-level leaderboards, updated on save and rebuilt from the database
+
+    Saves feed ``record`` directly, so the worker that handled a save reflects
+    it immediately; the periodic rebuild picks up sessions saved by other
+    workers and refreshes the histograms used for approximate ranks.
+    """
+
+    def __init__(
+        self,
+        size: int = LEADERBOARD_SIZE,
+        bucket_width: int = LEADERBOARD_BUCKET_WIDTH,
+        rebuild_seconds: float = LEADERBOARD_REBUILD_SECONDS,
+    ):
+        self.size = size
+        self.bucket_width = bucket_width
+        self.rebuild_seconds = rebuild_seconds
+        self.week_start = week_start()
+        self._boards: Dict[str, TopKBoard] = {}
+        self._loaded = False
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        # Saves recorded while a rebuild is running, replayed onto the new boards
+        self._pending: Optional[List[Tuple[str, str, int, Optional[datetime]]]] = None
+
+        self.records = 0
+        self.rebuilds = 0
+        self.rebuild_errors = 0
+        self.last_rebuild_ms = 0.0
+
+    def _new_board(self) -> TopKBoard:
+        return TopKBoard(self.size, self.bucket_width)
+
+    def _roll_week(self):
+        current = week_start()
+        if current > self.week_start:
+            self.week_start = current
+            self._boards[WEEKLY_BOARD] = self._new_board()
+
+    def _apply(
+        self,
+        boards: Dict[str, TopKBoard],
+        since: datetime,
+        user_id: str,
+        game_id: str,
+        score: int,
+        played_at: Optional[datetime],
+    ):
+        names = [GLOBAL_BOARD, game_board(game_id)]
+        # Same rule as the rebuild: the weekly board only has sessions created since ``since``
+        if played_at is None or played_at >= since:
+            names.append(WEEKLY_BOARD)
+        for name in names:
+            board = boards.get(name)
+            if board is None:
+                board = boards[name] = self._new_board()
+            board.offer(user_id, score)
+
+    def record(self, user_id: str, game_id: str, score: int, played_at: Union[datetime, str, None] = None):
+        """Apply a saved session to the global, game and weekly boards
+
+        ``played_at`` is the session's created_at when it was back-dated (an
+        offline sync or a replayed write); sessions played before this week
+        skip the weekly board.
+        """
+        self._roll_week()
+        played_at = _as_utc(played_at) if played_at else None
+        self._apply(self._boards, self.week_start, user_id, game_id, score, played_at)
+        if self._pending is not None:
+            self._pending.append((user_id, game_id, score, played_at))
+        self.records += 1
+
+    async def rebuild(self):
+        """Reload every board from the leaderboard_snapshot RPC"""
+        start = time.perf_counter()
+        since = week_start()
+        self._pending = []
+        try:
+            db = AsyncDatabase.get_client()
+            result = await db.rpc("leaderboard_snapshot", {
+                "p_week_start": since.isoformat(),
+                "p_limit": self.size,
+                "p_bucket_width": self.bucket_width,
+            }).execute()
+        except Exception as e:
+            self._pending = None
+            self.rebuild_errors += 1
+            print(f"Error rebuilding leaderboards: {e}")
+            return
+
+        boards: Dict[str, TopKBoard] = {}
+        snapshot = result.data or {}
+        for row in snapshot.get("top") or []:
+            board = boards.get(row["board"])
+            if board is None:
+                board = boards[row["board"]] = self._new_board()
+            board.offer(row["user_id"], row["score"])
+        for row in snapshot.get("histogram") or []:
+            board = boards.get(row["board"])
+            if board is None:
+                board = boards[row["board"]] = self._new_board()
+            board.histogram[row["bucket"]] = row["users"]
+
+        for user_id, game_id, score, played_at in self._pending:
+            self._apply(boards, since, user_id, game_id, score, played_at)
+        self._pending = None
+
+        self._boards = boards
+        self.week_start = since
+        self._loaded = True
+        self.rebuilds += 1
+        self.last_rebuild_ms = (time.perf_counter() - start) * 1000
+
+    async def _ensure_loaded(self):
+        if not self._loaded:
+            async with self._lock:
+                if not self._loaded:
+                    await self.rebuild()
+
+    async def get_board(self, name: str) -> TopKBoard:
+        """Board by name; loads once on demand if the background task isn't running"""
+        await self._ensure_loaded()
+        self._roll_week()
+        return self._boards.get(name) or self._new_board()
+
+    async def _run(self):
+        while True:
+            async with self._lock:
+                await self.rebuild()
+            await asyncio.sleep(self.rebuild_seconds)
+
+    def start(self):
+        """Start the background rebuild loop (called from the app lifespan)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict:
+        return {
+            "boards": len(self._boards),
+            "size": self.size,
+            "records": self.records,
+            "rebuilds": self.rebuilds,
+            "rebuild_errors": self.rebuild_errors,
+            "last_rebuild_ms": round(self.last_rebuild_ms, 2),
+        }
+
+
+# Shared leaderboards for the API
+leaderboards = LeaderboardService()
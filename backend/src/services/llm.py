@@ -0,0 +1,205 @@
+"""
+Async LLM client shared by the learning agent
+One pooled AsyncOpenAI client (OpenRouter) per worker, with a global cap on in-flight calls
+and a response cache in front
+"""
+
+import asyncio
+import time
+from typing import AsyncIterator, Dict, Optional
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+from src.services.llm_cache import llm_cache
+from src.config import (
+    OPENROUTER_API_KEY, LLM_BASE_URL, LLM_POOL_SIZE, LLM_MAX_CONCURRENCY,
+    LLM_TIMEOUT_SECONDS, LLM_QUEUE_TIMEOUT_SECONDS, LLM_MAX_RETRIES,
+)
+
+
+class LLMBusyError(Exception):
+    """Raised when no LLM slot frees up within the queue timeout"""
+
+
+class LLMClient:
+    """Singleton AsyncOpenAI client
+
+    Its HTTP session keeps a bounded keep-alive pool, so concurrent calls reuse
+    connections to the provider instead of opening one per request.
+    """
+    _instance: Optional[AsyncOpenAI] = None
+
+    @classmethod
+    def get_client(cls) -> AsyncOpenAI:
+        if cls._instance is None:
+            cls._instance = AsyncOpenAI(
+                base_url=LLM_BASE_URL,
+                api_key=OPENROUTER_API_KEY,
+                timeout=httpx.Timeout(LLM_TIMEOUT_SECONDS, connect=10.0),
+                max_retries=LLM_MAX_RETRIES,
+                http_client=DefaultAsyncHttpxClient(
+                    limits=httpx.Limits(
+                        max_connections=LLM_POOL_SIZE,
+                        max_keepalive_connections=LLM_POOL_SIZE,
+                    ),
+                ),
+            )
+        return cls._instance
+
+    @classmethod
+    async def close(cls):
+        """Close pooled connections (called from the app lifespan)"""
+        if cls._instance is not None:
+            await cls._instance.close()
+            cls._instance = None
+
+
+class LLMLimiter:
+    """Global cap on in-flight LLM calls, with queue-wait metrics
+
+    Calls beyond ``max_concurrency`` wait for a slot; one that waits longer
+    than ``queue_timeout`` raises LLMBusyError instead of piling up.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        queue_timeout: float = LLM_QUEUE_TIMEOUT_SECONDS,
+    ):
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self.waiting = 0
+        self.in_flight = 0
+
+        self.calls = 0
+        self.errors = 0
+        self.rejected = 0
+        self.last_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self._total_wait_ms = 0.0
+        self._total_call_ms = 0.0
+
+    async def acquire(self):
+        start = time.perf_counter()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise LLMBusyError("Too many AI requests in progress, please retry shortly")
+        finally:
+            self.waiting -= 1
+
+        wait_ms = (time.perf_counter() - start) * 1000
+        self.in_flight += 1
+        self.calls += 1
+        self.last_wait_ms = wait_ms
+        self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+        self._total_wait_ms += wait_ms
+
+    def release(self, started: float, failed: bool = False):
+        self.in_flight -= 1
+        self._total_call_ms += (time.perf_counter() - started) * 1000
+        if failed:
+            self.errors += 1
+        self._slots.release()
+
+    def stats(self) -> Dict:
+        """Slot usage and queue wait for the metrics endpoint"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "calls": self.calls,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "last_wait_ms": round(self.last_wait_ms, 2),
+            "avg_wait_ms": round(self._total_wait_ms / self.calls, 2) if self.calls else 0.0,
+            "max_wait_ms": round(self.max_wait_ms, 2),
+            "avg_call_ms": round(self._total_call_ms / self.calls, 2) if self.calls else 0.0,
+        }
+
+
+# Shared by every LLM call on this worker
+llm_limiter = LLMLimiter()
+
+
+def _cache_key(cache: bool, request: Dict) -> Optional[str]:
+    return llm_cache.key(request) if cache and llm_cache.enabled else None
+
+
+def _approx_tokens(request: Dict, content: str) -> int:
+    """~4 characters per token, for streams that don't report usage"""
+    prompt = sum(len(str(message.get("content", ""))) for message in request.get("messages", []))
+    return (prompt + len(content)) // 4
+
+
+async def complete(cache: bool = True, **kwargs) -> str:
+    """Content of a chat completion (takes the usual create() arguments, including ``timeout``)
+
+    Identical requests within LLM_CACHE_TTL_SECONDS are answered from the
+    response cache without taking a slot; pass ``cache=False`` to always call the model.
+    """
+    key = _cache_key(cache, kwargs)
+    if key is not None:
+        cached = await llm_cache.get(key)
+        if cached is not None:
+            return cached
+
+    await llm_limiter.acquire()
+    started = time.perf_counter()
+    failed = True
+    try:
+        response = await LLMClient.get_client().chat.completions.create(**kwargs)
+        failed = False
+    finally:
+        llm_limiter.release(started, failed)
+
+    content = response.choices[0].message.content
+    if key is not None and content:
+        tokens = response.usage.total_tokens if response.usage else _approx_tokens(kwargs, content)
+        await llm_cache.set(key, content, tokens)
+    return content
+
+
+async def stream_completion(cache: bool = True, **kwargs) -> AsyncIterator[str]:
+    """Text deltas of a streamed chat completion
+
+    Holds one slot for the whole stream. Closing the generator (e.g. the HTTP
+    client went away, or the caller has all it needs) closes the provider
+    stream too and counts as a success, not an error. A cached response is
+    yielded as a single chunk; a stream is only cached if it ran to the end.
+    """
+    key = _cache_key(cache, kwargs)
+    if key is not None:
+        cached = await llm_cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+    await llm_limiter.acquire()
+    started = time.perf_counter()
+    failed = True
+    stream = None
+    parts = []
+    try:
+        stream = await LLMClient.get_client().chat.completions.create(stream=True, **kwargs)
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+                yield chunk.choices[0].delta.content
+        failed = False
+    except GeneratorExit:
+        # Closed by the consumer mid-stream; the text is incomplete, so not cached
+        failed = False
+        raise
+    finally:
+        if stream is not None:
+            await stream.close()
+        llm_limiter.release(started, failed)
+
+    if key is not None and parts:
+        content = "".join(parts)
+        await llm_cache.set(key, content, _approx_tokens(kwargs, content))
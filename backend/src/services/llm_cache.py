@@ -0,0 +1,154 @@
+"""
+Content-addressed cache of LLM completions
+Keyed by a hash of the normalized request (model, messages, sampling parameters)
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import time
+from threading import Lock
+from typing import Dict, Optional
+
+from src.config import LLM_CACHE_ENABLED, LLM_CACHE_SIZE, LLM_CACHE_TTL_SECONDS, LLM_CACHE_PATH
+from src.utils.cache import TTLCache, approx_sizeof
+
+# Request arguments that don't change the completion
+IGNORED_ARGS = {"timeout", "extra_headers", "stream"}
+
+
+class DiskCache:
+    """SQLite tier that survives restarts; calls are blocking, run them off the event loop"""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = Lock()
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache "
+                "(key TEXT PRIMARY KEY, content TEXT NOT NULL, tokens INTEGER NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, tokens, expires_at FROM llm_cache WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        if row is None:
+            return None
+        return {"content": row[0], "tokens": row[1], "expires_at": row[2]}
+
+    def set(self, key: str, entry: Dict):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, content, tokens, expires_at) VALUES (?, ?, ?, ?)",
+                (key, entry["content"], entry["tokens"], entry["expires_at"]),
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class LLMResponseCache:
+    """In-memory LRU in front of an optional SQLite tier, both with the same TTL
+
+    A disk hit is promoted into memory with its original expiry. ``saved_tokens``
+    adds up the prompt and completion tokens of every request served from cache.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = LLM_CACHE_ENABLED,
+        max_size: int = LLM_CACHE_SIZE,
+        ttl: float = LLM_CACHE_TTL_SECONDS,
+        path: Optional[str] = LLM_CACHE_PATH,
+    ):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.memory = TTLCache(max_size=max_size, ttl=ttl, sizeof=approx_sizeof)
+        self.path = path
+        self._disk: Optional[DiskCache] = None
+        self._disk_failed = False
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.saved_tokens = 0
+
+    @staticmethod
+    def key(request: Dict) -> str:
+        """sha256 of the request with message whitespace normalized and keys sorted"""
+        normalized = {k: v for k, v in request.items() if k not in IGNORED_ARGS}
+        normalized["messages"] = [
+            {**message, "content": " ".join(str(message.get("content", "")).split())}
+            for message in request.get("messages", [])
+        ]
+        payload = json.dumps(normalized, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _get_disk(self) -> Optional[DiskCache]:
+        if self._disk is None and self.path and not self._disk_failed:
+            try:
+                self._disk = DiskCache(self.path)
+            except Exception as e:
+                self._disk_failed = True
+                print(f"LLM disk cache unavailable ({self.path}): {e}")
+        return self._disk
+
+    async def get(self, key: str) -> Optional[str]:
+        """Cached completion text, or None on a miss"""
+        entry = self.memory.get(key)
+        if entry is None:
+            disk = self._get_disk()
+            if disk is not None:
+                try:
+                    entry = await asyncio.to_thread(disk.get, key)
+                except Exception as e:
+                    print(f"Error reading LLM disk cache: {e}")
+                if entry is not None:
+                    self.disk_hits += 1
+                    self.memory.set(key, entry, expires_at=entry["expires_at"])
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.saved_tokens += entry["tokens"]
+        return entry["content"]
+
+    async def set(self, key: str, content: str, tokens: int):
+        entry = {"content": content, "tokens": tokens, "expires_at": time.time() + self.ttl}
+        self.memory.set(key, entry, expires_at=entry["expires_at"])
+        disk = self._get_disk()
+        if disk is not None:
+            try:
+                await asyncio.to_thread(disk.set, key, entry)
+            except Exception as e:
+                print(f"Error writing LLM disk cache: {e}")
+
+    def close(self):
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "disk": bool(self._disk),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "saved_tokens": self.saved_tokens,
+            "memory": self.memory.stats(),
+        }
+
+
+# Shared cache in front of every agent completion
+llm_cache = LLMResponseCache()
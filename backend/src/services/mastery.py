@@ -0,0 +1,330 @@
+"""
+Mastery model - per-user, per-topic ability and per-question difficulty
+Fitted as a 1PL (Rasch) IRT model over question_attempts with NumPy
+"""
+
+import asyncio
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src.config import (
+    MASTERY_REFIT_SECONDS, MASTERY_FIT_ITERATIONS, MASTERY_PRIOR, MASTERY_PAGE_SIZE,
+    MASTERY_MIN_ATTEMPTS, MASTERY_WEAK_THRESHOLD, MASTERY_STRONG_THRESHOLD,
+)
+from src.utils.database import AsyncDatabase
+
+# Starting difficulty (logits) for a question, from its label
+DIFFICULTY_PRIOR = {"easy": -1.0, "medium": 0.0, "hard": 1.0}
+
+# (topic, difficulty, question_id, is_correct)
+Attempt = Tuple[str, str, int, bool]
+# (user_id, topic, difficulty, question_id, is_correct)
+AttemptRow = Tuple[str, str, str, int, bool]
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+class MasteryModel:
+    """P(correct) = sigmoid(ability[user, topic] - difficulty[question])
+
+    Users, topics and questions are mapped to dense indices; abilities live in
+    a users x topics matrix and difficulties in a vector, both grown by
+    doubling. A question is identified by (topic, difficulty label, question_id)
+    since question ids are only unique within a game's bank.
+
+    Both parameter sets have a Gaussian prior (ability 0, difficulty at its
+    label's value) with precision ``prior``, which keeps users and questions
+    with few attempts near the middle instead of at +/- infinity. The
+    matching ``*_info`` arrays hold the Fisher information (prior plus
+    sum of p(1 - p)), which sets the step size of incremental updates.
+    """
+
+    def __init__(self, prior: float = MASTERY_PRIOR):
+        self.prior = prior
+        self.users: Dict[str, int] = {}
+        self.topics: Dict[str, int] = {}
+        self.questions: Dict[Tuple[str, str, int], int] = {}
+        self.ability = np.zeros((0, 0))
+        self.ability_info = np.zeros((0, 0))
+        self.attempts = np.zeros((0, 0), dtype=np.int64)
+        self.difficulty = np.zeros(0)
+        self.difficulty_mean = np.zeros(0)
+        self.difficulty_info = np.zeros(0)
+
+    @staticmethod
+    def _capacity(current: int, needed: int) -> int:
+        return current if needed <= current else max(needed, 2 * current, 8)
+
+    def _reserve(self):
+        """Grow the arrays to fit every indexed user, topic and question"""
+        rows, cols = self.ability.shape
+        new_rows = self._capacity(rows, len(self.users))
+        new_cols = self._capacity(cols, len(self.topics))
+        if (new_rows, new_cols) != (rows, cols):
+            ability = np.zeros((new_rows, new_cols))
+            info = np.full((new_rows, new_cols), self.prior)
+            attempts = np.zeros((new_rows, new_cols), dtype=np.int64)
+            ability[:rows, :cols] = self.ability
+            info[:rows, :cols] = self.ability_info
+            attempts[:rows, :cols] = self.attempts
+            self.ability, self.ability_info, self.attempts = ability, info, attempts
+
+        size = len(self.difficulty)
+        new_size = self._capacity(size, len(self.questions))
+        if new_size != size:
+            grow = new_size - size
+            self.difficulty = np.concatenate([self.difficulty, np.zeros(grow)])
+            self.difficulty_mean = np.concatenate([self.difficulty_mean, np.zeros(grow)])
+            self.difficulty_info = np.concatenate([self.difficulty_info, np.full(grow, self.prior)])
+
+    def encode(self, rows: Iterable[AttemptRow]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Index arrays (user, topic, question) and outcomes for a batch of attempts"""
+        users, topics, questions = self.users, self.topics, self.questions
+        new_questions = []
+        u, t, q, y = [], [], [], []
+        for user_id, topic, difficulty, question_id, is_correct in rows:
+            u.append(users.setdefault(user_id, len(users)))
+            t.append(topics.setdefault(topic, len(topics)))
+            key = (topic, difficulty, question_id)
+            index = questions.get(key)
+            if index is None:
+                index = questions[key] = len(questions)
+                new_questions.append((index, DIFFICULTY_PRIOR.get(difficulty, 0.0)))
+            q.append(index)
+            y.append(is_correct)
+
+        self._reserve()
+        for index, value in new_questions:
+            self.difficulty[index] = self.difficulty_mean[index] = value
+
+        return (
+            np.asarray(u, dtype=np.int64),
+            np.asarray(t, dtype=np.int64),
+            np.asarray(q, dtype=np.int64),
+            np.asarray(y, dtype=np.float64),
+        )
+
+    def _cells(self, u: np.ndarray, t: np.ndarray) -> np.ndarray:
+        return u * self.ability.shape[1] + t
+
+    def fit(self, u: np.ndarray, t: np.ndarray, q: np.ndarray, y: np.ndarray,
+            iterations: int = MASTERY_FIT_ITERATIONS):
+        """Batch MAP fit over every attempt
+
+        Alternates one diagonal Newton step for all abilities with one for all
+        difficulties; each step is a handful of array passes (bincount), so a
+        few million attempts fit in seconds on one core.
+        """
+        cells = self._cells(u, t)
+        theta = self.ability.reshape(-1)
+        size, n_questions = theta.size, self.difficulty.size
+        prior = self.prior
+
+        for _ in range(iterations):
+            p = _sigmoid(theta[cells] - self.difficulty[q])
+            info = np.bincount(cells, p * (1 - p), size) + prior
+            theta += (np.bincount(cells, y - p, size) - prior * theta) / info
+
+            p = _sigmoid(theta[cells] - self.difficulty[q])
+            difficulty_info = np.bincount(q, p * (1 - p), n_questions) + prior
+            self.difficulty -= (
+                np.bincount(q, y - p, n_questions) + prior * (self.difficulty - self.difficulty_mean)
+            ) / difficulty_info
+
+        p = _sigmoid(theta[cells] - self.difficulty[q])
+        w = p * (1 - p)
+        self.ability_info = (np.bincount(cells, w, size) + prior).reshape(self.ability.shape)
+        self.difficulty_info = np.bincount(q, w, n_questions) + prior
+        self.attempts = np.bincount(cells, minlength=size).reshape(self.ability.shape)
+
+    def update(self, rows: Iterable[AttemptRow]):
+        """Online update for newly saved attempts (Elo-style)
+
+        One Newton step per touched ability and difficulty: the summed residual
+        divided by the information including this batch, so established users
+        and questions move less than new ones.
+        """
+        u, t, q, y = self.encode(rows)
+        if not len(y):
+            return
+        cells = self._cells(u, t)
+        theta = self.ability.reshape(-1)
+        info = self.ability_info.reshape(-1)
+
+        p = _sigmoid(theta[cells] - self.difficulty[q])
+        residual, w = y - p, p * (1 - p)
+
+        touched, inverse = np.unique(cells, return_inverse=True)
+        info[touched] += np.bincount(inverse, w)
+        theta[touched] += np.bincount(inverse, residual) / info[touched]
+        self.attempts.reshape(-1)[touched] += np.bincount(inverse)
+
+        touched, inverse = np.unique(q, return_inverse=True)
+        self.difficulty_info[touched] += np.bincount(inverse, w)
+        self.difficulty[touched] -= np.bincount(inverse, residual) / self.difficulty_info[touched]
+
+    def topic_mastery(self, user_id: str) -> Dict[str, Dict]:
+        """Per-topic ability for a user; ``mastery`` is P(correct) on a medium question"""
+        row = self.users.get(user_id)
+        if row is None:
+            return {}
+        abilities = self.ability[row]
+        attempts = self.attempts[row]
+        mastery = _sigmoid(abilities)
+        return {
+            topic: {
+                "ability": float(abilities[col]),
+                "mastery": float(mastery[col]),
+                "attempts": int(attempts[col]),
+            }
+            for topic, col in self.topics.items()
+            if attempts[col] > 0
+        }
+
+
+def topic_labels(
+    mastery: Dict[str, Dict],
+    min_attempts: int = MASTERY_MIN_ATTEMPTS,
+    weak_threshold: float = MASTERY_WEAK_THRESHOLD,
+    strong_threshold: float = MASTERY_STRONG_THRESHOLD,
+) -> Tuple[List[str], List[str]]:
+    """(weak, strong) topics from ``topic_mastery``, weakest / strongest first"""
+    ranked = sorted(
+        (data["mastery"], topic) for topic, data in mastery.items() if data["attempts"] >= min_attempts
+    )
+    weak = [topic for value, topic in ranked if value < weak_threshold]
+    strong = [topic for value, topic in reversed(ranked) if value >= strong_threshold]
+    return weak, strong
+
+
+class MasteryService:
+    """Process-level mastery model, refit from question_attempts in the background
+
+    Saves feed ``record``, an incremental update, so the worker that handled a
+    save reflects it immediately. The periodic refit pages through the whole
+    attempts table and fits a fresh model off the event loop; attempts recorded
+    while it runs are replayed onto the new model. Reads never wait for a refit.
+    """
+
+    def __init__(
+        self,
+        refit_seconds: float = MASTERY_REFIT_SECONDS,
+        page_size: int = MASTERY_PAGE_SIZE,
+        iterations: int = MASTERY_FIT_ITERATIONS,
+    ):
+        self.refit_seconds = refit_seconds
+        self.page_size = page_size
+        self.iterations = iterations
+        self.model = MasteryModel()
+        self._task: Optional[asyncio.Task] = None
+        self._pending: Optional[List[List[AttemptRow]]] = None
+
+        self.records = 0
+        self.refits = 0
+        self.refit_errors = 0
+        self.fitted_attempts = 0
+        self.last_load_ms = 0.0
+        self.last_fit_ms = 0.0
+
+    def record(self, user_id: str, attempts: Iterable[Attempt]):
+        """Apply one saved session's attempts"""
+        rows = [(user_id, *attempt) for attempt in attempts]
+        if not rows:
+            return
+        self.model.update(rows)
+        if self._pending is not None:
+            self._pending.append(rows)
+        self.records += 1
+
+    async def _load(self, model: MasteryModel) -> Tuple[np.ndarray, ...]:
+        """Encode every attempt into ``model``, paging through the primary key"""
+        db = AsyncDatabase.get_client()
+        chunks = []
+        last_id = None
+        while True:
+            query = db.table("question_attempts").select("id,user_id,topic,difficulty,question_id,is_correct")
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            result = await query.order("id").limit(self.page_size).execute()
+            rows = result.data or []
+            if rows:
+                chunks.append(model.encode(
+                    (row["user_id"], row["topic"], row["difficulty"], row["question_id"], row["is_correct"])
+                    for row in rows
+                ))
+            if len(rows) < self.page_size:
+                break
+            last_id = rows[-1]["id"]
+
+        if not chunks:
+            return model.encode([])
+        return tuple(np.concatenate(parts) for parts in zip(*chunks))
+
+    async def refit(self):
+        """Fit a new model over the whole attempts table and swap it in"""
+        self._pending = []
+        model = MasteryModel(self.model.prior)
+        try:
+            start = time.perf_counter()
+            arrays = await self._load(model)
+            loaded = time.perf_counter()
+            await asyncio.to_thread(model.fit, *arrays, self.iterations)
+            fitted = time.perf_counter()
+        except Exception as e:
+            self._pending = None
+            self.refit_errors += 1
+            print(f"Error refitting mastery model: {e}")
+            return
+
+        for rows in self._pending:
+            model.update(rows)
+        self._pending = None
+
+        self.model = model
+        self.refits += 1
+        self.fitted_attempts = len(arrays[-1])
+        self.last_load_ms = (loaded - start) * 1000
+        self.last_fit_ms = (fitted - loaded) * 1000
+
+    def topic_mastery(self, user_id: str) -> Dict[str, Dict]:
+        return self.model.topic_mastery(user_id)
+
+    async def _run(self):
+        while True:
+            await self.refit()
+            await asyncio.sleep(self.refit_seconds)
+
+    def start(self):
+        """Start the background refit loop (called from the app lifespan)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict:
+        return {
+            "users": len(self.model.users),
+            "topics": len(self.model.topics),
+            "questions": len(self.model.questions),
+            "records": self.records,
+            "refits": self.refits,
+            "refit_errors": self.refit_errors,
+            "fitted_attempts": self.fitted_attempts,
+            "last_load_ms": round(self.last_load_ms, 2),
+            "last_fit_ms": round(self.last_fit_ms, 2),
+        }
+
+
+# Shared mastery model for the API and the agent
+mastery = MasteryService()
@@ -0,0 +1,199 @@
+"""
+Static question bank - the curated questions.json / questions.ts files shipped with the games
+Loaded once per process and indexed by topic and difficulty
+"""
+
+import json
+import os
+import random
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+from src.config import QUESTION_BANK_DIR
+from src.models.schemas import Question
+
+BANK_FILES = ("questions.json", "questions.ts")
+SKIP_DIRS = {"node_modules", ".next", ".git"}
+
+DEFAULT_TOPIC = "General"
+DEFAULT_DIFFICULTY = "medium"
+
+_IDENTIFIER = re.compile(r"[A-Za-z_$][\w$]*")
+
+
+def _ts_literal_to_json(source: str) -> str:
+    """Rewrite the array literal in a questions.ts file as JSON
+
+    Handles what the game banks use: single- or double-quoted strings, bare
+    keys, // and /* */ comments and trailing commas.
+    """
+    start = source.index("[", source.index("="))
+    out = []
+    i, n = start, len(source)
+    depth = 0
+    while i < n:
+        char = source[i]
+        if char in "'\"`":
+            end = i + 1
+            value = []
+            while source[end] != char:
+                if source[end] == "\\":
+                    end += 1
+                    value.append({"n": "\n", "t": "\t"}.get(source[end], source[end]))
+                else:
+                    value.append(source[end])
+                end += 1
+            out.append(json.dumps("".join(value)))
+            i = end + 1
+            continue
+        if source.startswith("//", i):
+            i = source.find("\n", i)
+            i = n if i == -1 else i
+            continue
+        if source.startswith("/*", i):
+            i = source.index("*/", i) + 2
+            continue
+        match = _IDENTIFIER.match(source, i)
+        if match:
+            word = match.group()
+            rest = source[match.end():].lstrip()
+            out.append(json.dumps(word) if rest.startswith(":") else word)
+            i = match.end()
+            continue
+        if char in "]}":
+            # Drop a trailing comma before the closing bracket
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+        out.append(char)
+        if char in "[{":
+            depth += 1
+        elif char in "]}":
+            depth -= 1
+            if depth == 0:
+                break
+        i += 1
+    return "".join(out)
+
+
+def _read_bank(path: str) -> List[Dict]:
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    if path.endswith(".ts"):
+        data = json.loads(_ts_literal_to_json(source))
+    else:
+        data = json.loads(source)
+    return data.get("questions", []) if isinstance(data, dict) else data
+
+
+def _bank_paths(root: str) -> List[str]:
+    """Bank files under ``root``; .ts banks first since they carry topic and difficulty"""
+    paths = []
+    for directory, subdirs, files in os.walk(root):
+        subdirs[:] = sorted(d for d in subdirs if d not in SKIP_DIRS)
+        paths.extend(os.path.join(directory, name) for name in files if name in BANK_FILES)
+    return sorted(paths, key=lambda path: (not path.endswith(".ts"), path))
+
+
+class QuestionBank:
+    """Every distinct static question, with index lists per (topic, difficulty)
+
+    Questions are built into ``Question`` models once at load, and each index is
+    a plain list of positions, so a filtered sample is ``random.sample`` over
+    one list: O(limit) no matter how big the bank is. Topic filters are
+    case-insensitive. Ids are renumbered 1..N, since every file starts at 1.
+    """
+
+    def __init__(self, root: str = QUESTION_BANK_DIR):
+        self.root = root
+        self.questions: List[Question] = []
+        self._by_key: Dict[Tuple[Optional[str], Optional[str]], List[int]] = {}
+        self._topics: Dict[str, str] = {}
+        self._loaded = False
+
+        self.files = 0
+        self.load_ms = 0.0
+        self.samples = 0
+
+    def load(self):
+        """Read and index every bank file under ``root``; a bad file is skipped"""
+        start = time.perf_counter()
+        questions: List[Question] = []
+        seen = set()
+        files = 0
+        for path in _bank_paths(self.root):
+            try:
+                items = _read_bank(path)
+            except Exception as e:
+                print(f"Skipping question bank {path}: {e}")
+                continue
+            files += 1
+            for item in items:
+                text = " ".join(str(item.get("question", "")).split())
+                if not text or text.lower() in seen:
+                    continue
+                seen.add(text.lower())
+                questions.append(Question(
+                    id=len(questions) + 1,
+                    question=text,
+                    options=item.get("options", []),
+                    correctAnswer=item.get("correctAnswer", item.get("answer", 0)),
+                    topic=item.get("topic") or DEFAULT_TOPIC,
+                    difficulty=item.get("difficulty") or DEFAULT_DIFFICULTY,
+                    explanation=item.get("explanation", ""),
+                ))
+
+        if files == 0:
+            print(f"No question bank files ({', '.join(BANK_FILES)}) found under {self.root}; "
+                  "GET /api/questions/ will return no static questions (set QUESTION_BANK_DIR "
+                  "or run sync_question_bank.sh)")
+        self._index(questions)
+        self.files = files
+        self.load_ms = (time.perf_counter() - start) * 1000
+        self._loaded = True
+
+    def _index(self, questions: List[Question]):
+        by_key: Dict[Tuple[Optional[str], Optional[str]], List[int]] = {}
+        topics: Dict[str, str] = {}
+        for position, question in enumerate(questions):
+            topic, difficulty = question.topic.lower(), question.difficulty.lower()
+            topics.setdefault(topic, question.topic)
+            for key in ((None, None), (topic, None), (None, difficulty), (topic, difficulty)):
+                by_key.setdefault(key, []).append(position)
+        self.questions, self._by_key, self._topics = questions, by_key, topics
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def sample(self, topic: Optional[str] = None, difficulty: Optional[str] = None, limit: int = 10) -> List[Question]:
+        """Up to ``limit`` random questions matching the filters"""
+        self._ensure_loaded()
+        self.samples += 1
+        positions = self._by_key.get((topic.lower() if topic else None, difficulty.lower() if difficulty else None))
+        if not positions:
+            return []
+        return [self.questions[p] for p in random.sample(positions, min(limit, len(positions)))]
+
+    def all(self) -> List[Question]:
+        self._ensure_loaded()
+        return self.questions
+
+    def topics(self) -> List[str]:
+        self._ensure_loaded()
+        return sorted(self._topics.values())
+
+    def stats(self) -> Dict:
+        return {
+            "questions": len(self.questions),
+            "topics": len(self._topics),
+            "files": self.files,
+            "load_ms": round(self.load_ms, 2),
+            "samples": self.samples,
+        }
+
+
+# Shared bank for the API and the agent fallback
+question_bank = QuestionBank()
@@ -0,0 +1,253 @@
+"""
+Near-duplicate index over question text - MinHash signatures with LSH banding
+Covers the static bank and every agent-generated question, so repeats can be dropped
+"""
+
+import re
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src.config import (
+    QUESTION_DEDUP_ENABLED, QUESTION_DUPLICATE_THRESHOLD, QUESTION_HISTORY_THRESHOLD, QUESTION_HISTORY_SIZE,
+    QUESTION_HISTORY_USERS, QUESTION_HISTORY_TTL_SECONDS,
+)
+from src.services.question_bank import question_bank
+from src.utils.cache import TTLCache
+
+NUM_PERM = 32
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+# Character shingle length, in bytes of normalized text
+SHINGLE = 5
+# Questions hashed per NumPy batch when bulk-indexing
+BATCH = 2000
+# Newest entries checked per matching band; a band shared by thousands of
+# questions (common template wording) would otherwise make lookups O(n)
+BUCKET_CAP = 64
+# Band keys buffered in a dict before being merged into the sorted arrays
+MERGE_EVERY = 4096
+
+_rng = np.random.default_rng(0x5A7)
+# Multiply-shift hash functions: the high 32 bits of (a * x + b) mod 2**64, a odd
+_A = _rng.integers(0, 1 << 63, (NUM_PERM, 1), dtype=np.uint64) << np.uint64(1) | np.uint64(1)
+_B = _rng.integers(0, 1 << 63, (NUM_PERM, 1), dtype=np.uint64)
+# Odd multipliers folding a band's rows into one key (distinct per band, wrapping)
+_BAND_MULT = (_rng.integers(0, 1 << 62, (BANDS, ROWS), dtype=np.uint64) << np.uint64(1)) | np.uint64(1)
+
+_NON_TEXT = re.compile(r"[^a-z0-9+\-*/=<>^%. ]+|\.(?!\d)")
+_OPERATOR_SPACE = re.compile(r" ?([+\-*/=<>^%]) ?")
+
+
+def normalize_question(text: str) -> str:
+    """Lowercase, keep letters, digits, decimals and math symbols, collapse whitespace
+
+    Spacing around operators is dropped so "2x + 5" and "2x+5" shingle alike.
+    """
+    text = " ".join(_NON_TEXT.sub(" ", str(text).lower()).split())
+    return _OPERATOR_SPACE.sub(r"\1", text)
+
+
+def signatures(texts: List[str]) -> np.ndarray:
+    """MinHash signatures (len(texts) x NUM_PERM, uint32) of the normalized texts
+
+    Shingles are the SHINGLE-byte windows of each text, packed into an integer
+    and hashed with NUM_PERM multiply-shift functions; all windows of a batch
+    are hashed together and reduced per text with ``minimum.reduceat``.
+    """
+    out = np.empty((len(texts), NUM_PERM), dtype=np.uint32)
+    for start in range(0, len(texts), BATCH):
+        encoded = [normalize_question(text).encode().ljust(SHINGLE) for text in texts[start:start + BATCH]]
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+        lengths = np.array([len(e) for e in encoded])
+        starts = np.cumsum(lengths) - lengths
+
+        windows = np.lib.stride_tricks.sliding_window_view(data, SHINGLE)
+        packed = np.zeros(len(windows), dtype=np.uint64)
+        for j in range(SHINGLE):
+            packed |= windows[:, j] << np.uint64(8 * j)
+        # Keep only windows that don't cross into the next text
+        counts = lengths - SHINGLE + 1
+        offsets = np.cumsum(counts) - counts
+        valid = np.repeat(starts - offsets, counts) + np.arange(counts.sum())
+        hashed = (_A * packed[valid] + _B) >> np.uint64(32)
+        out[start:start + len(encoded)] = np.minimum.reduceat(hashed, offsets, axis=1).T
+    return out
+
+
+def band_keys(sigs: np.ndarray) -> np.ndarray:
+    """One uint64 key per band (n x BANDS); equal keys mean equal band rows (up to collisions)"""
+    rows = sigs.reshape(len(sigs), BANDS, ROWS).astype(np.uint64)
+    return (rows * _BAND_MULT).sum(axis=2, dtype=np.uint64)
+
+
+def similarity(sigs: np.ndarray, sig: np.ndarray) -> np.ndarray:
+    """Estimated Jaccard similarity of each row of ``sigs`` to ``sig``"""
+    return (sigs == sig).mean(axis=1)
+
+
+class MinHashIndex:
+    """LSH index of MinHash signatures
+
+    Signatures live in one array grown by doubling. Band keys are kept in a
+    single sorted array (with the matching entry ids), so finding candidates
+    is one ``searchsorted`` for all bands; new keys wait in a small dict and
+    are merged in every MERGE_EVERY keys. Only the newest BUCKET_CAP entries
+    of each matching band are candidates, which bounds a lookup at
+    BANDS * BUCKET_CAP signature comparisons however large the index grows;
+    a true near-duplicate matches on most bands, so it is rarely missed.
+    Candidates are confirmed by comparing full signatures. About 220 bytes
+    per entry.
+    """
+
+    def __init__(self):
+        self._sigs = np.empty((0, NUM_PERM), dtype=np.uint32)
+        self.size = 0
+        self._keys = np.empty(0, dtype=np.uint64)
+        self._ids = np.empty(0, dtype=np.int32)
+        self._pending: Dict[int, List[int]] = {}
+        self._pending_count = 0
+
+    def add(self, sigs: np.ndarray):
+        needed = self.size + len(sigs)
+        if needed > len(self._sigs):
+            grown = np.empty((max(needed, 2 * len(self._sigs), 1024), NUM_PERM), dtype=np.uint32)
+            grown[:self.size] = self._sigs[:self.size]
+            self._sigs = grown
+        self._sigs[self.size:needed] = sigs
+        ids = np.arange(self.size, needed, dtype=np.int32)
+        self.size = needed
+
+        keys = band_keys(sigs)
+        if len(sigs) >= MERGE_EVERY:
+            self._merge(keys.ravel(), np.repeat(ids, BANDS))
+            return
+        for entry, row in zip(ids.tolist(), keys.tolist()):
+            for key in row:
+                self._pending.setdefault(key, []).append(entry)
+        self._pending_count += len(sigs) * BANDS
+        if self._pending_count >= MERGE_EVERY:
+            self._flush()
+
+    def _flush(self):
+        keys = [key for key, entries in self._pending.items() for _ in entries]
+        ids = [entry for entries in self._pending.values() for entry in entries]
+        self._pending, self._pending_count = {}, 0
+        self._merge(np.array(keys, dtype=np.uint64), np.array(ids, dtype=np.int32))
+
+    def _merge(self, keys: np.ndarray, ids: np.ndarray):
+        order = np.argsort(keys, kind="stable")
+        keys, ids = keys[order], ids[order]
+        # Equal keys stay in insertion order, so a bucket's newest entries are at its end
+        positions = np.searchsorted(self._keys, keys, side="right")
+        self._keys = np.insert(self._keys, positions, keys)
+        self._ids = np.insert(self._ids, positions, ids)
+
+    def best_match(self, sig: np.ndarray) -> float:
+        """Highest estimated similarity to any indexed signature sharing a band (0.0 if none)"""
+        keys = band_keys(sig[None, :])[0]
+        lo = np.searchsorted(self._keys, keys, side="left")
+        hi = np.searchsorted(self._keys, keys, side="right")
+        candidates = [self._ids[max(l, h - BUCKET_CAP):h] for l, h in zip(lo.tolist(), hi.tolist()) if h > l]
+        if self._pending:
+            pending = [self._pending.get(key) for key in keys.tolist()]
+            candidates.extend(np.array(entries[-BUCKET_CAP:], dtype=np.int32) for entries in pending if entries)
+        if not candidates:
+            return 0.0
+        ids = np.unique(np.concatenate(candidates))
+        return float(similarity(self._sigs[ids], sig).max())
+
+
+class QuestionIndex:
+    """Near-duplicate checks for questions against everything indexed and a user's recent history
+
+    A question is a duplicate if its estimated Jaccard similarity (character
+    shingles of the normalized text) to an indexed question reaches
+    ``threshold``, or to one recently generated for the same user reaches
+    the lower ``history_threshold``, which also catches the same template
+    with different numbers. History keeps each user's last ``history_size``
+    signatures. The static bank is indexed on first use (or by ``load`` at
+    startup), so it is covered without the app lifespan too.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = QUESTION_DEDUP_ENABLED,
+        threshold: float = QUESTION_DUPLICATE_THRESHOLD,
+        history_threshold: float = QUESTION_HISTORY_THRESHOLD,
+        history_size: int = QUESTION_HISTORY_SIZE,
+    ):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.history_threshold = history_threshold
+        self.history_size = history_size
+        self.index = MinHashIndex()
+        self.history = TTLCache(max_size=QUESTION_HISTORY_USERS, ttl=QUESTION_HISTORY_TTL_SECONDS)
+        self._bank_indexed = False
+
+        self.checked = 0
+        self.duplicates = 0
+        self.history_duplicates = 0
+        self._check_ms = 0.0
+
+    def load(self):
+        """Index the static bank (once)"""
+        if not self._bank_indexed:
+            self._bank_indexed = True
+            self.add(question.question for question in question_bank.all())
+
+    def add(self, texts: Iterable[str]):
+        """Index questions without checking them (bank and stored pool questions)"""
+        texts = [text for text in texts if text]
+        if texts:
+            self.index.add(signatures(texts))
+
+    def filter_new(self, questions: List[Dict], user_id: Optional[str] = None) -> Tuple[List[Dict], List[Dict]]:
+        """Split agent questions into (fresh, duplicates)
+
+        Fresh questions are indexed and added to the user's history as they
+        are accepted, so repeats within the same batch count as duplicates too.
+        With dedup turned off every question is fresh.
+        """
+        if not questions or not self.enabled:
+            return list(questions), []
+        self.load()
+        start = time.perf_counter()
+        sigs = signatures([str(q.get("question", "")) for q in questions])
+        history = self.history.get(user_id) if user_id else None
+        fresh, duplicates, accepted = [], [], []
+        for question, sig in zip(questions, sigs):
+            if self.index.best_match(sig) >= self.threshold:
+                self.duplicates += 1
+                duplicates.append(question)
+                continue
+            if history is not None and len(history) and similarity(history, sig).max() >= self.history_threshold:
+                self.history_duplicates += 1
+                duplicates.append(question)
+                continue
+            self.index.add(sig[None, :])
+            fresh.append(question)
+            accepted.append(sig)
+
+        if user_id and accepted:
+            recent = np.stack(accepted) if history is None else np.concatenate([history, np.stack(accepted)])
+            self.history.set(user_id, recent[-self.history_size:])
+        self.checked += len(questions)
+        self._check_ms += (time.perf_counter() - start) * 1000
+        return fresh, duplicates
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "questions": self.index.size,
+            "checked": self.checked,
+            "duplicates": self.duplicates,
+            "history_duplicates": self.history_duplicates,
+            "avg_check_us": round(self._check_ms * 1000 / self.checked, 1) if self.checked else 0.0,
+            "history_users": len(self.history),
+        }
+
+
+# Shared index; stored pool questions are added when the pool loads
+question_index = QuestionIndex()
@@ -0,0 +1,271 @@
+"""
+Pool of pre-generated agent questions, keyed by (topic, difficulty)
+Requests draw unseen questions from memory; a background worker tops the pools up
+"""
+
+import asyncio
+import random
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from src.config import (
+    QUESTION_POOL_LOW_WATER, QUESTION_POOL_BATCH_SIZE, QUESTION_POOL_MAX_PER_KEY,
+    QUESTION_POOL_REFILL_SECONDS, QUESTION_POOL_SEEN_CACHE_SIZE, QUESTION_POOL_SEEN_TTL_SECONDS,
+)
+from src.services.agent import generate_topic_questions
+from src.services.question_index import question_index
+from src.utils.cache import TTLCache
+from src.utils.database import AsyncDatabase
+
+Key = Tuple[str, str]
+
+POOL_COLUMNS = "id,topic,difficulty,question,options,correct_answer,explanation"
+LOAD_PAGE_SIZE = 1000
+# Recent questions from a pool shown to the model so a refill doesn't repeat them
+AVOID_SAMPLE = 20
+
+
+def pool_key(topic: str, difficulty: str) -> Key:
+    return topic.strip(), difficulty.strip().lower()
+
+
+def pool_row(question: Dict, topic: Optional[str] = None, difficulty: Optional[str] = None) -> Optional[Dict]:
+    """generated_questions row for an agent question, or None if it's malformed"""
+    options = question.get("options")
+    answer = question.get("correctAnswer", question.get("correct_answer", 0))
+    if not question.get("question") or not isinstance(options, list) or len(options) < 2:
+        return None
+    if not isinstance(answer, int) or not 0 <= answer < len(options):
+        return None
+    topic, difficulty = pool_key(
+        topic or question.get("topic") or "General",
+        difficulty or question.get("difficulty") or "medium",
+    )
+    return {
+        "topic": topic,
+        "difficulty": difficulty,
+        "question": str(question["question"]),
+        "options": [str(option) for option in options],
+        "correct_answer": answer,
+        "explanation": str(question.get("explanation", "")),
+    }
+
+
+class QuestionPool:
+    """Generated questions per (topic, difficulty), persisted in generated_questions
+
+    ``draw`` serves a user questions they haven't seen (user_seen_questions,
+    cached per user) and marks them seen. Any pool where that user has fewer
+    than ``low_water`` unseen questions left is queued for the refill worker,
+    which generates ``batch_size`` more per pool per round. Each pool keeps
+    its newest ``max_per_key`` questions in memory.
+    """
+
+    def __init__(
+        self,
+        low_water: int = QUESTION_POOL_LOW_WATER,
+        batch_size: int = QUESTION_POOL_BATCH_SIZE,
+        max_per_key: int = QUESTION_POOL_MAX_PER_KEY,
+        refill_seconds: float = QUESTION_POOL_REFILL_SECONDS,
+    ):
+        self.low_water = low_water
+        self.batch_size = batch_size
+        self.max_per_key = max_per_key
+        self.refill_seconds = refill_seconds
+        self.seen = TTLCache(max_size=QUESTION_POOL_SEEN_CACHE_SIZE, ttl=QUESTION_POOL_SEEN_TTL_SECONDS)
+        self._pools: Dict[Key, List[Dict]] = {}
+        self._wanted: Set[Key] = set()
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.draws = 0
+        self.served = 0
+        self.short_draws = 0
+        self.generated = 0
+        self.refills = 0
+        self.refill_errors = 0
+        self.last_refill_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def _add_rows(self, rows: Iterable[Dict]):
+        for row in rows:
+            pool = self._pools.setdefault(pool_key(row["topic"], row["difficulty"]), [])
+            pool.append(row)
+            if len(pool) > self.max_per_key:
+                del pool[:len(pool) - self.max_per_key]
+
+    async def load(self):
+        """Read every stored question, oldest first, so each pool keeps its newest
+
+        Every stored question also goes into the near-duplicate index, not
+        just the ones kept in memory.
+        """
+        db = AsyncDatabase.get_client()
+        last_id = None
+        while True:
+            query = db.table("generated_questions").select(POOL_COLUMNS)
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            result = await query.order("id").limit(LOAD_PAGE_SIZE).execute()
+            self._add_rows(result.data or [])
+            question_index.add(row["question"] for row in result.data or [])
+            if len(result.data or []) < LOAD_PAGE_SIZE:
+                break
+            last_id = result.data[-1]["id"]
+
+    async def _seen_ids(self, user_id: str) -> Set[int]:
+        """Every pooled question id the user has been served
+
+        Read in keyset pages on the (user_id, question_id) primary key: one
+        unpaged select would be cut off at PostgREST's max-rows (1000 on
+        Supabase) and serve heavy users questions they have already seen.
+        """
+        seen = self.seen.get(user_id)
+        if seen is None:
+            try:
+                db = AsyncDatabase.get_client()
+                seen = set()
+                last_id = None
+                while True:
+                    query = db.table("user_seen_questions").select("question_id").eq("user_id", user_id)
+                    if last_id is not None:
+                        query = query.gt("question_id", last_id)
+                    result = await query.order("question_id").limit(LOAD_PAGE_SIZE).execute()
+                    rows = result.data or []
+                    seen.update(row["question_id"] for row in rows)
+                    if len(rows) < LOAD_PAGE_SIZE:
+                        break
+                    last_id = rows[-1]["question_id"]
+            except Exception as e:
+                print(f"Error loading seen questions: {e}")
+                return set()
+            self.seen.set(user_id, seen)
+        return seen
+
+    async def mark_seen(self, user_id: str, rows: List[Dict]):
+        """Record that ``user_id`` was served these pooled questions"""
+        if not rows:
+            return
+        seen = await self._seen_ids(user_id)
+        seen.update(row["id"] for row in rows)
+        try:
+            db = AsyncDatabase.get_client()
+            await db.table("user_seen_questions").upsert(
+                [{"user_id": user_id, "question_id": row["id"]} for row in rows],
+                ignore_duplicates=True,
+            ).execute()
+        except Exception as e:
+            # The cached set still filters them on this worker
+            print(f"Error saving seen questions: {e}")
+
+    async def draw(self, user_id: str, plan: List[Tuple[str, str, int]]) -> List[Dict]:
+        """Unseen questions for each (topic, difficulty, count) in ``plan``
+
+        Returns fewer than asked for when pools run short; those pools are
+        queued for refill.
+        """
+        seen = await self._seen_ids(user_id)
+        picked = []
+        asked = 0
+        for topic, difficulty, count in plan:
+            key = pool_key(topic, difficulty)
+            unseen = [row for row in self._pools.setdefault(key, []) if row["id"] not in seen]
+            taken = random.sample(unseen, min(count, len(unseen)))
+            picked.extend(taken)
+            asked += count
+            if len(unseen) - len(taken) < self.low_water:
+                self._wanted.add(key)
+
+        if self._wanted and self._wake is not None:
+            self._wake.set()
+        self.draws += 1
+        self.served += len(picked)
+        if len(picked) < asked:
+            self.short_draws += 1
+        await self.mark_seen(user_id, picked)
+        return picked
+
+    async def add(self, questions: List[Dict], topic: Optional[str] = None, difficulty: Optional[str] = None) -> List[Dict]:
+        """Store generated questions and add them to their pools; returns the stored rows"""
+        rows = [row for row in (pool_row(q, topic, difficulty) for q in questions) if row is not None]
+        if not rows:
+            return []
+        db = AsyncDatabase.get_client()
+        result = await db.table("generated_questions").insert(rows).execute()
+        self._add_rows(result.data)
+        self.generated += len(result.data)
+        return result.data
+
+    async def refill(self):
+        """Generate one batch for every pool queued since the last round"""
+        start = time.perf_counter()
+        for key in (self._pools.keys() - self._wanted):
+            if len(self._pools[key]) < self.low_water:
+                self._wanted.add(key)
+        wanted, self._wanted = self._wanted, set()
+
+        for topic, difficulty in wanted:
+            recent = self._pools.get((topic, difficulty), [])[-AVOID_SAMPLE:]
+            try:
+                questions = await generate_topic_questions(
+                    topic, difficulty, self.batch_size, avoid=[row["question"] for row in recent]
+                )
+                await self.add(questions, topic, difficulty)
+            except Exception as e:
+                self.refill_errors += 1
+                print(f"Error refilling question pool {topic}/{difficulty}: {e}")
+
+        if wanted:
+            self.refills += 1
+            self.last_refill_ms = (time.perf_counter() - start) * 1000
+
+    async def _run(self):
+        try:
+            await self.load()
+        except Exception as e:
+            print(f"Error loading question pool: {e}")
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.refill_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.refill()
+
+    def start(self):
+        """Load the pools and start the refill worker (called from the app lifespan)"""
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict:
+        return {
+            "running": self.running,
+            "pools": len(self._pools),
+            "questions": sum(len(pool) for pool in self._pools.values()),
+            "queued_refills": len(self._wanted),
+            "draws": self.draws,
+            "served": self.served,
+            "short_draws": self.short_draws,
+            "generated": self.generated,
+            "refills": self.refills,
+            "refill_errors": self.refill_errors,
+            "last_refill_ms": round(self.last_refill_ms, 2),
+            "seen_cache": self.seen.stats(),
+        }
+
+
+# Shared pool; only started when QUESTION_POOL_ENABLED is set
+question_pool = QuestionPool()
@@ -0,0 +1,67 @@
+"""
+Single-flight request coalescing - concurrent identical calls share one in-flight result
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from src.config import AGENT_COALESCE_WINDOW_SECONDS, AGENT_COALESCE_CACHE_SIZE
+from src.utils.cache import TTLCache
+
+
+class SingleFlight:
+    """Runs ``handler`` once per key while it is in flight, then reuses the result briefly
+
+    A call for a key that is already running awaits the same task instead of
+    starting another, and a successful result is kept for ``window`` seconds
+    so a duplicate arriving just after it finished costs nothing either. The
+    work runs as its own task, so the caller that started it disconnecting
+    doesn't cancel it for the others. Failures are shared with every waiter
+    but never kept.
+    """
+
+    def __init__(self, window: float = AGENT_COALESCE_WINDOW_SECONDS, max_size: int = AGENT_COALESCE_CACHE_SIZE):
+        self.window = window
+        self.results = TTLCache(max_size=max_size, ttl=window)
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+        self.calls = 0
+        self.coalesced = 0
+        self.reused = 0
+
+    async def run(self, key: Hashable, handler: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        if self.window > 0 and key in self.results:
+            self.reused += 1
+            return self.results.get(key)
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.create_task(handler())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        if self.window > 0:
+            self.results.set(key, task.result())
+
+    def stats(self) -> Dict:
+        return {
+            "window_seconds": self.window,
+            "inflight": len(self._inflight),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "reused": self.reused,
+            "results": len(self.results),
+        }
+
+
+# Shared by GET /api/questions/?use_agent=true, keyed by (user, query parameters)
+agent_question_flights = SingleFlight()
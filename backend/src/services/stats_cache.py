@@ -0,0 +1,54 @@
+"""
+Per-user cache of user_stats rows for /api/stats/user
+Saves refresh the cached row in place from the stats the save RPC returns
+"""
+
+import itertools
+from typing import Dict, Optional
+
+from src.config import STATS_CACHE_SIZE, STATS_CACHE_TTL_SECONDS
+from src.models.schemas import UserStatsResponse
+from src.utils.cache import TTLCache, approx_sizeof
+
+user_stats_cache = TTLCache(
+    max_size=STATS_CACHE_SIZE,
+    ttl=STATS_CACHE_TTL_SECONDS,
+    sizeof=approx_sizeof,
+)
+
+# Per-user data version for ETags, bumped by every save. Numbers come from one
+# process-wide sequence, so a user evicted and seen again never reuses an old one.
+user_versions = TTLCache(max_size=STATS_CACHE_SIZE)
+_version_seq = itertools.count(1)
+
+
+def get_cached_user_stats(user_id: str) -> Optional[Dict]:
+    """Cached stats for a user, or None on a miss"""
+    return user_stats_cache.get(str(user_id))
+
+
+def store_user_stats(user_id: str, row: Optional[Dict]):
+    """Cache a user_stats row (as returned by a select or a save RPC)"""
+    if not row:
+        return
+    user_stats_cache.set(str(user_id), UserStatsResponse(**row).model_dump())
+
+
+def invalidate_user_stats(user_id: str):
+    """Drop a user's cached stats, e.g. after a write that didn't return them"""
+    user_stats_cache.pop(str(user_id))
+    bump_user_version(user_id)
+
+
+def get_user_version(user_id: str) -> int:
+    """Current data version for a user (assigned on first use)"""
+    version = user_versions.get(str(user_id))
+    if version is None:
+        version = next(_version_seq)
+        user_versions.set(str(user_id), version)
+    return version
+
+
+def bump_user_version(user_id: str):
+    """Mark a user's stats/sessions as changed so their ETags stop matching"""
+    user_versions.set(str(user_id), next(_version_seq))
@@ -3,29 +3,34 @@ Supabase client for AI agent integration
 Provides high-level operations for the learning agent
 """
 
-from supabase import Client
+from postgrest import AsyncPostgrestClient
 from typing import List, Dict, Optional
-from datetime import datetime
-from src.utils.database import Database
+from src.utils.database import AsyncDatabase
+from src.services.stats_cache import get_cached_user_stats, store_user_stats, invalidate_user_stats, bump_user_version
+from src.services.mastery import mastery
 
 class SupabaseAgentOps:
     """Supabase operations for the AI learning agent"""
     
     @staticmethod
-    def _get_client() -> Client:
-        """Get Supabase client"""
-        return Database.get_client()
+    def _get_client() -> AsyncPostgrestClient:
+        """Get the shared async Supabase data client"""
+        return AsyncDatabase.get_client()
     
     @staticmethod
-    def get_user_performance(user_id: str) -> Dict:
+    async def get_user_performance(user_id: str) -> Dict:
         """Get user performance stats from Supabase"""
         try:
-            supabase = SupabaseAgentOps._get_client()
-            # Get user stats
-            stats_response = supabase.table('user_stats').select('*').eq('user_id', user_id).execute()
-            
-            if stats_response.data and len(stats_response.data) > 0:
-                stats = stats_response.data[0]
+            # Shares the /api/stats/user cache
+            stats = get_cached_user_stats(user_id)
+            if stats is None:
+                supabase = SupabaseAgentOps._get_client()
+                stats_response = await supabase.table('user_stats').select('*').eq('user_id', user_id).execute()
+                if stats_response.data:
+                    stats = stats_response.data[0]
+                    store_user_stats(user_id, stats)
+            
+            if stats:
                 return {
                     "total_attempts": stats.get('total_questions_answered', 0),
                     "correct_answers": stats.get('total_correct', 0),
@@ -42,40 +47,32 @@ class SupabaseAgentOps:
             return {"total_attempts": 0, "weak_topics": [], "strong_topics": []}
     
     @staticmethod
-    def get_topic_performance(user_id: str) -> Dict[str, Dict]:
-        """Get performance breakdown by topic"""
+    async def get_topic_performance(user_id: str) -> Dict[str, Dict]:
+        """Get performance breakdown by topic
+        
+        Reads the running totals in user_topic_stats (one row per topic)
+        instead of folding every question attempt.
+        """
         try:
             supabase = SupabaseAgentOps._get_client()
-            # Get all question attempts for user
-            response = supabase.table('question_attempts').select(
-                'topic, is_correct, time_spent'
+            response = await supabase.table('user_topic_stats').select(
+                'topic, total, correct, total_time'
             ).eq('user_id', user_id).execute()
             
             if not response.data:
                 return {}
             
-            # Aggregate by topic
             topic_stats = {}
-            for attempt in response.data:
-                topic = attempt['topic']
-                if topic not in topic_stats:
-                    topic_stats[topic] = {
-                        'total': 0,
-                        'correct': 0,
-                        'total_time': 0
-                    }
-                
-                topic_stats[topic]['total'] += 1
-                if attempt['is_correct']:
-                    topic_stats[topic]['correct'] += 1
-                topic_stats[topic]['total_time'] += attempt.get('time_spent', 0)
-            
-            # Calculate percentages
-            for topic in topic_stats:
-                stats = topic_stats[topic]
-                stats['accuracy'] = (stats['correct'] / stats['total'] * 100) if stats['total'] > 0 else 0
-                stats['avg_time'] = stats['total_time'] / stats['total'] if stats['total'] > 0 else 0
-                stats['attempts'] = stats['total']
+            for row in response.data:
+                total = row['total']
+                topic_stats[row['topic']] = {
+                    'total': total,
+                    'correct': row['correct'],
+                    'total_time': row['total_time'],
+                    'accuracy': (row['correct'] / total * 100) if total > 0 else 0,
+                    'avg_time': row['total_time'] / total if total > 0 else 0,
+                    'attempts': total,
+                }
             
             return topic_stats
             
@@ -84,7 +81,7 @@ class SupabaseAgentOps:
             return {}
     
     @staticmethod
-    def save_game_session(user_id: str, game_data: Dict) -> Optional[str]:
+    async def save_game_session(user_id: str, game_data: Dict) -> Optional[str]:
         """Save a game session to Supabase"""
         try:
             supabase = SupabaseAgentOps._get_client()
@@ -99,7 +96,7 @@ class SupabaseAgentOps:
                 'average_response_time': game_data.get('avg_response_time', 0),
             }
             
-            response = supabase.table('game_sessions').insert(session_data).execute()
+            response = await supabase.table('game_sessions').insert(session_data).execute()
             
             if response.data and len(response.data) > 0:
                 return response.data[0]['id']
@@ -111,8 +108,12 @@ class SupabaseAgentOps:
             return None
     
     @staticmethod
-    def save_question_attempts(session_id: str, user_id: str, attempts: List[Dict]) -> bool:
-        """Save question attempts to Supabase"""
+    async def save_question_attempts(session_id: str, user_id: str, attempts: List[Dict]) -> bool:
+        """Save question attempts to Supabase
+        
+        One RPC to save_question_attempts (database/schema.sql) inserts the
+        attempts and updates the user's topic totals in a single transaction.
+        """
         if not session_id:
             return False
         
@@ -121,7 +122,6 @@ class SupabaseAgentOps:
             attempt_data = []
             for attempt in attempts:
                 attempt_data.append({
-                    'session_id': session_id,
                     'question_id': attempt.get('question_id', 0),
                     'topic': attempt.get('topic', 'Unknown'),
                     'difficulty': attempt.get('difficulty', 'medium'),
@@ -130,7 +130,16 @@ class SupabaseAgentOps:
                 })
             
             if attempt_data:
-                supabase.table('question_attempts').insert(attempt_data).execute()
+                await supabase.rpc('save_question_attempts', {
+                    'p_session_id': session_id,
+                    'p_user_id': user_id,
+                    'p_attempts': attempt_data,
+                }).execute()
+                invalidate_user_stats(user_id)
+                mastery.record(user_id, (
+                    (row['topic'], row['difficulty'], row['question_id'], row['is_correct'])
+                    for row in attempt_data
+                ))
                 return True
             
             return False
@@ -140,54 +149,23 @@ class SupabaseAgentOps:
             return False
     
     @staticmethod
-    def update_user_stats(user_id: str, game_data: Dict) -> bool:
+    async def update_user_stats(user_id: str, game_data: Dict) -> bool:
         """Update user statistics in Supabase"""
         try:
             supabase = SupabaseAgentOps._get_client()
-            # Get current stats
-            response = supabase.table('user_stats').select('*').eq('user_id', user_id).execute()
-            
-            if response.data and len(response.data) > 0:
-                # Update existing stats
-                current = response.data[0]
-                
-                new_total_games = current['total_games_played'] + 1
-                new_total_score = current['total_score'] + game_data['score']
-                new_total_questions = current['total_questions_answered'] + game_data['correct_answers'] + game_data['wrong_answers']
-                new_total_correct = current['total_correct'] + game_data['correct_answers']
-                new_total_wrong = current['total_wrong'] + game_data['wrong_answers']
-                new_accuracy = new_total_correct / new_total_questions if new_total_questions > 0 else 0
-                
-                update_data = {
-                    'total_games_played': new_total_games,
-                    'total_score': new_total_score,
-                    'total_questions_answered': new_total_questions,
-                    'total_correct': new_total_correct,
-                    'total_wrong': new_total_wrong,
-                    'overall_accuracy': new_accuracy,
-                    'updated_at': datetime.utcnow().isoformat(),
-                }
-                
-                supabase.table('user_stats').update(update_data).eq('user_id', user_id).execute()
-            else:
-                # Create new stats
-                accuracy = game_data['correct_answers'] / (game_data['correct_answers'] + game_data['wrong_answers']) if (game_data['correct_answers'] + game_data['wrong_answers']) > 0 else 0
-                
-                insert_data = {
-                    'user_id': user_id,
-                    'total_games_played': 1,
-                    'total_score': game_data['score'],
-                    'total_questions_answered': game_data['correct_answers'] + game_data['wrong_answers'],
-                    'total_correct': game_data['correct_answers'],
-                    'total_wrong': game_data['wrong_answers'],
-                    'overall_accuracy': accuracy,
-                }
-                
-                supabase.table('user_stats').insert(insert_data).execute()
+            # Single atomic increment-or-insert (see increment_user_stats in database/schema.sql)
+            response = await supabase.rpc('increment_user_stats', {
+                'p_user_id': user_id,
+                'p_games': 1,
+                'p_score': game_data['score'],
+                'p_correct': game_data['correct_answers'],
+                'p_wrong': game_data['wrong_answers'],
+            }).execute()
+            store_user_stats(user_id, response.data)
+            bump_user_version(user_id)
             
             return True
             
         except Exception as e:
             print(f"Error updating user stats: {e}")
             return False
-
@@ -0,0 +1,105 @@
+"""
+Process-level cache of the topics catalog for /api/questions/topics
+"""
+
+import asyncio
+import time
+from typing import Dict, Iterable, List, Optional
+
+from src.config import TOPICS_REFRESH_SECONDS
+from src.utils.database import AsyncDatabase
+
+
+class TopicCatalog:
+    """Sorted list of known topics, refreshed from the topics table in the background
+
+    Requests read the in-memory list, so the endpoint costs the same no matter
+    how many attempts exist. ``version`` changes whenever the list does.
+    Without the background task (no app lifespan, e.g. on Vercel) a read
+    refreshes the list once it is older than ``refresh_seconds``, so topics
+    added by other instances or backfills still show up.
+    """
+
+    def __init__(self, refresh_seconds: float = TOPICS_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._topics: List[str] = []
+        self._loaded = False
+        self._refreshed_at = float("-inf")
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self.version = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    def _replace(self, topics: Iterable[str]):
+        topics = sorted(set(topics))
+        if topics != self._topics:
+            self._topics = topics
+            self.version += 1
+
+    async def refresh(self):
+        """Reload the catalog from the database"""
+        # Failures count too, so a database outage isn't retried on every read
+        self._refreshed_at = time.monotonic()
+        try:
+            db = AsyncDatabase.get_client()
+            result = await db.table("topics").select("name").order("name").execute()
+        except Exception as e:
+            self.refresh_errors += 1
+            print(f"Error refreshing topics: {e}")
+            return
+
+        self._replace(row["name"] for row in result.data)
+        self._loaded = True
+        self.refreshes += 1
+
+    def _stale(self) -> bool:
+        return not self._loaded or time.monotonic() - self._refreshed_at >= self.refresh_seconds
+
+    async def get_topics(self) -> List[str]:
+        """Current topics; loads on demand, and reloads when stale, if the background task isn't running"""
+        if self._stale():
+            # Readers only wait for the first load; later ones keep the current list
+            if self._loaded and self._lock.locked():
+                return self._topics
+            async with self._lock:
+                if self._stale():
+                    await self.refresh()
+        return self._topics
+
+    def add(self, topics: Iterable[str]):
+        """Record topics seen in a save so this worker doesn't wait for the next refresh"""
+        new = set(topics) - set(self._topics)
+        if new:
+            self._replace(self._topics + list(new))
+
+    async def _run(self):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.refresh_seconds)
+
+    def start(self):
+        """Start the background refresher (called from the app lifespan)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict:
+        return {
+            "topics": len(self._topics),
+            "version": self.version,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+        }
+
+
+# Shared catalog for the API
+topic_catalog = TopicCatalog()
@@ -0,0 +1,373 @@
+"""
+Write-behind queue for game sessions
+Buffers validated sessions in memory and bulk-saves them from a background task
+"""
+
+import asyncio
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from src.config import (
+    WRITE_BEHIND_ENABLED,
+    WRITE_BEHIND_QUEUE_SIZE,
+    WRITE_BEHIND_BATCH_SIZE,
+    WRITE_BEHIND_FLUSH_SECONDS,
+    WRITE_BEHIND_ENQUEUE_TIMEOUT,
+    WRITE_BEHIND_DEAD_LETTER_PATH,
+    WRITE_BEHIND_REPLAY_SECONDS,
+)
+from src.models.schemas import GameAnalytics
+from src.services.stats_cache import store_user_stats, bump_user_version
+from src.services.topic_catalog import topic_catalog
+from src.services.leaderboard import leaderboards
+from src.services.mastery import mastery
+from src.utils.database import AsyncDatabase
+
+# Marks the end of the queue on shutdown
+_STOP = object()
+
+
+def _append_text(path: str, text: str):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class WriteQueueFullError(Exception):
+    """Raised when the queue stays full for longer than the enqueue timeout"""
+
+
+class SessionWriteQueue:
+    """Bounded queue of pending game sessions with a batching flusher
+
+    ``enqueue`` assigns the session id up front and returns immediately; the
+    flusher sends everything queued to the ``save_game_sessions`` RPC as one
+    bulk insert whenever ``batch_size`` sessions are waiting or
+    ``flush_seconds`` have passed since the first one arrived.
+
+    Callers were already told these sessions are saved, so a batch that still
+    fails after ``max_retries`` is retried one session at a time and the
+    sessions that fail on their own are appended to a dead-letter file
+    instead of being dropped, and re-sent every ``replay_seconds`` (and at
+    startup) until they go through. save_game_sessions skips ids it already has, so
+    replaying a batch twice is harmless.
+    """
+
+    def __init__(
+        self,
+        max_size: int = WRITE_BEHIND_QUEUE_SIZE,
+        batch_size: int = WRITE_BEHIND_BATCH_SIZE,
+        flush_seconds: float = WRITE_BEHIND_FLUSH_SECONDS,
+        enqueue_timeout: float = WRITE_BEHIND_ENQUEUE_TIMEOUT,
+        max_retries: int = 3,
+        dead_letter_path: str = WRITE_BEHIND_DEAD_LETTER_PATH,
+        replay_seconds: float = WRITE_BEHIND_REPLAY_SECONDS,
+    ):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.enqueue_timeout = enqueue_timeout
+        self.max_retries = max_retries
+        self.dead_letter_path = dead_letter_path
+        self.replay_seconds = replay_seconds
+        self._last_replay = float("-inf")
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = True
+        self._warned_not_started = False
+
+        self.enqueued = 0
+        self.rejected = 0
+        self.flushes = 0
+        self.flushed_sessions = 0
+        self.failed_sessions = 0
+        self.dead_lettered = 0
+        self.replayed = 0
+        self.bookkeeping_errors = 0
+        self.flusher_restarts = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return not self._closed
+
+    def accepting(self) -> bool:
+        """Whether saves should go through the queue
+
+        WRITE_BEHIND_ENABLED with a queue that was never started means the
+        app runs without its lifespan, e.g. behind Mangum(lifespan="off") on
+        Vercel, where no background task outlives a request. Saves then fall
+        back to synchronous writes, and this is logged once.
+        """
+        if self.running:
+            return True
+        if WRITE_BEHIND_ENABLED and self._task is None and not self._warned_not_started:
+            self._warned_not_started = True
+            print("WRITE_BEHIND_ENABLED is set but the queue was not started (no app lifespan); "
+                  "saving game sessions synchronously")
+        return False
+
+    def start(self):
+        """Start the background flusher (called from the app lifespan)"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._closed = False
+        self._start_flusher()
+
+    def _start_flusher(self):
+        self._task = asyncio.create_task(self._run())
+        self._task.add_done_callback(self._flusher_done)
+
+    def _flusher_done(self, task: asyncio.Task):
+        """Restart the flusher if it died while the queue is still accepting sessions"""
+        if task.cancelled() or self._closed:
+            return
+        error = task.exception()
+        print(f"Write-behind flusher stopped unexpectedly ({error!r}); restarting")
+        self.flusher_restarts += 1
+        self._start_flusher()
+
+    async def stop(self):
+        """Stop accepting sessions and flush everything still queued"""
+        if not self.running:
+            return
+        self._closed = True
+        await self._queue.put(_STOP)
+        try:
+            await self._task
+        except Exception as e:
+            print(f"Write-behind flusher failed during shutdown: {e}")
+        self._task = None
+
+    async def enqueue(self, user_id: str, game_id: str, analytics: GameAnalytics) -> str:
+        """Queue a session for saving and return its id
+
+        Waits up to ``enqueue_timeout`` for space so bursts apply backpressure
+        instead of growing memory without bound.
+        """
+        if not self.running:
+            raise RuntimeError("Write-behind queue is not running")
+
+        session_id = str(uuid.uuid4())
+        item = {
+            "session_id": session_id,
+            "user_id": user_id,
+            "game_id": game_id,
+            "analytics": analytics.model_dump(),
+            # A flush (or dead-letter replay) can happen much later; keep the played-at day
+            "played_at": datetime.now(timezone.utc).isoformat(),
+        }
+        try:
+            await asyncio.wait_for(self._queue.put(item), timeout=self.enqueue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise WriteQueueFullError("Too many pending game sessions, please retry shortly")
+
+        self.enqueued += 1
+        return session_id
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            if loop.time() - self._last_replay >= self.replay_seconds:
+                self._last_replay = loop.time()
+                await self._replay_dead_letters()
+            try:
+                item = await asyncio.wait_for(self._queue.get(), self.replay_seconds)
+            except asyncio.TimeoutError:
+                continue
+            if item is _STOP:
+                break
+
+            batch = [item]
+            deadline = loop.time() + self.flush_seconds
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._flush(batch)
+
+        # Sessions that were still waiting for space when the queue closed
+        leftover = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not _STOP:
+                leftover.append(item)
+        if leftover:
+            await self._flush(leftover)
+
+    async def _save(self, batch: List[Dict]) -> Dict:
+        db = AsyncDatabase.get_client()
+        result = await db.rpc("save_game_sessions", {"p_sessions": batch}).execute()
+        return result.data or {}
+
+    async def _flush(self, batch: List[Dict]):
+        """Bulk-save one batch, retrying with backoff before giving up
+
+        One session the database rejects fails the whole RPC, so a batch that
+        still fails is then saved one session at a time and only the sessions
+        that fail on their own are dead-lettered.
+        """
+        start = time.perf_counter()
+        saved: List[Tuple[List[Dict], Dict]] = []
+        for attempt in range(self.max_retries):
+            try:
+                saved.append((batch, await self._save(batch)))
+                break
+            except Exception as e:
+                print(f"Write-behind flush failed (attempt {attempt + 1}/{self.max_retries}): {e}")
+                if attempt < self.max_retries - 1:
+                    await asyncio.sleep(0.5 * 2 ** attempt)
+        else:
+            failed = []
+            if len(batch) == 1:
+                failed = batch
+            else:
+                for item in batch:
+                    try:
+                        saved.append(([item], await self._save([item])))
+                    except Exception as e:
+                        print(f"Write-behind save of session {item.get('session_id')} failed: {e}")
+                        failed.append(item)
+            if failed:
+                await self._dead_letter(failed)
+            if not saved:
+                return
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.flushes += 1
+        self.flushed_sessions += sum(len(items) for items, _ in saved)
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self._total_flush_ms += elapsed_ms
+
+        # The sessions are saved; a failure in the in-memory bookkeeping below
+        # must not take the flusher down with it
+        for items, data in saved:
+            try:
+                self._after_flush(items, data)
+            except Exception as e:
+                self.bookkeeping_errors += 1
+                print(f"Write-behind bookkeeping failed after saving {len(items)} sessions: {e}")
+
+    async def _dead_letter(self, batch: List[Dict]):
+        """Append a batch that couldn't be saved to the dead-letter file for a later replay"""
+        lines = "".join(json.dumps(item) + "\n" for item in batch)
+        try:
+            await asyncio.to_thread(_append_text, self.dead_letter_path, lines)
+        except Exception as e:
+            # Last resort: the sessions at least end up in the logs
+            self.failed_sessions += len(batch)
+            print(f"Could not dead-letter {len(batch)} game sessions ({e}):\n{lines}")
+            return
+        self.dead_lettered += len(batch)
+        print(f"Dead-lettered {len(batch)} game sessions that could not be saved")
+
+    async def _replay_dead_letters(self):
+        """Re-send dead-lettered sessions; batches that fail again go back to the file
+
+        The file is renamed before it is read, so sessions dead-lettered during
+        the replay land in a fresh file. A replay file left by a crash is
+        picked up first.
+        """
+        replay_path = self.dead_letter_path + ".replay"
+        try:
+            if not os.path.exists(replay_path):
+                if not os.path.exists(self.dead_letter_path):
+                    return
+                os.replace(self.dead_letter_path, replay_path)
+            with open(replay_path, encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except Exception as e:
+            print(f"Error reading write-behind dead letters: {e}")
+            return
+
+        items = []
+        for line in lines:
+            try:
+                item = json.loads(line)
+            except ValueError:
+                # A line cut short by a crash mid-append
+                if line.strip():
+                    print(f"Skipping unreadable dead-lettered session: {line[:200]}")
+                continue
+            # Sessions queued before enqueue checked them would fail on every replay
+            try:
+                error = GameAnalytics.model_validate(item["analytics"]).storage_error()
+            except Exception as e:
+                error = str(e)
+            if error:
+                self.failed_sessions += 1
+                print(f"Dropping dead-lettered session the database can't store ({error}): {line}")
+                continue
+            items.append(item)
+        for i in range(0, len(items), self.batch_size):
+            await self._flush(items[i:i + self.batch_size])
+        os.remove(replay_path)
+        self.replayed += len(items)
+
+    def _after_flush(self, batch: List[Dict], data: Dict):
+        """Refresh caches, the topics catalog, leaderboards and mastery for a saved batch"""
+        # Refresh the /api/stats/user cache for everyone in the batch
+        for row in data.get("user_stats") or []:
+            store_user_stats(row["user_id"], row)
+        for user_id in {item["user_id"] for item in batch}:
+            bump_user_version(user_id)
+        topic_catalog.add(
+            attempt["topic"] for item in batch for attempt in item["analytics"]["questionAttempts"]
+        )
+        inserted = set(data.get("inserted") or [])
+        for item in batch:
+            if item["session_id"] in inserted:
+                leaderboards.record(
+                    item["user_id"], item["game_id"], item["analytics"]["score"], item.get("played_at")
+                )
+                mastery.record(item["user_id"], (
+                    (attempt["topic"], attempt["difficulty"], attempt["questionId"], attempt["isCorrect"])
+                    for attempt in item["analytics"]["questionAttempts"]
+                ))
+
+    def stats(self) -> Dict:
+        """Queue depth and flush latency for the metrics endpoint"""
+        return {
+            "enabled": WRITE_BEHIND_ENABLED,
+            "running": self.running,
+            "mode": "write_behind" if self.running else "synchronous",
+            "depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_size": self.max_size,
+            "enqueued": self.enqueued,
+            "rejected": self.rejected,
+            "flushes": self.flushes,
+            "flushed_sessions": self.flushed_sessions,
+            "failed_sessions": self.failed_sessions,
+            "dead_lettered": self.dead_lettered,
+            "replayed": self.replayed,
+            "dead_letter_pending": os.path.exists(self.dead_letter_path),
+            "bookkeeping_errors": self.bookkeeping_errors,
+            "flusher_restarts": self.flusher_restarts,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "avg_flush_ms": round(self._total_flush_ms / self.flushes, 2) if self.flushes else 0.0,
+            "max_flush_ms": round(self.max_flush_ms, 2),
+        }
+
+
+# Shared queue; only started when WRITE_BEHIND_ENABLED is set
+session_write_queue = SessionWriteQueue()
@@ -0,0 +1,120 @@
+"""
+In-process caching primitives shared by the API and services
+"""
+
+import sys
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+def approx_sizeof(obj: Any) -> int:
+    """Rough deep size in bytes of JSON-like data (dicts, lists, strings, numbers)"""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(approx_sizeof(k) + approx_sizeof(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(approx_sizeof(item) for item in obj)
+    return size
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire at an absolute timestamp
+
+    Every entry carries its own expiry, so callers can either pass an explicit
+    ``expires_at`` (e.g. a JWT ``exp`` claim) or fall back to the default TTL.
+    Lookups and inserts are O(1); the least recently used entry is evicted once
+    ``max_size`` is reached. Pass ``sizeof`` to also track approximate memory use.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl: Optional[float] = None,
+        sizeof: Optional[Callable[[Any], int]] = None,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value, or ``default`` if missing or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at, size = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                self.bytes -= size
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, expires_at: Optional[float] = None) -> None:
+        """Store a value, evicting the least recently used entry when full"""
+        if expires_at is None and self.ttl is not None:
+            expires_at = time.time() + self.ttl
+
+        size = self.sizeof(value) if self.sizeof is not None else 0
+
+        with self._lock:
+            old = self._data.get(key)
+            if old is not None:
+                self.bytes -= old[2]
+                self._data.move_to_end(key)
+            self._data[key] = (value, expires_at, size)
+            self.bytes += size
+
+            while len(self._data) > self.max_size:
+                _, evicted = self._data.popitem(last=False)
+                self.bytes -= evicted[2]
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove an entry and return its value"""
+        with self._lock:
+            entry = self._data.pop(key, None)
+            if entry is not None:
+                self.bytes -= entry[2]
+        return entry[0] if entry is not None else default
+
+    def clear(self) -> None:
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and (entry[1] is None or entry[1] > time.time())
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for the metrics endpoint"""
+        lookups = self.hits + self.misses
+        stats = {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+        if self.sizeof is not None:
+            stats["approx_bytes"] = self.bytes
+        return stats
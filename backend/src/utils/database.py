@@ -2,9 +2,20 @@
 Database connection and utilities
 """
 
-from supabase import create_client, Client
+from supabase import create_client, Client, acreate_client, AsyncClient, AsyncClientOptions
+from postgrest import AsyncPostgrestClient
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_HEADERS
+import httpx
 import os
-from typing import Optional
+from typing import Optional, Dict, Union
+from src.config import (
+    SUPABASE_URL,
+    SUPABASE_SERVICE_KEY,
+    SUPABASE_ANON_KEY,
+    DB_POOL_SIZE,
+    DB_KEEPALIVE_SECONDS,
+    DB_TIMEOUT_SECONDS,
+)
 
 class Database:
     """Singleton database connection"""
@@ -52,3 +63,100 @@ def get_db() -> Client:
     """Dependency for FastAPI routes"""
     return Database.get_client()
 
+
+class PooledPostgrestClient(AsyncPostgrestClient):
+    """Async PostgREST client whose HTTP session keeps a bounded keep-alive pool"""
+    
+    def create_session(
+        self,
+        base_url: str,
+        headers: Dict[str, str],
+        timeout: Union[int, float, httpx.Timeout],
+        verify: bool = True,
+        proxy: Optional[str] = None,
+    ) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            verify=verify,
+            proxy=proxy,
+            follow_redirects=True,
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=DB_POOL_SIZE,
+                max_keepalive_connections=DB_POOL_SIZE,
+                keepalive_expiry=DB_KEEPALIVE_SECONDS,
+            ),
+        )
+
+
+class AsyncDatabase:
+    """Singleton async data-access clients
+    
+    Every table/RPC call on a worker goes through one PostgREST client, and so
+    through one pooled HTTP/2 connection set, instead of blocking the event
+    loop on the synchronous ``supabase.Client``.
+    """
+    _instance: Optional[PooledPostgrestClient] = None
+    _auth_instance: Optional[AsyncClient] = None
+    
+    @classmethod
+    def get_client(cls) -> PooledPostgrestClient:
+        """Get or create the shared async PostgREST client"""
+        if cls._instance is None:
+            # Service role key bypasses RLS, same as Database.get_client
+            supabase_key = SUPABASE_SERVICE_KEY or SUPABASE_ANON_KEY
+            if not SUPABASE_URL or not supabase_key:
+                raise ValueError(
+                    "Supabase URL and Key are required. "
+                    "Set SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY (or NEXT_PUBLIC_SUPABASE_ANON_KEY) in backend/.env"
+                )
+            
+            cls._instance = PooledPostgrestClient(
+                f"{SUPABASE_URL.rstrip('/')}/rest/v1",
+                headers={
+                    **DEFAULT_POSTGREST_CLIENT_HEADERS,
+                    "apikey": supabase_key,
+                    "Authorization": f"Bearer {supabase_key}",
+                },
+                timeout=DB_TIMEOUT_SECONDS,
+            )
+        
+        return cls._instance
+    
+    @classmethod
+    async def get_auth_client(cls) -> AsyncClient:
+        """Get or create the async Supabase client used for auth operations"""
+        if cls._auth_instance is None:
+            supabase_key = SUPABASE_ANON_KEY or SUPABASE_SERVICE_KEY
+            if not SUPABASE_URL or not supabase_key:
+                raise ValueError("Supabase URL and Key are required for authentication")
+            
+            # The server never acts as a logged-in user, so don't keep sessions around
+            cls._auth_instance = await acreate_client(
+                SUPABASE_URL,
+                supabase_key,
+                options=AsyncClientOptions(persist_session=False, auto_refresh_token=False),
+            )
+        
+        return cls._auth_instance
+    
+    @classmethod
+    async def close(cls):
+        """Close pooled connections (called from the app lifespan)"""
+        if cls._instance is not None:
+            await cls._instance.aclose()
+            cls._instance = None
+        cls._auth_instance = None
+
+
+async def get_async_db() -> PooledPostgrestClient:
+    """Async dependency for FastAPI routes"""
+    return AsyncDatabase.get_client()
+
+
+async def get_async_auth_db() -> AsyncClient:
+    """Async dependency for authentication routes"""
+    return await AsyncDatabase.get_auth_client()
+
@@ -0,0 +1,54 @@
+"""
+Weak ETags for conditional GETs
+Tags are derived from in-process version counters, so a 304 can be decided
+before any database query runs
+"""
+
+import hashlib
+import secrets
+import time
+from typing import Optional
+
+from fastapi import Response
+
+# Tags from a previous process (or another worker) never match this one's
+BOOT_ID = secrets.token_hex(8)
+
+
+def weak_etag(*parts, max_age: Optional[float] = None) -> str:
+    """Weak ETag over ``parts``
+
+    With ``max_age`` the tag also rolls over every ``max_age`` seconds, which
+    bounds how long a 304 can hide a change made through another worker.
+    """
+    key = [BOOT_ID, *map(str, parts)]
+    if max_age:
+        key.append(str(int(time.time() // max_age)))
+    digest = hashlib.sha1(":".join(key).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against ``etag``"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(_opaque(tag) == _opaque(etag) for tag in if_none_match.split(","))
+
+
+def set_etag(response: Response, etag: str):
+    """Attach the tag; browsers keep the body but revalidate on every use"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+
+
+def not_modified(etag: str) -> Response:
+    response = Response(status_code=304)
+    set_etag(response, etag)
+    return response
@@ -0,0 +1,79 @@
+"""
+Incremental parser for a JSON array of objects arriving in chunks (e.g. a streamed LLM completion)
+"""
+
+import json
+from typing import Dict, List
+
+
+class JSONArrayStream:
+    """Yields each top-level object of a JSON array as soon as its closing brace arrives
+
+    Text before the opening ``[`` (prose, a ```json fence) is ignored. Every
+    character is scanned once, tracking string/escape state and nesting depth,
+    and the buffer is trimmed after each object, so memory stays at about one
+    object. Objects that fail to parse are skipped and counted in ``errors``.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0  # 0 = before the array, 1 = inside it, 2+ = inside an element
+        self._start = -1
+        self._in_string = False
+        self._escape = False
+        self.done = False
+        self.errors = 0
+
+    def feed(self, text: str) -> List[Dict]:
+        """Add a chunk; returns the objects it completed"""
+        if self.done:
+            return []
+        self._buffer += text
+        objects = []
+        buffer = self._buffer
+        i = self._pos
+        while i < len(buffer):
+            char = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif self._depth == 0:
+                if char == "[":
+                    self._depth = 1
+            elif char == '"':
+                self._in_string = True
+            elif char in "[{":
+                if self._depth == 1:
+                    self._start = i
+                self._depth += 1
+            elif char in "]}":
+                self._depth -= 1
+                if self._depth == 1 and self._start != -1:
+                    try:
+                        value = json.loads(buffer[self._start:i + 1])
+                    except ValueError:
+                        value = None
+                    if isinstance(value, dict):
+                        objects.append(value)
+                    else:
+                        self.errors += 1
+                    self._start = -1
+                    # Drop everything up to the end of this object
+                    buffer = buffer[i + 1:]
+                    i = 0
+                    continue
+                if self._depth == 0:
+                    self.done = True
+                    break
+            i += 1
+
+        if self._start == -1 and self._depth <= 1:
+            buffer, i = "", 0
+        self._buffer = buffer
+        self._pos = i
+        return objects
@@ -0,0 +1,46 @@
+"""
+Keyset pagination helpers
+Cursors are opaque to clients: URL-safe base64 of the last row's sort key
+"""
+
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Dict, Tuple
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a client sends a cursor we didn't issue"""
+
+
+def encode_cursor(created_at: str, row_id: str) -> str:
+    """Cursor pointing just past the row with this (created_at, id)"""
+    raw = json.dumps([created_at, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Inverse of encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        # Both values end up inside a PostgREST filter, so only accept what we issued
+        datetime.fromisoformat(created_at)
+        return created_at, str(uuid.UUID(row_id))
+    except Exception:
+        raise InvalidCursorError("Invalid cursor")
+
+
+def keyset_filter(created_at: str, row_id: str, descending: bool = True) -> str:
+    """PostgREST or-filter for rows strictly after the cursor in (created_at, id) order
+
+    Descending (newest first) by default; pass ``descending=False`` for oldest first.
+    """
+    op = "lt" if descending else "gt"
+    return f'created_at.{op}."{created_at}",and(created_at.eq."{created_at}",id.{op}.{row_id})'
+
+
+def cursor_for(row: Dict) -> str:
+    """Cursor for the last row of a page"""
+    return encode_cursor(row["created_at"], row["id"])
@@ -0,0 +1,141 @@
+"""
+Supabase access token verification with a verified-token cache
+"""
+
+import asyncio
+import hashlib
+from typing import Dict, Optional
+
+import jwt
+
+from src.config import (
+    SUPABASE_JWT_SECRET,
+    SUPABASE_JWKS_URL,
+    JWT_AUDIENCE,
+    JWT_CACHE_SIZE,
+    JWKS_CACHE_SECONDS,
+)
+from src.utils.cache import TTLCache
+
+# Asymmetric algorithms Supabase may use when signing keys are enabled
+ASYMMETRIC_ALGORITHMS = ["RS256", "ES256"]
+
+
+class TokenVerifier:
+    """Verifies Supabase JWTs and caches the resulting user until the token expires
+
+    HS256 tokens are checked against the project JWT secret; RS256/ES256 tokens
+    are checked against the project's JWKS, which PyJWT keeps cached locally.
+    A successful verification is stored under the SHA-256 digest of the token
+    with the token's ``exp`` as the entry expiry, so repeat requests cost a
+    single dict lookup.
+
+    PyJWKClient fetches the JWKS with blocking urllib, so async callers use
+    ``verify_async``: asymmetric tokens that miss the cache are verified in a
+    worker thread instead of stalling the event loop, and ``prefetch`` loads
+    the keys at startup so the first requests don't wait for the fetch.
+    """
+
+    def __init__(
+        self,
+        secret: Optional[str] = SUPABASE_JWT_SECRET,
+        jwks_url: Optional[str] = SUPABASE_JWKS_URL,
+        audience: Optional[str] = JWT_AUDIENCE,
+        cache_size: int = JWT_CACHE_SIZE,
+    ):
+        self.secret = secret
+        self.jwks_url = jwks_url
+        self.audience = audience
+        self.cache = TTLCache(max_size=cache_size)
+        self._jwks_client: Optional[jwt.PyJWKClient] = None
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def _get_jwks_client(self) -> jwt.PyJWKClient:
+        if self._jwks_client is None:
+            if not self.jwks_url:
+                raise jwt.InvalidTokenError("No JWKS URL configured for asymmetric tokens")
+            self._jwks_client = jwt.PyJWKClient(
+                self.jwks_url,
+                cache_keys=True,
+                lifespan=JWKS_CACHE_SECONDS,
+            )
+        return self._jwks_client
+
+    def prefetch(self):
+        """Fetch and cache the JWKS (blocking; run it in a thread)"""
+        if self.jwks_url:
+            self._get_jwks_client().get_signing_keys()
+
+    def _decode(self, token: str) -> Dict:
+        """Check the signature and standard claims, returning the payload"""
+        algorithm = jwt.get_unverified_header(token).get("alg")
+        options = {"require": ["exp", "sub"], "verify_aud": bool(self.audience)}
+
+        if algorithm == "HS256":
+            if not self.secret:
+                raise jwt.InvalidTokenError("SUPABASE_JWT_SECRET is not configured")
+            key = self.secret
+        elif algorithm in ASYMMETRIC_ALGORITHMS:
+            key = self._get_jwks_client().get_signing_key_from_jwt(token).key
+        else:
+            raise jwt.InvalidAlgorithmError(f"Unsupported token algorithm: {algorithm}")
+
+        return jwt.decode(
+            token,
+            key,
+            algorithms=[algorithm],
+            audience=self.audience,
+            options=options,
+        )
+
+    def verify(self, token: str) -> Optional[Dict]:
+        """Return ``{"id", "email"}`` for a valid token, otherwise None"""
+        digest = self._digest(token)
+        user = self.cache.get(digest)
+        if user is not None:
+            return user
+        return self._verify_uncached(token, digest)
+
+    async def verify_async(self, token: str) -> Optional[Dict]:
+        """``verify`` for the event loop; may fetch the JWKS, so that runs in a thread"""
+        digest = self._digest(token)
+        user = self.cache.get(digest)
+        if user is not None:
+            return user
+        try:
+            algorithm = jwt.get_unverified_header(token).get("alg")
+        except jwt.InvalidTokenError as e:
+            print(f"Error verifying token: {e}")
+            return None
+        if algorithm in ASYMMETRIC_ALGORITHMS:
+            return await asyncio.to_thread(self._verify_uncached, token, digest)
+        return self._verify_uncached(token, digest)
+
+    def _verify_uncached(self, token: str, digest: str) -> Optional[Dict]:
+        """Decode and check the token, caching the user until the token expires"""
+        try:
+            payload = self._decode(token)
+        except jwt.ExpiredSignatureError:
+            print("Token has expired")
+            return None
+        except (jwt.InvalidTokenError, jwt.PyJWKClientError) as e:
+            print(f"Error verifying token: {e}")
+            return None
+
+        user = {
+            "id": payload["sub"],
+            "email": payload.get("email", ""),
+        }
+        self.cache.set(digest, user, expires_at=float(payload["exp"]))
+        return user
+
+    def stats(self) -> Dict:
+        """Verified-token cache counters"""
+        return self.cache.stats()
+
+
+# Shared verifier so every request hits the same cache
+token_verifier = TokenVerifier()
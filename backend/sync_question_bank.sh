@@ -0,0 +1,30 @@
+#!/bin/bash
+# Copy the games' question banks (questions.json / questions.ts under frontend/)
+# into backend/question_bank/, keeping their relative paths.
+#
+# Deploys are built from backend/ alone (Docker, Railway, Render, Fly.io,
+# Vercel), so the static bank behind GET /api/questions/ ships from this copy.
+# Re-run it and commit the result after editing a bank file.
+
+set -e
+
+cd "$(dirname "$0")"
+SOURCE=../frontend
+TARGET=question_bank
+
+if [ ! -d "$SOURCE" ]; then
+    echo "❌ $SOURCE not found; run this from a full checkout"
+    exit 1
+fi
+
+rm -rf "$TARGET"
+count=0
+while IFS= read -r -d '' path; do
+    relative="${path#$SOURCE/}"
+    mkdir -p "$TARGET/$(dirname "$relative")"
+    cp "$path" "$TARGET/$relative"
+    count=$((count + 1))
+done < <(find "$SOURCE" \( -name node_modules -o -name .next -o -name .git \) -prune -o \
+    \( -name questions.json -o -name questions.ts \) -type f -print0)
+
+echo "✅ Copied $count question bank files into backend/$TARGET/"
@@ -0,0 +1,8 @@
+"""
+Shared pytest setup - makes ``src`` importable when pytest runs from backend/ or the repo root
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,74 @@
+"""
+Tests for the incremental JSON array parser (src/utils/json_stream.py)
+"""
+
+import json
+
+from src.utils.json_stream import JSONArrayStream
+
+QUESTIONS = [
+    {"question": "If 2x + 5 = 11, what is x?", "options": ["1", "2", "3", "4"], "correct_answer": 2},
+    {"question": "Which word means \"brief\"?", "options": ["terse", "[long]", "{wide}", "slow"], "correct_answer": 0},
+    {"question": "Path C:\\temp\\new", "options": [], "meta": {"nested": [1, {"deep": "}"}]}},
+]
+
+
+def feed_all(stream, chunks):
+    objects = []
+    for chunk in chunks:
+        objects.extend(stream.feed(chunk))
+    return objects
+
+
+def test_whole_array_in_one_chunk():
+    stream = JSONArrayStream()
+    assert stream.feed(json.dumps(QUESTIONS)) == QUESTIONS
+    assert stream.done
+    assert stream.errors == 0
+
+
+def test_every_split_point():
+    text = json.dumps(QUESTIONS)
+    for cut in range(1, len(text)):
+        stream = JSONArrayStream()
+        assert feed_all(stream, [text[:cut], text[cut:]]) == QUESTIONS, cut
+        assert stream.done
+
+
+def test_one_character_at_a_time():
+    text = json.dumps(QUESTIONS, indent=2)
+    stream = JSONArrayStream()
+    assert feed_all(stream, text) == QUESTIONS
+
+
+def test_objects_are_returned_as_soon_as_they_close():
+    first, second = (json.dumps(q) for q in QUESTIONS[:2])
+    stream = JSONArrayStream()
+    assert stream.feed("[" + first[:-1]) == []
+    assert stream.feed("}, " + second[:10]) == [QUESTIONS[0]]
+    assert stream.feed(second[10:] + "]") == [QUESTIONS[1]]
+
+
+def test_escaped_quotes_and_backslashes_inside_strings():
+    item = {"question": 'She said \\"}]\\" then left \\\\', "explanation": "a \"quoted\" [bracket] {brace}"}
+    text = json.dumps([item])
+    stream = JSONArrayStream()
+    # Split right after the backslash so the escape spans two chunks
+    cut = text.index("\\") + 1
+    assert feed_all(stream, [text[:cut], text[cut:]]) == [item]
+    assert stream.errors == 0
+
+
+def test_text_around_the_array_is_ignored():
+    text = "Here are the questions:\n```json\n" + json.dumps(QUESTIONS[:1]) + "\n```\nGood luck!"
+    stream = JSONArrayStream()
+    assert feed_all(stream, [text[:20], text[20:]]) == QUESTIONS[:1]
+    assert stream.done
+    assert stream.feed('[{"late": true}]') == []
+
+
+def test_bad_elements_are_skipped_and_counted():
+    stream = JSONArrayStream()
+    objects = stream.feed('[{"a": 1}, {"b": nope}, [1, 2], {"c": 3}]')
+    assert objects == [{"a": 1}, {"c": 3}]
+    assert stream.errors == 2
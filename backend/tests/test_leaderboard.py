@@ -0,0 +1,93 @@
+"""
+Tests for the top-K leaderboard board (src/services/leaderboard.py)
+"""
+
+import random
+from datetime import timedelta
+
+from src.services.leaderboard import GLOBAL_BOARD, WEEKLY_BOARD, LeaderboardService, TopKBoard, game_board
+
+
+def test_keeps_the_top_k_and_evicts_the_lowest():
+    board = TopKBoard(k=3)
+    for user_id, score in [("a", 10), ("b", 30), ("c", 20)]:
+        assert board.offer(user_id, score)
+    assert board.offer("d", 25)
+    assert board.ranked() == [("b", 30), ("d", 25), ("c", 20)]
+    assert "a" not in board.scores
+
+
+def test_scores_not_above_the_lowest_are_rejected_when_full():
+    board = TopKBoard(k=2)
+    board.offer("a", 10)
+    board.offer("b", 20)
+    assert not board.offer("c", 5)
+    assert not board.offer("c", 10)
+    assert board.ranked() == [("b", 20), ("a", 10)]
+
+
+def test_players_keep_their_best_score():
+    board = TopKBoard(k=3)
+    board.offer("a", 10)
+    board.offer("b", 20)
+    assert not board.offer("a", 5)
+    assert not board.offer("a", 10)
+    assert board.offer("a", 40)
+    assert board.ranked() == [("a", 40), ("b", 20)]
+
+
+def test_improved_score_leaves_no_stale_minimum():
+    board = TopKBoard(k=2)
+    board.offer("a", 10)
+    board.offer("b", 20)
+    # a's old entry (10) is still in the heap; eviction must compare against b's 20
+    board.offer("a", 30)
+    assert not board.offer("c", 15)
+    assert board.offer("c", 25)
+    assert board.ranked() == [("a", 30), ("c", 25)]
+
+
+def test_ties_are_ranked_by_user_id():
+    board = TopKBoard(k=3)
+    for user_id in ["c", "a", "b"]:
+        board.offer(user_id, 50)
+    assert [user_id for user_id, _ in board.ranked()] == ["a", "b", "c"]
+
+
+def test_matches_a_full_sort_under_random_updates():
+    rng = random.Random(7)
+    board = TopKBoard(k=10)
+    best = {}
+    for _ in range(5000):
+        user_id, score = f"user-{rng.randrange(200)}", rng.randrange(10_000)
+        best[user_id] = max(score, best.get(user_id, score))
+        board.offer(user_id, score)
+        assert len(board._heap) <= 2 * board.k + 1
+    expected = sorted(best.items(), key=lambda item: (-item[1], item[0]))[:10]
+    assert board.ranked() == expected
+
+
+def test_rank_is_exact_on_the_board_and_estimated_below_it():
+    board = TopKBoard(k=2, bucket_width=10)
+    board.offer("a", 95)
+    board.offer("b", 80)
+    board.histogram = {9: 1, 8: 1, 5: 4, 2: 10}
+    assert board.rank("a", 95) == (1, False)
+    assert board.rank("b", 80) == (2, False)
+    # 2 players in higher buckets plus 4 * (59 - 55) / 10 of bucket 5 (50-59) above 55
+    assert board.rank("z", 55) == (4, True)
+    assert board.rank("z", 0) == (17, True)
+    assert board.rank("z", None) == (None, False)
+    assert board.total_players == 16
+
+
+def test_sessions_played_before_this_week_skip_the_weekly_board():
+    service = LeaderboardService(size=10)
+    last_week = service.week_start - timedelta(days=2)
+    service.record("a", "zombie", 50, played_at=last_week)
+    service.record("b", "zombie", 40, played_at=last_week.isoformat())
+    service.record("c", "zombie", 30, played_at=service.week_start + timedelta(hours=1))
+    service.record("d", "zombie", 20)
+    assert service._boards[GLOBAL_BOARD].ranked() == [("a", 50), ("b", 40), ("c", 30), ("d", 20)]
+    assert service._boards[game_board("zombie")].ranked() == [("a", 50), ("b", 40), ("c", 30), ("d", 20)]
+    assert service._boards[WEEKLY_BOARD].ranked() == [("c", 30), ("d", 20)]
@@ -0,0 +1,88 @@
+"""
+Tests for keyset pagination cursors and filters (src/utils/pagination.py)
+"""
+
+import re
+import uuid
+
+import pytest
+
+from src.utils.pagination import InvalidCursorError, cursor_for, decode_cursor, encode_cursor, keyset_filter
+
+CREATED_AT = "2025-03-01T12:30:45.123456+00:00"
+ROW_ID = "6f1c2a9e-3b7d-4c55-9a8e-0d2f4b6c8e10"
+
+_FILTER = re.compile(r'^created_at\.(lt|gt)\."([^"]+)",and\(created_at\.eq\."([^"]+)",id\.(lt|gt)\.([0-9a-f-]+)\)$')
+
+
+def rows_after(rows, or_filter):
+    """Apply a keyset_filter string the way PostgREST would, for ISO timestamps in one time zone"""
+    match = _FILTER.match(or_filter)
+    assert match, or_filter
+    op, created_at, tie_created_at, tie_op, row_id = match.groups()
+    assert tie_created_at == created_at and tie_op == op
+    after = (lambda a, b: a < b) if op == "lt" else (lambda a, b: a > b)
+    return [
+        row for row in rows
+        if after(row["created_at"], created_at) or (row["created_at"] == created_at and after(row["id"], row_id))
+    ]
+
+
+def paginate(rows, page_size, descending=True):
+    ordered = sorted(rows, key=lambda row: (row["created_at"], row["id"]), reverse=descending)
+    pages, cursor = [], None
+    while True:
+        remaining = rows_after(ordered, keyset_filter(*decode_cursor(cursor), descending)) if cursor else ordered
+        page = remaining[:page_size]
+        if not page:
+            return pages
+        pages.append(page)
+        cursor = cursor_for(page[-1])
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(CREATED_AT, ROW_ID)
+    assert "=" not in cursor
+    assert re.fullmatch(r"[A-Za-z0-9_-]+", cursor)
+    assert decode_cursor(cursor) == (CREATED_AT, ROW_ID)
+
+
+def test_cursor_for_uses_the_row_sort_key():
+    assert decode_cursor(cursor_for({"created_at": CREATED_AT, "id": ROW_ID, "score": 10})) == (CREATED_AT, ROW_ID)
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not-a-cursor",
+    encode_cursor("yesterday", ROW_ID),
+    encode_cursor(CREATED_AT, "1 or 1=1"),
+    encode_cursor(CREATED_AT, ROW_ID)[:-3],
+])
+def test_invalid_cursors_are_rejected(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
+
+
+def test_keyset_filter_breaks_ties_on_id():
+    assert keyset_filter(CREATED_AT, ROW_ID) == (
+        f'created_at.lt."{CREATED_AT}",and(created_at.eq."{CREATED_AT}",id.lt.{ROW_ID})'
+    )
+    assert keyset_filter(CREATED_AT, ROW_ID, descending=False) == (
+        f'created_at.gt."{CREATED_AT}",and(created_at.eq."{CREATED_AT}",id.gt.{ROW_ID})'
+    )
+
+
+@pytest.mark.parametrize("descending", [True, False])
+def test_pages_cover_rows_with_equal_created_at_exactly_once(descending):
+    # Many rows share a timestamp, and a page boundary falls inside each group
+    timestamps = ["2025-03-01T12:00:00+00:00", "2025-03-01T12:00:01+00:00", "2025-03-01T12:00:02+00:00"]
+    rows = [
+        {"created_at": timestamps[n % len(timestamps)], "id": str(uuid.UUID(int=n * 7919))}
+        for n in range(20)
+    ]
+    pages = paginate(rows, page_size=3, descending=descending)
+    seen = [row["id"] for page in pages for row in page]
+    assert len(seen) == len(rows)
+    assert sorted(seen) == sorted(row["id"] for row in rows)
+    expected = sorted(rows, key=lambda row: (row["created_at"], row["id"]), reverse=descending)
+    assert [row for page in pages for row in page] == expected
@@ -0,0 +1,103 @@
+"""
+Tests for near-duplicate question detection (src/services/question_index.py)
+"""
+
+import numpy as np
+
+from src.services.question_index import (
+    MERGE_EVERY, MinHashIndex, QuestionIndex, normalize_question, signatures, similarity,
+)
+
+QUESTION = "If 3x + 7 = 22, what is the value of x?"
+REWORDED = "IF 3x+7=22 , what is the value of x ?"
+DISTINCT = "Which choice best describes the function of the second paragraph in the passage about glaciers?"
+
+
+def make_index(**kwargs) -> QuestionIndex:
+    index = QuestionIndex(enabled=True, **kwargs)
+    # Keep the static bank out of these tests
+    index._bank_indexed = True
+    return index
+
+
+def test_normalize_ignores_case_punctuation_and_operator_spacing():
+    assert normalize_question(QUESTION) == normalize_question(REWORDED)
+    assert normalize_question("The answer is 2.5.") == "the answer is 2.5"
+
+
+def test_signatures_are_deterministic():
+    first, second, _ = signatures([QUESTION, QUESTION, DISTINCT])
+    assert first.dtype == np.uint32
+    assert (first == second).all()
+    assert (signatures([QUESTION])[0] == first).all()
+
+
+def test_near_duplicate_scores_high_and_distinct_scores_low():
+    sigs = signatures([QUESTION, REWORDED, DISTINCT])
+    assert similarity(sigs[None, 0], sigs[1])[0] == 1.0
+    assert similarity(sigs[None, 0], sigs[2])[0] < 0.3
+
+
+def test_minhash_index_best_match():
+    index = MinHashIndex()
+    assert index.best_match(signatures([QUESTION])[0]) == 0.0
+    index.add(signatures([QUESTION]))
+    assert index.best_match(signatures([REWORDED])[0]) == 1.0
+    assert index.best_match(signatures([DISTINCT])[0]) < 0.7
+
+
+def test_minhash_index_finds_entries_after_merging():
+    texts = [f"Question number {n}: what is {n} times {n + 1}?" for n in range(MERGE_EVERY // 4)]
+    index = MinHashIndex()
+    for sig in signatures(texts):
+        index.add(sig[None, :])
+    assert index.size == len(texts)
+    assert len(index._keys) > 0
+    assert index.best_match(signatures([texts[3]])[0]) == 1.0
+
+
+def test_filter_new_drops_near_duplicates_of_indexed_questions():
+    index = make_index()
+    index.add([QUESTION])
+    fresh, duplicates = index.filter_new([{"question": REWORDED}, {"question": DISTINCT}])
+    assert fresh == [{"question": DISTINCT}]
+    assert duplicates == [{"question": REWORDED}]
+    assert index.duplicates == 1
+
+
+def test_filter_new_catches_repeats_within_a_batch():
+    index = make_index()
+    fresh, duplicates = index.filter_new([{"question": QUESTION}, {"question": REWORDED}])
+    assert fresh == [{"question": QUESTION}]
+    assert duplicates == [{"question": REWORDED}]
+
+
+def test_filter_new_keeps_distinct_questions():
+    index = make_index()
+    questions = [{"question": QUESTION}, {"question": DISTINCT}]
+    fresh, duplicates = index.filter_new(questions)
+    assert fresh == questions
+    assert duplicates == []
+
+
+def test_user_history_uses_the_lower_threshold():
+    # Same template, different numbers: below the global threshold, above the history one
+    first = {"question": "A rectangle has a length of 12 cm and a width of 5 cm. What is its perimeter?"}
+    second = {"question": "A rectangle has a length of 31 cm and a width of 9 cm. What is its perimeter?"}
+    sigs = signatures([first["question"], second["question"]])
+    score = similarity(sigs[None, 0], sigs[1])[0]
+
+    index = make_index(threshold=score + 0.01, history_threshold=score - 0.01)
+    assert index.filter_new([first], user_id="user-1") == ([first], [])
+    assert index.filter_new([second], user_id="user-2") == ([second], [])
+
+    index = make_index(threshold=score + 0.01, history_threshold=score - 0.01)
+    index.filter_new([first], user_id="user-1")
+    assert index.filter_new([second], user_id="user-1") == ([], [second])
+    assert index.history_duplicates == 1
+
+
+def test_disabled_index_passes_everything_through():
+    index = QuestionIndex(enabled=False)
+    questions = [{"question": QUESTION}, {"question": QUESTION}]
+    assert index.filter_new(questions) == (questions, [])